@@ -0,0 +1,82 @@
+"""
+Compare the size of a full VyOS bgp configuration load with the incremental
+commands produced by vyos_diff for a one neighbor change.
+
+The bgp template is rendered for a synthetic device before and after
+changing the remote ASN of one neighbor, adding one and removing one.
+
+Usage::
+
+    python bench/config_delta.py --neighbors 10000
+
+"""
+
+import argparse
+import copy
+import ipaddress
+import os
+import sys
+import time
+
+import jinja2
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', 'states')
+sys.path.insert(0, os.path.join(ROOT, '_utils'))
+
+# pylint: disable=wrong-import-position
+import synthetic
+from vyos_diff import diff
+
+
+def _ipv4(value) -> bool:
+    try:
+        return ipaddress.ip_address(value).version == 4
+    except ValueError:
+        return False
+
+
+def _render(data: dict, version: str) -> str:
+    env = jinja2.Environment()
+    env.filters['ipv4'] = _ipv4
+
+    with open(
+        os.path.join(ROOT, 'bgp', 'templates', 'vyos.jinja'), encoding='utf-8'
+    ) as f:
+        template = env.from_string(f.read())
+
+    return template.render(data=data, grains={'version': version})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--neighbors', type=int, default=10000)
+    parser.add_argument('--version', default='1.4')
+    args = parser.parse_args()
+
+    old = synthetic.bgp(0, args.neighbors)
+    new = copy.deepcopy(old)
+
+    neighbors = list(new['neighbors'])
+    new['neighbors'][neighbors[0]]['remote_asn'] = 65000
+    del new['neighbors'][neighbors[1]]
+    new['neighbors']['192.0.2.1'] = {'peer_group': 'TRANSIT-IPV4', 'remote_asn': 64999}
+
+    old_text = _render(old, args.version)
+    new_text = _render(new, args.version)
+
+    start = time.perf_counter()
+    commands = diff(old_text, new_text)
+    elapsed = time.perf_counter() - start
+
+    delta = '\n'.join(commands)
+
+    lines = [line for line in new_text.splitlines() if line.strip()]
+    print(f'full load: {len(lines)} lines, {len(new_text)} bytes')
+    print(f'     delta: {len(commands)} commands, {len(delta)} bytes')
+    print(f'diff time: {elapsed * 1000:.1f} ms')
+    print()
+    print(delta)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Measure NetDB grains load time with and without cached device grains.
+
+The device column is served with configurable latency from a separate
+process. The 'uncached' runs start without a grains cache and so query NetDB
+synchronously, as every grains load did before device grains were cached;
+the 'cached' runs load from disk. The time taken to import the grains module
+is reported as well.
+
+Usage::
+
+    python bench/grains_load.py --latency 0.2 --runs 20
+
+"""
+
+import argparse
+import http.server
+import importlib.util
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', 'states')
+sys.path.insert(0, os.path.join(ROOT, '_utils'))
+
+# pylint: disable=wrong-import-position
+import synthetic
+import netdb_api
+
+
+def _serve(body: bytes, port: int, latency: float):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):  # pylint: disable=arguments-differ
+            pass
+
+    http.server.ThreadingHTTPServer(('127.0.0.1', port), Handler).serve_forever()
+
+
+def _import_grains():
+    start = time.perf_counter()
+    spec = importlib.util.spec_from_file_location(
+        'netdb_grains', os.path.join(ROOT, '_grains', 'netdb_grains.py')
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module, time.perf_counter() - start
+
+
+def _report(label: str, samples: list):
+    print(
+        f'{label:>9}: median {statistics.median(samples) * 1000:.1f} ms, '
+        f'max {max(samples) * 1000:.1f} ms over {len(samples)} loads'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--port', type=int, default=18082)
+    args = parser.parse_args()
+
+    body = json.dumps(
+        {'result': True, 'out': {'SYN0': synthetic.device(0)}, 'comment': 'bench'}
+    ).encode()
+
+    server = multiprocessing.Process(
+        target=_serve, args=(body, args.port, args.latency), daemon=True
+    )
+    server.start()
+    time.sleep(0.5)
+
+    module, import_time = _import_grains()
+    print(f'   import: {import_time * 1000:.1f} ms')
+
+    # Bypass the proxy config and utils loader; only the NetDB round trip and
+    # the grains cache are measured.
+    module._UTILS = {'netdb_api.get_api': netdb_api.get_api}
+    module.__pillar__ = {
+        'netdb': {'id': 'SYN0', 'url': f'http://127.0.0.1:{args.port}/'}
+    }
+
+    uncached, cached = [], []
+
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as cachedir:
+            module.__opts__ = {'cachedir': cachedir}
+
+            start = time.perf_counter()
+            module.netdb_grains()
+            uncached.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            module.netdb_grains()
+            cached.append(time.perf_counter() - start)
+
+    _report('uncached', uncached)
+    _report('cached', cached)
+    print(f'speedup {statistics.median(uncached) / statistics.median(cached):.0f}x')
+
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Report the import time of each salt-netdb utils module.
+
+Every module is imported in a fresh interpreter with -X importtime and the
+cumulative import time of the module itself is reported, best of several
+runs. Modules exceeding --max-ms are flagged and make the script exit
+non-zero, so that import time regressions can be caught in CI.
+
+Usage::
+
+    python bench/import_time.py --runs 5 --max-ms 150
+    python bench/import_time.py net_types.salt net_types.netdb
+
+"""
+
+import argparse
+import glob
+import os
+import subprocess
+import sys
+
+UTILS = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'states', '_utils')
+)
+
+
+def _modules() -> list:
+    modules = []
+
+    for path in sorted(glob.glob(os.path.join(UTILS, '**', '*.py'), recursive=True)):
+        name = os.path.splitext(os.path.relpath(path, UTILS))[0].replace(os.sep, '.')
+        if name.endswith('__init__'):
+            continue
+        modules.append(name)
+
+    return modules
+
+
+def import_time(module: str, env: dict) -> int:
+    """
+    Return the cumulative import time of module in microseconds.
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=UTILS,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    cumulative = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cum, name = line.split('|')
+        if name.strip() == module:
+            cumulative = int(cum)
+
+    return cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('modules', nargs='*', help='modules to time (default: all)')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=None)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [UTILS, env.get('PYTHONPATH')]))
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    failed = False
+
+    for module in args.modules or _modules():
+        try:
+            best = min(import_time(module, env) for _ in range(args.runs)) / 1000
+        except RuntimeError as e:
+            print(f'{module:<32} {"error":>10}  {e}')
+            continue
+
+        flag = ''
+        if args.max_ms is not None and best > args.max_ms:
+            flag = f'  exceeds {args.max_ms:g} ms'
+            failed = True
+
+        print(f'{module:<32} {best:>7.1f} ms{flag}')
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+"""
+Simulate proxy minions issuing the column calls of a highstate against a
+NetDB server, typically bench/stub_server.py.
+
+Every simulated minion loads its own instance of the column execution
+module, with the netdb pillar pointing at the server and a cachedir of its
+own, and runs the column.pull and column.pull_many calls the SLS files of
+top.sls make, in order, with a fresh __context__ per run. With --workload get
+column.get and column.keys lookups are issued instead.
+
+For each concurrency level the minions run concurrently in worker processes.
+Column call and highstate latency percentiles, throughput, server side
+request, connection, 304 and byte counts, and the client session pool and
+column cache counters are reported, as well as the client time per request
+not spent in the server.
+
+Usage::
+
+    python bench/stub_server.py --generate --devices 1000 --fixtures /tmp/netdb --latency 5 &
+    python bench/load_driver.py --minions 10,100,1000
+    python bench/load_driver.py --minions 100 --runs 3 --cache
+
+"""
+
+from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'states')
+
+sys.path.insert(0, os.path.join(ROOT, '_utils'))
+
+# Column calls of a highstate, in top.sls order: bgp, policy, firewall,
+# tunnels, ethernet, loopback and isis
+HIGHSTATE: List[Tuple[str, tuple]] = [
+    ('pull', ('bgp',)),
+    ('pull_many', ('policy', 'interface')),
+    ('pull_many', ('firewall', 'interface')),
+    ('pull', ('interface',)),
+    ('pull', ('interface',)),
+    ('pull', ('interface',)),
+    ('pull', ('protocol',)),
+]
+
+# Targeted lookups, answered by server side projection where possible
+GET: List[Tuple[str, tuple]] = [
+    ('get', ('device:location',)),
+    ('get', ('device:cvars:local_asn',)),
+    ('keys', ('bgp:neighbors',)),
+    ('get', ('bgp:neighbors:100.64.0.0',)),
+    ('keys', ('interface',)),
+    ('get', ('protocol:isis:iso',)),
+]
+
+WORKLOADS = {'highstate': HIGHSTATE, 'get': GET}
+
+
+class Minion:
+    """
+    A simulated proxy minion with its own column module instance.
+    """
+
+    def __init__(self, minion_id: str, router: str, pillar: dict, cachedir: str):
+        spec = importlib.util.spec_from_file_location(
+            f'column_{minion_id}', os.path.join(ROOT, '_modules', 'column.py')
+        )
+        self.module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.module)
+
+        self.module.__pillar__ = pillar
+        self.module.__opts__ = {'id': minion_id, 'cachedir': cachedir}
+        self.module.__grains__ = {'id': minion_id, 'node_name': router}
+
+    def run(self, calls: List[Tuple[str, tuple]]) -> Tuple[List[float], int]:
+        """
+        Issue calls with a fresh __context__, as a new state run would.
+        Returns the call latencies and the number of failed calls.
+        """
+        self.module.__context__ = {}
+
+        latencies = []
+        errors = 0
+
+        for function, args in calls:
+            start = time.perf_counter()
+            try:
+                getattr(self.module, function)(*args)
+            except Exception:  # pylint: disable=broad-except
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+        return latencies, errors
+
+
+def run_minions(
+    minions: List[Tuple[str, str]], pillar: dict, workload: str, runs: int
+) -> dict:
+    """
+    Run the workload on minions concurrently, one thread per minion. Used as
+    the process pool worker, so it only takes and returns picklable values.
+    """
+    # pylint: disable=import-outside-toplevel
+    from netdb_pool import pool_stats
+    from netdb_cache import cache_counters
+
+    cachedir = tempfile.mkdtemp(prefix='netdb-load-')
+    calls = WORKLOADS[workload]
+
+    instances = [
+        Minion(minion_id, router, pillar, os.path.join(cachedir, minion_id))
+        for minion_id, router in minions
+    ]
+
+    barrier = threading.Barrier(len(instances))
+    results: Dict[str, list] = {'calls': [], 'runs': []}
+    errors = [0]
+    window = [float('inf'), 0.0]
+    lock = threading.Lock()
+
+    def _minion(minion: Minion):
+        barrier.wait()
+        start = time.time()
+        for _ in range(runs):
+            latencies, failed = minion.run(calls)
+            with lock:
+                results['calls'].extend(latencies)
+                results['runs'].append(sum(latencies))
+                errors[0] += failed
+        with lock:
+            window[0] = min(window[0], start)
+            window[1] = max(window[1], time.time())
+
+    threads = [threading.Thread(target=_minion, args=(m,)) for m in instances]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    shutil.rmtree(cachedir, ignore_errors=True)
+
+    pool = pool_stats()
+
+    return {
+        **results,
+        'errors': errors[0],
+        'start': window[0],
+        'end': window[1],
+        'pool': {
+            'hits': pool['hits'],
+            'misses': pool['misses'],
+            'connections': sum(s['connections'] for s in pool['sessions'].values()),
+            'requests': sum(s['requests'] for s in pool['sessions'].values()),
+        },
+        'cache': cache_counters(),
+    }
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if len(values) < 2:
+        return {key: round(sum(values) * 1000, 2) for key in ('p50', 'p95', 'p99')}
+
+    cuts = statistics.quantiles(values, n=100)
+    return {
+        'p50': round(cuts[49] * 1000, 2),
+        'p95': round(cuts[94] * 1000, 2),
+        'p99': round(cuts[98] * 1000, 2),
+    }
+
+
+def _sum(dicts: List[dict]) -> dict:
+    ret: Dict[str, int] = {}
+    for d in dicts:
+        for key, value in d.items():
+            ret[key] = ret.get(key, 0) + value
+    return ret
+
+
+def level(args, count: int, routers: List[str], pillar: dict) -> dict:
+    """
+    Run count minions and return the measurements of the run.
+    """
+    minions = [(f'minion{i}', routers[i % len(routers)]) for i in range(count)]
+    processes = max(1, min(args.processes, count))
+    chunks = [minions[i::processes] for i in range(processes)]
+
+    requests.get(args.server + '/stats', params={'reset': 1}, timeout=10)
+
+    # A fresh worker process per chunk so that no session pool or cache state
+    # is carried over from an earlier level
+    with ProcessPoolExecutor(max_workers=processes, max_tasks_per_child=1) as ex:
+        outs = list(
+            ex.map(
+                run_minions,
+                chunks,
+                [pillar] * processes,
+                [args.workload] * processes,
+                [args.runs] * processes,
+            )
+        )
+    # Time from the first minion starting to the last one finishing, leaving
+    # out process start up and module loading
+    elapsed = max(out['end'] for out in outs) - min(out['start'] for out in outs)
+
+    server = requests.get(
+        args.server + '/stats', params={'reset': 1}, timeout=10
+    ).json()
+
+    calls = [latency for out in outs for latency in out['calls']]
+    client_seconds = sum(calls)
+
+    return {
+        'minions': count,
+        'processes': processes,
+        'calls': len(calls),
+        'errors': sum(out['errors'] for out in outs),
+        'seconds': round(elapsed, 3),
+        'calls_per_second': round(len(calls) / elapsed, 1),
+        'call_ms': _percentiles(calls),
+        'run_ms': _percentiles([run for out in outs for run in out['runs']]),
+        'client_ms_per_request': round(
+            (client_seconds - server['server_seconds'])
+            / max(server['requests'], 1)
+            * 1000,
+            2,
+        ),
+        'server': server,
+        'pool': _sum([out['pool'] for out in outs]),
+        'cache': _sum([out['cache'] for out in outs]),
+    }
+
+
+def report(result: dict):
+    server = result['server']
+    print(
+        f'{result["minions"]:>5} minions: {result["calls"]} calls in '
+        f'{result["seconds"]:.2f}s ({result["calls_per_second"]}/s), '
+        f'{result["errors"]} errors'
+    )
+    print(
+        '      call ms p50/p95/p99: '
+        + '/'.join(str(v) for v in result['call_ms'].values())
+        + ', run ms p50/p95/p99: '
+        + '/'.join(str(v) for v in result['run_ms'].values())
+    )
+    print(
+        f'      server: {server["requests"]} requests over '
+        f'{server["connections"]} connections '
+        f'({server["requests_per_connection"]}/connection), '
+        f'{server["not_modified"]} not modified, {server["bytes"]} bytes'
+    )
+    print(
+        f'      client: {result["client_ms_per_request"]} ms/request outside the '
+        f'server, pool {result["pool"]}, cache {result["cache"]}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--server', default='http://127.0.0.1:8572')
+    parser.add_argument('--minions', default='10,100,1000', help='concurrency levels')
+    parser.add_argument('--workload', choices=list(WORKLOADS), default='highstate')
+    parser.add_argument('--runs', type=int, default=1, help='runs per minion')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--pool-size', type=int, default=10)
+    parser.add_argument('--no-keepalive', action='store_true')
+    parser.add_argument('--cache', action='store_true', help='enable column cache')
+    parser.add_argument('--cache-ttl', type=int, default=0)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    args.server = args.server.rstrip('/')
+
+    pillar = {
+        'netdb': {
+            'url': f'{args.server}/api/',
+            'util_url': f'{args.server}/util/',
+            'pool': {'size': args.pool_size, 'keepalive': not args.no_keepalive},
+            'cache': {'enabled': args.cache, 'ttl': args.cache_ttl},
+        }
+    }
+
+    routers = list(
+        requests.get(f'{args.server}/api/column/device', timeout=30).json()['out']
+    )
+
+    results = []
+    for count in (int(c) for c in args.minions.split(',')):
+        results.append(level(args, count, routers, pillar))
+        report(results[-1])
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'pillar': pillar, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
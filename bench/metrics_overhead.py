@@ -0,0 +1,69 @@
+"""
+Measure the per request cost of the NetDB request metrics.
+
+The disabled path, a single attribute check per request, must stay well
+below a microsecond; the enabled path is measured without and with a
+Prometheus textfile configured (the textfile is written at most once per
+textfile_interval).
+
+Usage::
+
+    python bench/metrics_overhead.py --requests 1000000
+
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'states', '_utils'))
+
+# pylint: disable=wrong-import-position
+from netdb_metrics import Metrics
+
+PATHS = ['column/bgp/SYN0', 'column/policy/SYN1', 'columns/SYN2', 'column']
+
+
+def _per_request(fn, requests: int) -> float:
+    start = time.perf_counter()
+    fn(requests)
+    return (time.perf_counter() - start) / requests * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=1000000)
+    args = parser.parse_args()
+
+    metrics = Metrics()
+
+    def _record(requests: int):
+        for i in range(requests):
+            if metrics.enabled:
+                metrics.observe('netdb', 'GET', PATHS[i & 3], 0.012, 200, 4096)
+
+    def _baseline(requests: int):
+        for i in range(requests):
+            PATHS[i & 3]  # pylint: disable=pointless-statement
+
+    baseline = _per_request(_baseline, args.requests)
+    print(
+        f'disabled:          {_per_request(_record, args.requests) - baseline:8.1f} ns'
+    )
+
+    metrics.configure({'enabled': True})
+    print(
+        f'enabled:           {_per_request(_record, args.requests) - baseline:8.1f} ns'
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics.configure({'textfile': os.path.join(tmp, 'netdb.prom')})
+        print(
+            f'enabled, textfile: {_per_request(_record, args.requests) - baseline:8.1f} ns'
+        )
+
+
+if __name__ == '__main__':
+    main()
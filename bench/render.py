@@ -0,0 +1,297 @@
+"""
+Measure how the VyOS state templates and the interface module scale with
+column size.
+
+Synthetic device, bgp, policy, firewall, interface and protocol columns of
+the requested sizes are generated and validated against their net_types
+models. Every state template is then rendered offline with a minimal grains
+and salt context, as are the vyos_render Python renderers and the interface
+module functions feeding the ethernet, tunnels and loopback states.
+
+Render time (best of --runs), peak traced memory and output line count are
+reported and saved to bench/results/<commit>.json so that runs can be
+compared across commits.
+
+Usage::
+
+    python bench/render.py --neighbors 10000 --prefix-lists 100 --rules 1000
+    python bench/render.py --compare 8c3bde0
+
+"""
+
+from typing import Callable, Dict, Optional
+import argparse
+import importlib.util
+import ipaddress
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+
+import jinja2
+
+BENCH = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH, '..', 'states')
+RESULTS = os.path.join(BENCH, 'results')
+
+sys.path.insert(0, os.path.join(ROOT, '_utils'))
+
+# pylint: disable=wrong-import-position
+import synthetic
+import vyos_render
+from net_types import validate
+
+ROUTER = 'SYN0'
+
+
+def _ipv4(value):
+    try:
+        return value if ipaddress.ip_interface(value).version == 4 else None
+    except ValueError:
+        return None
+
+
+def _environment() -> jinja2.Environment:
+    # Salt renders templates with the do extension enabled
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(ROOT), extensions=['jinja2.ext.do']
+    )
+    env.filters['ipv4'] = _ipv4
+    return env
+
+
+def _interface_module(columns: Dict[str, dict]) -> types.ModuleType:
+    """
+    Load the interface execution module with a __salt__ stub serving the
+    synthetic columns.
+    """
+    try:
+        import salt.exceptions  # pylint: disable=unused-import,import-outside-toplevel
+    except ImportError:
+        exceptions = types.ModuleType('salt.exceptions')
+        exceptions.SaltException = type('SaltException', (Exception,), {})
+        sys.modules['salt'] = types.ModuleType('salt')
+        sys.modules['salt.exceptions'] = exceptions
+
+    path = os.path.join(ROOT, '_modules', 'interface.py')
+    spec = importlib.util.spec_from_file_location('interface', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    module.__salt__ = {'column.pull': lambda column: columns[column]}
+
+    return module
+
+
+def columns(args) -> Dict[str, dict]:
+    """
+    Return the synthetic columns of a single device, validated against their
+    net_types models.
+    """
+    interface = synthetic.interface_column(args.interfaces)
+
+    ret = {
+        'device': synthetic.device(0),
+        'bgp': synthetic.bgp(0, args.neighbors),
+        # args.prefix_lists lists of args.rules rules for each address family
+        'policy': synthetic.policy(
+            2 * args.prefix_lists * args.rules, per_list=2 * args.rules
+        ),
+        'firewall': synthetic.firewall(1, args.firewall_rules),
+        'interface': interface,
+        'protocol': synthetic.protocol(interface),
+    }
+
+    for column_type, data in ret.items():
+        validate.element_adapter(column_type).validate_python(data)
+
+    return ret
+
+
+def targets(data: Dict[str, dict], version: str) -> Dict[str, Callable[[], object]]:
+    """
+    Return the render functions to measure keyed by name.
+    """
+    env = _environment()
+    interface = _interface_module(data)
+    grains = {'id': ROUTER, 'os': 'vyos', 'version': version, 'local_asn': 36198}
+
+    stub = {'grains': grains, 'pillar': {}, 'opts': {'id': ROUTER}, 'salt': {}}
+
+    template_vars = {
+        'bgp': {'data': data['bgp']},
+        'policy': {'policy_data': data['policy'], 'interfaces': data['interface']},
+        'firewall': {'fw_data': data['firewall'], 'interfaces': data['interface']},
+        'isis': {'protocol': data['protocol']},
+        'system': {'device_data': data['device'], 'protocol_data': data['protocol']},
+        'ethernet': {'ethernet': interface.get_vyos_ethernet()},
+        'tunnels': {'tunnels': interface.get_vyos_tunnels()},
+        'loopback': {'loopbacks': interface.get_vyos_loopbacks()},
+    }
+
+    def _template(name: str, **context) -> Callable[[], str]:
+        template = env.get_template(name)
+        return lambda: template.render(**stub, **context)
+
+    ret = {
+        f'{section}/templates/vyos.jinja': _template(
+            f'{section}/templates/vyos.jinja', **context
+        )
+        for section, context in template_vars.items()
+    }
+
+    for name in ('enable', 'disable'):
+        ret[f'templates/bgp/{name}.jinja'] = _template(
+            f'templates/bgp/{name}.jinja', peer='192.0.2.1', families=['ipv4', 'ipv6']
+        )
+
+    for section in vyos_render.RENDERERS:
+        ret[f'vyos_render.{section}'] = lambda section=section: vyos_render.render(
+            section, version, **template_vars[section]
+        )
+
+    for name in ('get_vyos_ethernet', 'get_vyos_tunnels', 'get_vyos_loopbacks'):
+        ret[f'interface.{name}'] = getattr(interface, name)
+
+    return ret
+
+
+def measure(fn: Callable[[], object], runs: int) -> dict:
+    """
+    Return the best render time, peak traced memory and output line count of
+    fn.
+    """
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+
+    # Traced separately as tracemalloc slows down rendering considerably
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if isinstance(out, str):
+        lines = sum(1 for line in out.splitlines() if line.strip())
+    else:
+        lines = None
+
+    return {
+        'ms': round(best * 1000, 2),
+        'peak_kib': round(peak / 1024),
+        'lines': lines,
+    }
+
+
+def _commit() -> str:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=BENCH,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            cwd=BENCH,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+    return f'{commit}-dirty' if dirty else commit
+
+
+def _load(ref: str) -> Optional[dict]:
+    path = ref if os.path.isfile(ref) else os.path.join(RESULTS, f'{ref}.json')
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f'unable to load results {ref}: {e}', file=sys.stderr)
+        return None
+
+
+def report(results: dict, baseline: Optional[dict] = None):
+    """
+    Print results, with the change in render time relative to baseline.
+    """
+    print(f'{"target":<34} {"ms":>10} {"peak KiB":>10} {"lines":>8}', end='')
+    print(f' {"vs " + baseline["commit"]:>16}' if baseline else '')
+
+    for name, result in results['results'].items():
+        lines = '-' if result['lines'] is None else result['lines']
+        print(
+            f'{name:<34} {result["ms"]:>10.2f} {result["peak_kib"]:>10} {lines:>8}',
+            end='',
+        )
+
+        old = baseline and baseline['results'].get(name)
+        if old and old['ms']:
+            print(f' {(result["ms"] - old["ms"]) / old["ms"]:>+16.1%}')
+        else:
+            print()
+
+    if baseline and baseline['sizes'] != results['sizes']:
+        print(f'note: baseline sizes differ: {baseline["sizes"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--neighbors', type=int, default=1000)
+    parser.add_argument('--prefix-lists', type=int, default=100)
+    parser.add_argument('--rules', type=int, default=100)
+    parser.add_argument('--firewall-rules', type=int, default=500)
+    parser.add_argument('--interfaces', type=int, default=200)
+    parser.add_argument('--version', default='1.4.0', help='VyOS version grain')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--compare', help='commit or results file to compare with')
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    sizes = {
+        'neighbors': args.neighbors,
+        'prefix_lists': args.prefix_lists,
+        'rules': args.rules,
+        'firewall_rules': args.firewall_rules,
+        'interfaces': args.interfaces,
+        'version': args.version,
+    }
+
+    start = time.perf_counter()
+    data = columns(args)
+    print(f'columns generated and validated in {time.perf_counter() - start:.1f}s')
+
+    results = {
+        'commit': _commit(),
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'jinja2': jinja2.__version__,
+        'sizes': sizes,
+        'results': {
+            name: measure(fn, args.runs)
+            for name, fn in targets(data, args.version).items()
+        },
+    }
+
+    report(results, args.compare and _load(args.compare))
+
+    if not args.no_save:
+        os.makedirs(RESULTS, exist_ok=True)
+        path = os.path.join(RESULTS, f'{results["commit"]}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'results saved to {os.path.relpath(path)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+"""
+Check the Python VyOS renderers against the Jinja templates and compare
+their render times.
+
+Golden check: feature complete bgp, policy and firewall columns are rendered
+for VyOS 1.3 and 1.4 with both the vyos.jinja templates and vyos_render, and
+the resulting commands must be identical. Exits non-zero on any difference.
+
+Benchmark: a bgp column with --neighbors neighbors and a policy column with
+--entries prefix list rules are rendered with both.
+
+Usage::
+
+    python bench/render_native.py --neighbors 10000 --entries 100000
+    python bench/render_native.py --check-only
+
+"""
+
+import argparse
+import copy
+import difflib
+import ipaddress
+import os
+import sys
+import time
+
+import jinja2
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', 'states')
+sys.path.insert(0, os.path.join(ROOT, '_utils'))
+
+# pylint: disable=wrong-import-position
+import synthetic
+import vyos_render
+
+VERSIONS = ['1.3.8', '1.4.0']
+
+
+def _ipv4(value):
+    try:
+        return value if ipaddress.ip_interface(value).version == 4 else None
+    except ValueError:
+        return None
+
+
+def _template(section: str) -> jinja2.Template:
+    # Salt renders templates with the do extension enabled
+    env = jinja2.Environment(extensions=['jinja2.ext.do'])
+    env.filters['ipv4'] = _ipv4
+
+    path = os.path.join(ROOT, section, 'templates', 'vyos.jinja')
+    with open(path, encoding='utf-8') as f:
+        return env.from_string(f.read())
+
+
+def _commands(text: str) -> list:
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def _bgp_case() -> dict:
+    data = synthetic.bgp(0, 20)
+
+    data['options'].update(
+        {'cluster_id': '10.0.0.1', 'hold_time': 90, 'keepalive_time': 30}
+    )
+    data['address_family'] = {
+        'ipv4': {'networks': ['198.51.100.0/24'], 'redistribute': ['static']},
+        'ipv6': {'networks': ['2001:db8:100::/48'], 'redistribute': []},
+    }
+    data['peer_groups']['IBGP'] = {
+        'type': 'ibgp',
+        'source': '10.0.0.1',
+        'password': 'secret',
+        'family': {
+            'ipv4': {'nhs': True, 'route_reflector': True, 'max_prefixes': 100},
+            'ipv6': {'default_originate': True, 'route_map': {'export': 'IBGP-OUT'}},
+        },
+    }
+    data['peer_groups']['MULTIHOP'] = {'remote_asn': 64600, 'multihop': 2}
+    data['neighbors']['10.0.0.2'] = {
+        'type': 'ibgp',
+        'peer_group': 'IBGP',
+        'timers': {'holdtime': 30, 'keepalive': 10},
+        'source': '10.0.0.1',
+        'password': 'secret',
+        'family': {'ipv4': {'nhs': True, 'default_originate': True}},
+    }
+    data['neighbors']['2001:db8::2'] = {
+        'remote_asn': 64700,
+        'multihop': 3,
+        'reject_in': True,
+        'reject_out': True,
+    }
+    data['neighbors']['192.0.2.9'] = {'remote_asn': 64701, 'reject_in': True}
+
+    return {'data': data}
+
+
+def _policy_case() -> dict:
+    data = synthetic.policy(200, per_list=50)
+
+    data['aspath_lists'] = {
+        'AS-PATH-A': {
+            'rules': [
+                {'action': 'deny', 'description': 'private', 'regex': '_6451[2-9]_'},
+                {'regex': '^$'},
+            ]
+        }
+    }
+    data['community_lists'] = {
+        'COMM-A': {'rules': [{'action': 'permit', 'regex': '36198:1[0-9]+'}]}
+    }
+    data['route_maps']['ipv4']['TRANSIT-IN']['rules'] += [
+        {
+            'number': 200,
+            'action': 'permit',
+            'continue': 300,
+            'match': {
+                'community_list': 'COMM-A',
+                'as_path': 'AS-PATH-A',
+                'rpki': 'valid',
+            },
+            'set': {
+                'origin': 'igp',
+                'community': '36198:100 36198:200 additive',
+                'large_community': '36198:1:1 additive',
+                'as_path_exclude': 64512,
+                'next_hop': '192.0.2.1',
+            },
+        },
+        {
+            'number': 300,
+            'action': 'deny',
+            'set': {'community': '36198:300', 'large_community': '36198:1:2'},
+        },
+    ]
+    data['route_maps']['ipv6'] = {
+        'TRANSIT6-IN': {
+            'rules': [
+                {
+                    'number': 100,
+                    'action': 'permit',
+                    'match': {'prefix_list': 'PL-IPV6-0'},
+                    'set': {'next_hop': '2001:db8::1', 'local_pref': 200},
+                }
+            ]
+        }
+    }
+
+    return {'policy_data': data}
+
+
+def _firewall_case() -> dict:
+    data = synthetic.firewall(2, 10)
+
+    data['policies']['ipv4']['IPV4-POLICY-0']['rules'].append(
+        {
+            'action': 'accept',
+            'state': ['established', 'related'],
+            'source': {'network_group': 'NG-1', 'port': [53]},
+            'destination': {'network_group': 'NG-2', 'port': [53, 853]},
+        }
+    )
+
+    return {'fw_data': data, 'interfaces': synthetic.interfaces(6)}
+
+
+CASES = {
+    'bgp': _bgp_case,
+    'policy': _policy_case,
+    'firewall': _firewall_case,
+}
+
+
+def check() -> bool:
+    """
+    Compare template and Python renderer output for all cases and versions.
+    """
+    ok = True
+
+    for section, case in CASES.items():
+        template = _template(section)
+        template_vars = case()
+
+        for version in VERSIONS:
+            expected = _commands(
+                template.render(
+                    grains={'version': version}, **copy.deepcopy(template_vars)
+                )
+            )
+            actual = _commands(vyos_render.render(section, version, **template_vars))
+
+            if expected == actual:
+                print(f'{section:>8} {version}: {len(actual)} commands identical')
+                continue
+
+            ok = False
+            print(f'{section:>8} {version}: output differs')
+            for line in list(
+                difflib.unified_diff(expected, actual, 'jinja', 'python', lineterm='')
+            )[:40]:
+                print(f'    {line}')
+
+    return ok
+
+
+def _time(fn, runs: int) -> float:
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(neighbors: int, entries: int, runs: int):
+    """
+    Compare render times of the templates and the Python renderers.
+    """
+    cases = [
+        ('bgp', f'{neighbors} neighbors', {'data': synthetic.bgp(0, neighbors)}),
+        (
+            'policy',
+            f'{entries} prefix list rules',
+            {'policy_data': synthetic.policy(entries)},
+        ),
+    ]
+
+    for section, label, template_vars in cases:
+        template = _template(section)
+        grains = {'version': VERSIONS[-1]}
+
+        jinja_time = _time(
+            lambda: template.render(grains=grains, **template_vars), runs
+        )
+        python_time = _time(
+            lambda: vyos_render.render(section, grains['version'], **template_vars),
+            runs,
+        )
+
+        print(
+            f'{section:>8} ({label}): jinja {jinja_time * 1000:.0f} ms, '
+            f'python {python_time * 1000:.0f} ms, '
+            f'{jinja_time / python_time:.1f}x faster'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--neighbors', type=int, default=10000)
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--check-only', action='store_true')
+    args = parser.parse_args()
+
+    if not check():
+        sys.exit(1)
+
+    if not args.check_only:
+        benchmark(args.neighbors, args.entries, args.runs)
+
+
+if __name__ == '__main__':
+    main()
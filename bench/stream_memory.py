@@ -0,0 +1,97 @@
+"""
+Compare peak client memory of buffered and streamed decoding of a fleet wide
+NetDB Util response.
+
+A synthetic response with one entry per device is served from a separate
+process so that only client side allocations are measured. The buffered run
+uses NetdbUtilAPI.get (resp.json()); the streamed run consumes
+NetdbUtilAPI.stream and writes each entry to a file.
+
+Usage::
+
+    python bench/stream_memory.py --devices 5000
+
+"""
+
+import argparse
+import http.server
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'states', '_utils'))
+
+# pylint: disable=wrong-import-position
+import synthetic
+from netdb_stream import dump_items
+from netdb_util_api import NetdbUtilAPI
+
+
+def _serve(body: bytes, port: int):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):  # pylint: disable=arguments-differ
+            pass
+
+    http.server.HTTPServer(('127.0.0.1', port), Handler).serve_forever()
+
+
+def _measure(label: str, fn) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'{label:>9}: {count} entries, {elapsed:.2f}s, peak {peak / 2**20:.1f} MiB')
+    return {'entries': count, 'seconds': elapsed, 'peak_bytes': peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--devices', type=int, default=5000)
+    parser.add_argument('--port', type=int, default=18081)
+    args = parser.parse_args()
+
+    body = json.dumps(
+        {'result': True, 'out': synthetic.devices(args.devices), 'comment': 'bench'}
+    ).encode()
+    print(f'response size: {len(body) / 2**20:.1f} MiB')
+
+    server = multiprocessing.Process(target=_serve, args=(body, args.port), daemon=True)
+    server.start()
+    del body
+    time.sleep(0.5)
+
+    api = NetdbUtilAPI({'netdb': {'util_url': f'http://127.0.0.1:{args.port}/'}})
+
+    def _buffered():
+        return len(api.get('connectors/netbox/device')['out'])
+
+    def _streamed():
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as fp:
+            return dump_items(api.stream('connectors/netbox/device'), fp)
+
+    buffered = _measure('buffered', _buffered)
+    streamed = _measure('streamed', _streamed)
+
+    print(f'peak memory reduced {buffered["peak_bytes"] / streamed["peak_bytes"]:.1f}x')
+
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
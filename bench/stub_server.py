@@ -0,0 +1,416 @@
+"""
+Stub NetDB and NetDB Util server for load and latency benchmarks.
+
+Serves column data and util responses from fixture files with configurable
+latency and jitter, so that the column module, the runners and the load
+driver can be measured without a live NetDB.
+
+NetDB endpoints, below /api/ (netdb:url: http://<host>:<port>/api/):
+
+* column: list of column names
+* column/{column}: column of all devices
+* column/{column}/{router}: column of one device, with ETag and
+  Last-Modified validators answered by 304 Not Modified, and server side
+  projection of repeated 'path' parameters ('keys_only=true' replaces the
+  values of the subtree with null)
+* columns/{router}?column=a&column=b: batch column request
+
+NetDB Util endpoints, below /util/ (netdb:util_url: http://<host>:<port>/util/):
+
+* GET connectors/* and utility/*: the response stored in the fixture file of
+  the same path, or a 404 error response
+* POST, PUT and DELETE: an accepted response echoing the request body
+
+Request and response counters are served as JSON at /stats; /stats?reset=1
+resets them after answering.
+
+Fixture layout::
+
+    <fixtures>/columns/<column>.json       {router: column data, ...}
+    <fixtures>/util/<endpoint>.json        complete util response
+
+Usage::
+
+    python bench/stub_server.py --generate --devices 1000 --fixtures /tmp/netdb
+    python bench/stub_server.py --fixtures /tmp/netdb --latency 20 --jitter 5
+
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'states', '_utils'))
+
+# pylint: disable=wrong-import-position
+import synthetic
+
+NETDB_PREFIX = '/api/'
+UTIL_PREFIX = '/util/'
+
+
+def generate(path: str, devices: int, neighbors: int, entries: int, interfaces: int):
+    """
+    Write synthetic column fixtures for devices devices to path.
+    """
+    columns: Dict[str, Dict[str, Any]] = {
+        column: {}
+        for column in ('device', 'bgp', 'policy', 'firewall', 'interface', 'protocol')
+    }
+
+    policy = synthetic.policy(entries)
+    firewall = synthetic.firewall(2, 50)
+
+    for i in range(devices):
+        router = f'SYN{i}'
+        interface = synthetic.interface_column(interfaces)
+
+        columns['device'][router] = synthetic.device(i)
+        columns['bgp'][router] = synthetic.bgp(i, neighbors)
+        columns['policy'][router] = policy
+        columns['firewall'][router] = firewall
+        columns['interface'][router] = interface
+        columns['protocol'][router] = synthetic.protocol(interface)
+
+    os.makedirs(os.path.join(path, 'columns'), exist_ok=True)
+
+    for column, data in columns.items():
+        with open(os.path.join(path, 'columns', f'{column}.json'), 'w') as f:
+            json.dump(data, f)
+
+
+def project(data: Any, path: List[str], keys_only: bool) -> Any:
+    """
+    Prune data to the dicts along path and the subtree at its end, the
+    projection contract NetdbAPI.get_projection relies on. Non-dict values
+    met along path are returned as they are.
+    """
+    if not isinstance(data, dict):
+        return data
+
+    if not path:
+        return dict.fromkeys(data) if keys_only else data
+
+    if path[0] not in data:
+        return {}
+
+    return {path[0]: project(data[path[0]], path[1:], keys_only)}
+
+
+class Stats:
+    """
+    Thread safe request counters.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.connections = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.gzipped = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.status: Dict[int, int] = {}
+        self.endpoints: Dict[str, int] = {}
+
+    def connection(self):
+        with self.lock:
+            self.connections += 1
+
+    def request(
+        self, endpoint: str, status: int, size: int, gzipped: bool, seconds: float
+    ):
+        with self.lock:
+            self.requests += 1
+            self.bytes += size
+            self.seconds += seconds
+            self.gzipped += gzipped
+            self.not_modified += status == 304
+            self.status[status] = self.status.get(status, 0) + 1
+            self.endpoints[endpoint] = self.endpoints.get(endpoint, 0) + 1
+
+    def snapshot(self, reset: bool = False) -> dict:
+        with self.lock:
+            ret = {
+                'connections': self.connections,
+                'requests': self.requests,
+                'requests_per_connection': round(
+                    self.requests / max(self.connections, 1), 2
+                ),
+                'not_modified': self.not_modified,
+                'gzipped': self.gzipped,
+                'bytes': self.bytes,
+                'server_seconds': round(self.seconds, 3),
+                'status': dict(self.status),
+                'endpoints': dict(self.endpoints),
+            }
+            if reset:
+                self.reset()
+
+        return ret
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address: Tuple[str, int], args):
+        super().__init__(address, StubHandler)
+
+        self.latency = args.latency / 1000
+        self.jitter = args.jitter / 1000
+        self.gzip_threshold = None if args.no_gzip else args.gzip_threshold
+        self.stats = Stats()
+        self.last_modified = formatdate(time.time(), usegmt=True)
+
+        self.columns: Dict[str, Dict[str, Any]] = {}
+        self.responses: Dict[str, Tuple[int, bytes]] = {}
+        self.encodings: Dict[str, Tuple[str, Optional[bytes]]] = {}
+        self.util = os.path.abspath(os.path.join(args.fixtures, 'util'))
+
+        columns = os.path.join(args.fixtures, 'columns')
+        for name in sorted(os.listdir(columns)):
+            if name.endswith('.json'):
+                with open(os.path.join(columns, name)) as f:
+                    self.columns[name[:-5]] = json.load(f)
+
+    def response(
+        self, path: str, build: Callable[[], Tuple[int, dict]]
+    ) -> Tuple[int, bytes]:
+        """
+        Return the status and body of the NetDB response for path, serialized
+        once as fixtures do not change.
+        """
+        if (ret := self.responses.get(path)) is None:
+            status, out = build()
+            ret = self.responses[path] = (status, json.dumps(out).encode())
+
+        return ret
+
+    def encoded(self, path: str, body: bytes) -> Tuple[str, Optional[bytes]]:
+        """
+        Return the ETag and the gzip compressed form of a column response body.
+        """
+        if (ret := self.encodings.get(path)) is None:
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            compressed = None
+            if self.gzip_threshold is not None and len(body) >= self.gzip_threshold:
+                compressed = gzip.compress(body, compresslevel=1)
+            ret = self.encodings[path] = (etag, compressed)
+
+        return ret
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(
+                max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+            )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: StubServer
+
+    def setup(self):
+        super().setup()
+        self.server.stats.connection()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def _send(self, endpoint: str, status: int, body: bytes, start: float):
+        headers = {'Content-Type': 'application/json'}
+        compressed = None
+
+        if status == 200 and endpoint.startswith('column/'):
+            # Column responses are static, so their encodings are kept
+            etag, compressed = self.server.encoded(self.path, body)
+            headers['ETag'] = etag
+            headers['Last-Modified'] = self.server.last_modified
+
+            if self.headers.get('If-None-Match') == etag:
+                status, body = 304, b''
+
+        gzipped = (
+            self.server.gzip_threshold is not None
+            and len(body) >= self.server.gzip_threshold
+            and 'gzip' in self.headers.get('Accept-Encoding', '')
+        )
+        if gzipped:
+            body = compressed or gzip.compress(body, compresslevel=1)
+            headers['Content-Encoding'] = 'gzip'
+
+        headers['Content-Length'] = str(len(body))
+
+        self.server.delay()
+
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+        self.server.stats.request(
+            endpoint.split('/')[0],
+            status,
+            len(body),
+            gzipped,
+            time.perf_counter() - start,
+        )
+
+    def _body(self) -> Any:
+        if not (length := int(self.headers.get('Content-Length') or 0)):
+            return None
+
+        body = self.rfile.read(length)
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+
+        try:
+            return json.loads(body)
+        except ValueError:
+            return None
+
+    def _netdb(self, endpoint: str, query: Dict[str, List[str]]) -> Tuple[int, dict]:
+        parts = endpoint.strip('/').split('/')
+        columns = self.server.columns
+
+        if parts == ['column']:
+            return 200, {'result': True, 'out': list(columns), 'comment': ''}
+
+        if parts[0] == 'column' and len(parts) in [2, 3]:
+            if (data := columns.get(parts[1])) is None:
+                return 404, {'result': False, 'comment': f'{parts[1]}: no such column'}
+
+            if len(parts) == 2:
+                return 200, {'result': True, 'out': data, 'comment': ''}
+
+            if (router_data := data.get(parts[2])) is None:
+                return 404, {'result': False, 'comment': 'no data found'}
+
+            ret = {'result': True, 'comment': ''}
+            if path := query.get('path'):
+                keys_only = query.get('keys_only') == ['true']
+                router_data = project(router_data, path, keys_only)
+                ret['projected'] = True
+
+            return 200, {**ret, 'out': {parts[2]: router_data}}
+
+        if parts[0] == 'columns' and len(parts) == 2:
+            out = {
+                column: columns[column][parts[1]]
+                for column in query.get('column', [])
+                if parts[1] in columns.get(column, {})
+            }
+            if not out:
+                return 404, {'result': False, 'comment': 'no data found'}
+
+            return 200, {'result': True, 'out': out, 'comment': ''}
+
+        return 404, {'result': False, 'comment': f'{endpoint}: no such endpoint'}
+
+    def _util(self, endpoint: str) -> Tuple[int, dict]:
+        if self.command != 'GET':
+            data = self._body()
+            comment = f'stub: {self.command} {endpoint} accepted'
+            return 200, {'result': True, 'out': data, 'comment': comment}
+
+        path = os.path.normpath(os.path.join(self.server.util, endpoint + '.json'))
+        if not path.startswith(self.server.util + os.sep):
+            return 404, {'result': False, 'comment': f'{endpoint}: invalid endpoint'}
+
+        try:
+            with open(path) as f:
+                return 200, json.load(f)
+        except FileNotFoundError:
+            return 404, {'result': False, 'comment': f'{endpoint}: no fixture'}
+
+    def _handle(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+
+        if url.path == '/stats':
+            self._body()
+            ret = self.server.stats.snapshot(reset='reset' in query)
+            body = json.dumps(ret).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if url.path.startswith(NETDB_PREFIX):
+            endpoint = url.path[len(NETDB_PREFIX) :]
+            self._body()
+            status, body = self.server.response(
+                self.path, lambda: self._netdb(endpoint, query)
+            )
+            self._send(endpoint, status, body, start)
+            return
+        elif url.path.startswith(UTIL_PREFIX):
+            endpoint = url.path[len(UTIL_PREFIX) :]
+            status, ret = self._util(endpoint)
+        else:
+            endpoint = url.path
+            status, ret = 404, {'result': False, 'comment': 'not found'}
+
+        self._send(endpoint, status, json.dumps(ret).encode(), start)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--fixtures', required=True, help='fixture directory')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8572)
+    parser.add_argument('--latency', type=float, default=0, help='milliseconds')
+    parser.add_argument('--jitter', type=float, default=0, help='milliseconds')
+    parser.add_argument('--gzip-threshold', type=int, default=1024)
+    parser.add_argument('--no-gzip', action='store_true')
+    parser.add_argument('--generate', action='store_true', help='write fixtures')
+    parser.add_argument('--devices', type=int, default=100)
+    parser.add_argument('--neighbors', type=int, default=100)
+    parser.add_argument('--entries', type=int, default=1000)
+    parser.add_argument('--interfaces', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.generate:
+        generate(
+            args.fixtures, args.devices, args.neighbors, args.entries, args.interfaces
+        )
+
+    server = StubServer((args.host, args.port), args)
+    base = f'http://{args.host}:{server.server_address[1]}'
+    print(
+        f'serving {len(server.columns)} columns: '
+        f'netdb url {base}{NETDB_PREFIX}, util_url {base}{UTIL_PREFIX}',
+        flush=True,
+    )
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.stats.snapshot()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+"""
+Synthetic NetDB column data for benchmarks. Generated columns follow the
+net_types column models so that they can be rendered and validated like
+real data.
+"""
+
+from typing import Dict
+import ipaddress
+
+LOCAL_ASN = 36198
+
+
+def _v4(base: str, index: int) -> str:
+    return str(ipaddress.IPv4Address(base) + index)
+
+
+def _v6(base: str, index: int) -> str:
+    return str(ipaddress.IPv6Address(base) + index)
+
+
+def device(index: int) -> dict:
+    """
+    Return the device column entry of a single synthetic device.
+    """
+    return {
+        'location': f'Synthetic PoP {index // 4}',
+        'providers': ['transit-a', 'transit-b'],
+        'roles': ['edge'],
+        'node_name': f'syn{index}',
+        'cvars': {
+            'ibgp_ipv4': _v4('10.0.0.0', index),
+            'ibgp_ipv6': _v6('fd00::', index),
+            'iso': f'49.0001.{index:04d}.0000.0000.00',
+            'router_id': _v4('10.0.0.0', index),
+            'local_asn': LOCAL_ASN,
+            'primary_ipv4': _v4('10.0.0.0', index),
+            'primary_ipv6': _v6('fd00::', index),
+            'dns_servers': ['192.0.2.53', '2001:db8::53'],
+            'znsl_prefixes': ['198.51.100.0/24', '2001:db8:100::/48'],
+            'primary_contact': 'noc@example.net',
+        },
+    }
+
+
+def devices(count: int) -> Dict[str, dict]:
+    """
+    Return a fleet wide device column with count devices keyed by router ID.
+    """
+    return {f'SYN{i}': device(i) for i in range(count)}
+
+
+def bgp(index: int, neighbors: int) -> dict:
+    """
+    Return the bgp column entry of a synthetic device with the given number of
+    eBGP neighbors, alternating between IPv4 and IPv6 sessions.
+    """
+    sessions = {}
+
+    for i in range(neighbors):
+        family = 'ipv4' if i % 2 == 0 else 'ipv6'
+        ip = _v4('100.64.0.0', i) if family == 'ipv4' else _v6('2001:db8:ffff::', i)
+
+        sessions[ip] = {
+            'peer_group': f'TRANSIT-{family.upper()}',
+            'remote_asn': 64512 + i % 1000,
+            'family': {
+                family: {
+                    'max_prefixes': 1000,
+                    'route_map': {'import': 'TRANSIT-IN', 'export': 'TRANSIT-OUT'},
+                }
+            },
+        }
+
+    return {
+        'options': {
+            'asn': LOCAL_ASN,
+            'router_id': _v4('10.0.0.0', index),
+            'log_neighbor_changes': True,
+        },
+        'peer_groups': {
+            'TRANSIT-IPV4': {'type': 'ebgp', 'source': _v4('10.0.0.0', index)},
+            'TRANSIT-IPV6': {'type': 'ebgp', 'source': _v6('fd00::', index)},
+        },
+        'neighbors': sessions,
+    }
+
+
+def policy(entries: int, per_list: int = 1000) -> dict:
+    """
+    Return a policy column entry whose IPv4 and IPv6 prefix lists hold entries
+    prefix list rules in total, per_list rules per prefix list.
+    """
+    prefix_lists: Dict[str, dict] = {'ipv4': {}, 'ipv6': {}}
+
+    for i in range(entries):
+        if i % 2 == 0:
+            family = 'ipv4'
+            prefix = f'{_v4("0.0.0.0", (i // 2) * 256 % 2**32)}/24'
+        else:
+            family = 'ipv6'
+            prefix = f'{_v6("2000::", (i // 2) * 2**80)}/48'
+
+        lists = prefix_lists[family]
+        name = f'PL-{family.upper()}-{i // per_list}'
+        lists.setdefault(name, {'rules': []})['rules'].append(
+            {'prefix': prefix, 'le': 24 if family == 'ipv4' else 48}
+        )
+
+    return {
+        'prefix_lists': prefix_lists,
+        'route_maps': {
+            'ipv4': {
+                'TRANSIT-IN': {
+                    'rules': [
+                        {
+                            'number': 100,
+                            'action': 'permit',
+                            'match': {'prefix_list': 'PL-IPV4-0'},
+                            'set': {'local_pref': 100},
+                        }
+                    ]
+                }
+            }
+        },
+    }
+
+
+def firewall(policies: int, rules: int) -> dict:
+    """
+    Return a firewall column entry with policies IPv4 and IPv6 policies of
+    rules rules each.
+    """
+    policy_rules = [
+        {
+            'action': 'accept',
+            'protocol': 'tcp',
+            'source': {'network_group': f'NG-{i % 10}'},
+            'destination': {'port': [22, 179, 8000 + i]},
+        }
+        for i in range(rules)
+    ]
+
+    return {
+        'options': {
+            'all-ping': 'enable',
+            'syn-cookies': 'enable',
+            'config-trap': 'disable',
+        },
+        'state_policy': {'established': 'accept', 'related': 'accept'},
+        'mss_clamp': {'ipv4': 1360, 'ipv6': 1340, 'interfaces': ['tun0', 'tun1']},
+        'groups': {
+            'ipv4': {
+                f'NG-{i}': {
+                    'type': 'network',
+                    'networks': [_v4('198.18.0.0', i * 256) + '/24'],
+                }
+                for i in range(10)
+            },
+            'ipv6': {
+                f'NG6-{i}': {
+                    'type': 'network',
+                    'networks': [_v6('2001:db8:1::', i * 2**64) + '/64'],
+                }
+                for i in range(10)
+            },
+        },
+        'policies': {
+            family: {
+                f'{family.upper()}-POLICY-{p}': {
+                    'default_action': 'drop',
+                    'rules': policy_rules,
+                }
+                for p in range(policies)
+            }
+            for family in ('ipv4', 'ipv6')
+        },
+        'zone_policy': {
+            'LOCAL': {
+                'default_action': 'drop',
+                'from': [
+                    {
+                        'zone': 'WAN',
+                        'ipv4_ruleset': 'IPV4-POLICY-0',
+                        'ipv6_ruleset': 'IPV6-POLICY-0',
+                    }
+                ],
+                'interfaces': ['eth0', 'eth1'],
+            }
+        },
+    }
+
+
+def interfaces(count: int) -> Dict[str, dict]:
+    """
+    Return an interface column entry with count ethernet interfaces, each with
+    firewall policies attached.
+    """
+    return {
+        f'eth{i}': {
+            'type': 'ethernet',
+            'description': f'synthetic {i}',
+            'firewall': {
+                ('ingress', 'egress', 'local')[i % 3]: {
+                    'ipv4': 'IPV4-POLICY-0',
+                    'ipv6': 'IPV6-POLICY-0',
+                }
+            },
+        }
+        for i in range(count)
+    }
+
+
+def interface_column(count: int) -> Dict[str, dict]:
+    """
+    Return an interface column entry with count interfaces of every type the
+    VyOS states manage: ethernet, VLAN, LACP bond, GRE tunnel and dummy
+    interfaces, in that rotation.
+    """
+    column: Dict[str, dict] = {}
+    firewall = {'local': {'ipv4': 'IPV4-POLICY-0', 'ipv6': 'IPV6-POLICY-0'}}
+
+    for i in range(count):
+        address = {
+            f'{_v4("172.16.0.0", i * 4 + 1)}/30': {'meta': {}},
+            f'{_v6("2001:db8:2::", i * 2**64 + 1)}/64': {'meta': {}},
+        }
+
+        match i % 5:
+            case 0:
+                column[f'eth{i}'] = {
+                    'type': 'ethernet',
+                    'description': f'synthetic {i}',
+                    'offload': True,
+                    'mtu': 9000,
+                    'address': address,
+                    'firewall': firewall,
+                }
+            case 1:
+                column[f'eth{i - 1}.{100 + i}'] = {
+                    'type': 'vlan',
+                    'description': f'synthetic vlan {i}',
+                    'vlan': {'id': 100 + i, 'parent': f'eth{i - 1}'},
+                    'address': address,
+                }
+            case 2:
+                column[f'bond{i}'] = {
+                    'type': 'lacp',
+                    'description': f'synthetic bond {i}',
+                    'lacp': {
+                        'hash_policy': 'layer3+4',
+                        'rate': 'fast',
+                        'min_links': 1,
+                        'members': [f'eth{i}a', f'eth{i}b'],
+                    },
+                    'address': address,
+                }
+            case 3:
+                column[f'tun{i}'] = {
+                    'type': 'gre',
+                    'description': f'synthetic tunnel {i}',
+                    'key': _v4('10.255.0.0', i),
+                    'ttl': 64,
+                    'source': '10.0.0.0',
+                    'remote': _v4('203.0.113.0', i % 256),
+                    'address': address,
+                    'firewall': firewall,
+                }
+            case 4:
+                column[f'dum{i}'] = {
+                    'type': 'dummy',
+                    'description': f'synthetic loopback {i}',
+                    'address': {f'{_v4("10.1.0.0", i)}/32': {'meta': {}}},
+                }
+
+    return column
+
+
+def protocol(interfaces: Dict[str, dict]) -> dict:
+    """
+    Return a protocol column entry running IS-IS and LLDP on the ethernet,
+    VLAN and tunnel interfaces of an interface column entry, with a DHCP
+    server on every tenth of them.
+    """
+    names = [
+        name
+        for name, settings in interfaces.items()
+        if settings['type'] in ('ethernet', 'vlan', 'gre')
+    ]
+
+    return {
+        'isis': {
+            'level': 2,
+            'lsp_mtu': 1471,
+            'iso': '49.0001.0000.0000.0000.00',
+            'interfaces': [
+                {'name': name, 'passive': name.startswith('eth')} for name in names
+            ],
+            'redistribute': {
+                family: {'level_2': {'connected_map': f'ISIS-{family.upper()}'}}
+                for family in ('ipv4', 'ipv6')
+            },
+        },
+        'lldp': {'interfaces': names},
+        'services': {
+            'dhcp_server': {
+                'networks': [
+                    {
+                        'router_ip': _v4('192.168.0.1', i * 256),
+                        'network': f'{_v4("192.168.0.0", i * 256)}/24',
+                        'ranges': [
+                            {
+                                'start_address': _v4('192.168.0.100', i * 256),
+                                'end_address': _v4('192.168.0.200', i * 256),
+                            }
+                        ],
+                    }
+                    for i in range(0, len(names), 10)
+                ]
+            }
+        },
+    }
@@ -0,0 +1,113 @@
+"""
+Measure net_types column validation throughput.
+
+A single large bgp column, the bgp columns of a fleet of smaller devices and
+a large policy column are validated three ways:
+
+* cached: the cached response TypeAdapter validating the raw JSON bytes, as
+  used by column.pull(validate=True) and netdb_validate.fleet
+* dict: json.loads followed by validation of the resulting dict
+* rebuilt: the response model rebuilt for every validation
+
+Usage::
+
+    python bench/validate.py --neighbors 10000 --entries 100000
+
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'states', '_utils'))
+
+# pylint: disable=wrong-import-position
+import synthetic
+from net_types import validate
+
+
+def _response(column: dict) -> bytes:
+    return json.dumps({'result': True, 'comment': '', 'out': {'SYN0': column}}).encode()
+
+
+def _best(fn, runs: int) -> float:
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _bench(label: str, column_type: str, raws: list, unit: str, count: int, runs: int):
+    adapter = validate.response_adapter(column_type)
+
+    def _cached():
+        for raw in raws:
+            adapter.validate_json(raw)
+
+    def _dict():
+        for raw in raws:
+            adapter.validate_python(json.loads(raw))
+
+    def _rebuilt():
+        for raw in raws:
+            validate.response_adapter.cache_clear()
+            validate.response_adapter(column_type).validate_json(raw)
+
+    results = {
+        'cached': _best(_cached, runs),
+        'dict': _best(_dict, runs),
+        'rebuilt': _best(_rebuilt, runs),
+    }
+
+    size = sum(len(raw) for raw in raws)
+    print(f'{label}: {len(raws)} responses, {count} {unit}, {size / 2**20:.1f} MiB')
+    for mode, seconds in results.items():
+        print(
+            f'  {mode:>8}: {seconds * 1000:8.1f} ms, {count / seconds:12,.0f} {unit}/s'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--neighbors', type=int, default=10000)
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--devices', type=int, default=500)
+    parser.add_argument('--device-neighbors', type=int, default=20)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    _bench(
+        'bgp',
+        'bgp',
+        [_response(synthetic.bgp(0, args.neighbors))],
+        'neighbors',
+        args.neighbors,
+        args.runs,
+    )
+    _bench(
+        'bgp fleet',
+        'bgp',
+        [
+            _response(synthetic.bgp(i, args.device_neighbors))
+            for i in range(args.devices)
+        ],
+        'neighbors',
+        args.devices * args.device_neighbors,
+        args.runs,
+    )
+    _bench(
+        'policy',
+        'policy',
+        [_response(synthetic.policy(args.entries))],
+        'prefix-list entries',
+        args.entries,
+        args.runs,
+    )
+
+
+if __name__ == '__main__':
+    main()
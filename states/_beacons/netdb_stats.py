@@ -0,0 +1,65 @@
+from netdb_metrics import METRICS, METRICS_PILLAR, configure
+
+__virtualname__ = "netdb_stats"
+
+
+def __virtual__():
+    return __virtualname__
+
+
+def _config(config: list) -> dict:
+    ret: dict = {}
+    for item in config:
+        ret.update(item)
+    return ret
+
+
+def validate(config) -> tuple:
+    """
+    Validate the beacon configuration.
+    """
+    if not isinstance(config, list):
+        return False, 'Configuration for netdb_stats beacon must be a list.'
+
+    return True, 'Valid beacon configuration'
+
+
+def beacon(config) -> list:
+    """
+    Periodically fire an event carrying the NetDB request metrics of the
+    minion process (see column.metrics), and refresh the Prometheus textfile
+    if netdb:metrics:textfile is set. No event is fired while metrics are
+    disabled or no request has been recorded.
+
+    The beacon only sees requests made by its own process, i.e. by every job
+    of a minion running with multiprocessing: False as NetDB proxies do.
+
+    The event tag is salt/beacon/<minion id>/netdb_stats/metrics.
+
+    .. code-block:: yaml
+
+        beacons:
+          netdb_stats:
+            - interval: 60
+            - reset: True
+
+    reset
+        Clear the metrics after each event so that every event carries the
+        requests made since the previous one
+    """
+    settings = _config(config)
+
+    netdb = __opts__.get('pillar', {}).get('netdb', {})
+    configure(netdb.get(METRICS_PILLAR), netdb.get('id'))
+
+    if not METRICS.enabled:
+        return []
+
+    METRICS.write_textfile()
+
+    snapshot = METRICS.snapshot(reset=settings.get('reset', False))
+
+    if not snapshot['total']['requests']:
+        return []
+
+    return [{'tag': 'metrics', **snapshot}]
@@ -1,30 +1,178 @@
-import salt.config
-import salt.loader
-
-__opts__ = salt.config.minion_config('/etc/salt/proxy')
-__utils__ = salt.loader.utils(__opts__)
+from typing import Optional
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
 
 __virtualname__ = 'netdb_grains'
 __proxyenabled__ = ['*']
 
+logger = logging.getLogger(__file__)
+
+PROXY_CONFIG = '/etc/salt/proxy'
+
+# Location of cached device grains relative to the minion cachedir
+GRAINS_SUBDIR = os.path.join('netdb', 'grains')
+
+# Seconds cached device grains are used before a background refresh
+DEFAULT_TTL = 3600
+
+# Salt utils loader, created on first use
+_UTILS: Optional[dict] = None
+_UTILS_LOCK = threading.Lock()
+
+# NetDB IDs with a background refresh in progress
+_REFRESHING: set = set()
+_REFRESHING_LOCK = threading.Lock()
+
 
 def __virtual__():
     return __virtualname__
 
 
+def _utils() -> dict:
+    """
+    Return the utils loader. Building the proxy minion config and utils loader
+    is expensive, so it is deferred until device grains actually have to be
+    fetched from NetDB.
+    """
+    global _UTILS  # pylint: disable=global-statement
+
+    with _UTILS_LOCK:
+        if _UTILS is None:
+            import salt.config  # pylint: disable=import-outside-toplevel
+            import salt.loader  # pylint: disable=import-outside-toplevel
+
+            _UTILS = salt.loader.utils(salt.config.minion_config(PROXY_CONFIG))
+
+    return _UTILS
+
+
+def _cache_file(netdb_id: str) -> Optional[str]:
+    if not (cachedir := __opts__.get('cachedir')):
+        return None
+
+    return os.path.join(cachedir, GRAINS_SUBDIR, f'{netdb_id}.json')
+
+
+def _load(path: Optional[str]) -> Optional[dict]:
+    """
+    Return the cached {'fetched': ..., 'data': ...} entry, if any.
+    """
+    if not path:
+        return None
+
+    try:
+        with open(path, encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(entry, dict) or not isinstance(entry.get('data'), dict):
+        return None
+
+    return entry
+
+
+def _store(path: Optional[str], data: dict):
+    """
+    Atomically write device grains to the cache file.
+    """
+    if not path:
+        return
+
+    directory = os.path.dirname(path)
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'fetched': time.time(), 'data': data}, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning('netdb_grains: unable to cache device grains: %s', e)
+
+
+def _fetch(pillar: dict, netdb_id: str, path: Optional[str]) -> dict:
+    """
+    Fetch the device column from NetDB and cache it.
+    """
+    start = time.monotonic()
+
+    data = _utils()['netdb_api.get_api'](pillar).get_column(netdb_id, 'device')
+    _store(path, data)
+
+    logger.debug(
+        'netdb_grains: fetched device grains for %s in %.3fs',
+        netdb_id,
+        time.monotonic() - start,
+    )
+
+    return data
+
+
+def _refresh(pillar: dict, netdb_id: str, path: Optional[str]):
+    """
+    Refresh cached device grains in a background thread. The refreshed grains
+    are used on the next grains load.
+    """
+    with _REFRESHING_LOCK:
+        if netdb_id in _REFRESHING:
+            return
+        _REFRESHING.add(netdb_id)
+
+    def _run():
+        try:
+            _fetch(pillar, netdb_id, path)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning('netdb_grains: background refresh failed: %s', e)
+        finally:
+            with _REFRESHING_LOCK:
+                _REFRESHING.discard(netdb_id)
+
+    threading.Thread(target=_run, name='netdb_grains', daemon=True).start()
+
+
 def netdb_grains() -> dict:
     """
     Load NetDB grains. Currently just overlays the device column onto the
     grains dict.
+
+    The device column is cached in the minion cachedir and served from disk.
+    Once older than netdb:grains:ttl seconds (default 3600) it is refreshed
+    in the background; NetDB is only queried synchronously when no cached
+    copy exists. column.refresh_grains drops the cached copy to force a
+    synchronous fetch.
     """
     if 'netdb' in __pillar__:
-        netdb_id = __pillar__['netdb']['id']
+        start = time.monotonic()
+
+        netdb = __pillar__['netdb']
+        netdb_id = netdb['id']
+        ttl = (netdb.get('grains') or {}).get('ttl', DEFAULT_TTL)
+
+        path = _cache_file(netdb_id)
+
+        if entry := _load(path):
+            grains = entry['data']
+            if time.time() - entry.get('fetched', 0) > ttl:
+                _refresh(dict(__pillar__), netdb_id, path)
+            source = 'cache'
+        else:
+            grains = _fetch(__pillar__, netdb_id, path)
+            source = 'netdb'
 
-        grains = __utils__['netdb_api.get_api'](__pillar__).get_column(
-            netdb_id, 'device'
-        )
         grains['id'] = netdb_id
 
+        logger.debug(
+            'netdb_grains: loaded device grains for %s from %s in %.3fs',
+            netdb_id,
+            source,
+            time.monotonic() - start,
+        )
+
         return grains
 
     return {}
@@ -1,20 +1,133 @@
 from typing import Union, Any
 import logging
+import os
+import threading
 
 __virtualname__ = "column"
 
 from salt.exceptions import SaltException
 
 from netdb_api import NetdbAPI
+from netdb_pool import pool_stats as _pool_stats
+from netdb_cache import cache_counters
+from netdb_endpoints import endpoint_stats as _endpoint_stats
+from netdb_metrics import metrics as _metrics
 from exceptions.netdb_exceptions import ColumnNotFoundException
 
 logger = logging.getLogger(__file__)
 
+# __context__ key holding memoized columns per job. Proxy minions keep
+# __context__ across jobs, so every job gets its own memo, which starts empty.
+# Memoized columns are shared; do not modify them.
+_MEMO_KEY = 'netdb_column_memo'
+
+# Location of the device grains cached by the netdb_grains grains module,
+# relative to the minion cachedir
+_GRAINS_SUBDIR = os.path.join('netdb', 'grains')
+
 
 def __virtual__():
     return __virtualname__
 
 
+def _api() -> NetdbAPI:
+    """
+    Return a NetdbAPI instance using the minion cachedir for column caching.
+    """
+    return NetdbAPI(__pillar__, cachedir=__opts__.get('cachedir'))
+
+
+def _job() -> str:
+    """
+    Return a key identifying the current job. The minion runs every job in a
+    thread named after its job ID, or with multiprocessing in a process of
+    its own; salt-call runs a single job in its main thread.
+    """
+    return f'{os.getpid()}:{threading.current_thread().name}'
+
+
+def _memo() -> dict:
+    """
+    Return the column memo of the current job stored in the loader
+    __context__. Memos of jobs whose thread has ended are dropped when a new
+    job starts.
+    """
+    memos = __context__.setdefault(_MEMO_KEY, {})
+
+    if (job := _job()) not in memos:
+        running = {f'{os.getpid()}:{thread.name}' for thread in threading.enumerate()}
+        for ended in [key for key in memos if key not in running]:
+            del memos[ended]
+        memos[job] = {}
+
+    return memos[job]
+
+
+def _fetch(column: str, refresh: bool = False, validate: bool = False) -> dict:
+    """
+    Retrieve a column for this device, reusing a copy fetched earlier in the
+    same job unless refresh or validate is set. Validated columns are model
+    dumps rather than the raw column and are never memoized.
+    ColumnNotFoundException is passed through to the caller and not memoized.
+    """
+    key = (__grains__['node_name'], column)
+
+    if validate:
+        return _api().get_column_validated(key[0], column)
+
+    memo = _memo()
+
+    if not refresh and key in memo:
+        return memo[key]
+
+    ret = memo[key] = _api().get_column(key[0], column)
+
+    return ret
+
+
+def _fetch_path(
+    column: str, path: list, refresh: bool = False, keys_only: bool = False
+) -> dict:
+    """
+    Retrieve a column for this device pruned to the subtree at path. A
+    memoized copy of the full column is used if available; otherwise NetDB
+    projects the column so that only the requested subtree is transferred.
+    Projected columns are not memoized.
+    """
+    if not (path or keys_only):
+        return _fetch(column, refresh)
+
+    node_name = __grains__['node_name']
+
+    if not refresh and (memoized := _memo().get((node_name, column))) is not None:
+        return memoized
+
+    return _api().get_projection(node_name, column, path, keys_only)
+
+
+def _fetch_many(columns: list, refresh: bool = False) -> dict:
+    """
+    Retrieve several columns for this device with one batched request, reusing
+    memoized columns unless refresh is set. Columns not found are left out.
+    """
+    node_name = __grains__['node_name']
+    memo = _memo()
+
+    out = {}
+    missing = []
+
+    for column in dict.fromkeys(columns):
+        if not refresh and (node_name, column) in memo:
+            out[column] = memo[(node_name, column)]
+        else:
+            missing.append(column)
+
+    for column, ret in _api().get_columns(node_name, missing).items():
+        memo[(node_name, column)] = out[column] = ret
+
+    return out
+
+
 def ls() -> list:
     """
     Calls netdb for a list of available columns and returns this list.
@@ -26,10 +139,10 @@ def ls() -> list:
         salt sin1 column.ls
 
     """
-    return NetdbAPI(__pillar__).list_columns()['out']
+    return _api().list_columns()['out']
 
 
-def get(column: str, delimiter: str = ':') -> Any:
+def get(column: str, delimiter: str = ':', refresh: bool = False) -> Any:
     """
     Retrieves a column from netdb for the device.
 
@@ -43,9 +156,15 @@ def get(column: str, delimiter: str = ':') -> Any:
 
     device:location
 
+    Unless the column is already memoized, the path is sent to NetDB so that
+    only the requested subtree is transferred.
+
     delimiter
         Specify an alternate delimiter to use when traversing a nested dict
 
+    refresh
+        Bypass the per run column memo and fetch the column from netdb
+
     CLI Example::
 
     .. code-block:: bash
@@ -53,6 +172,14 @@ def get(column: str, delimiter: str = ':') -> Any:
         salt sin1 column.get interface
         salt sin1 column.get device:location
 
+    """
+    return _get(column, delimiter, refresh)
+
+
+def _get(column: str, delimiter: str, refresh: bool, keys_only: bool = False) -> Any:
+    """
+    Implements get. With keys_only set NetDB may return the subtree with its
+    values replaced by None.
     """
     if isinstance(delimiter, int):
         delimiter = str(delimiter)
@@ -67,36 +194,52 @@ def get(column: str, delimiter: str = ':') -> Any:
     column = c.pop(0)
 
     try:
-        unwind = NetdbAPI(__pillar__).get_column(__grains__['node_name'], column)
+        unwind = _fetch_path(column, c, refresh, keys_only)
     except ColumnNotFoundException:
         # We follow pillar convention of returning an empty list if no column found
         return []
 
-    for i, elem in enumerate(c):
+    return _unwind(unwind, c)
+
+
+def _unwind(unwind: Any, path: list) -> Any:
+    """
+    Return the value at path in a column, None if path ends early or an empty
+    list if the value is empty.
+    """
+    for i, elem in enumerate(path):
         unwind = unwind.get(elem)  # type: ignore
         if not isinstance(unwind, dict):
-            if i < len(c) - 1:
+            if i < len(path) - 1:
                 return None
             break
 
     return unwind or []
 
 
-def pull(column: str) -> dict:
+def pull(column: str, refresh: bool = False, validate: bool = False) -> dict:
     """
     Retrieves a raw column from netdb for the device in a manner suitable for state
     applies. No column filtering is done. In case of non-existent or empty column a
     a SaltException is raised.
 
+    Columns are fetched once per state run and reused by later calls. Set refresh
+    to bypass the memo and fetch the column from netdb.
+
+    Set validate to fetch the column from netdb and validate it against its
+    net_types model. A SaltException listing the first errors is raised if the
+    column does not match. Only the fields set in the response are returned.
+
     CLI Example::
 
     .. code-block:: bash
 
         salt sin1 column.pull interface
+        salt sin1 column.pull bgp validate=True
 
     """
     try:
-        ret = NetdbAPI(__pillar__).get_column(__grains__['node_name'], column)
+        ret = _fetch(column, refresh, validate)
     except ColumnNotFoundException as e:
         raise SaltException(str(e)) from e
 
@@ -106,16 +249,49 @@ def pull(column: str) -> dict:
     return ret
 
 
-def keys(column: str, delimiter: str = ':') -> Union[list, dict]:
+def pull_many(*args, **kwargs) -> dict:
+    """
+    Retrieves several raw columns from netdb for the device in a manner suitable
+    for state applies, using a single batched request where possible. Returns a
+    dict keyed by column name. In case of a non-existent or empty column a
+    SaltException is raised.
+
+    refresh
+        Bypass the per run column memo and fetch the columns from netdb
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt sin1 column.pull_many firewall interface
+
+    """
+    out = _fetch_many(list(args), kwargs.get('refresh', False))
+
+    for column in args:
+        if column not in out:
+            raise SaltException(f'{column}: column not found')
+
+        if not out[column]:
+            raise SaltException(f'{column}: Empty column returned')
+
+    return out
+
+
+def keys(column: str, delimiter: str = ':', refresh: bool = False) -> Union[list, dict]:
     """
     Attempt to retrieve a list of keys from the named value from column.
 
     The value can also represent a value in a nested dict using a ":" delimiter
-    for the dict, similar to how column.get works.
+    for the dict, similar to how column.get works. Only the keys are transferred
+    from NetDB if it supports projection.
 
     delimiter
         Specify an alternate delimiter to use when traversing a nested dict
 
+    refresh
+        Bypass the per run column memo and fetch the column from netdb
+
     CLI Example::
 
     .. code-block:: bash
@@ -124,7 +300,7 @@ def keys(column: str, delimiter: str = ':') -> Union[list, dict]:
         salt sin2 column.keys interface:tun372
 
     """
-    ret = get(column, delimiter)
+    ret = _get(column, delimiter, refresh, keys_only=True)
 
     if isinstance(ret, dict):
         return ret if ret.get('result') is False else list(ret.keys())
@@ -139,6 +315,9 @@ def item(*args, **kwargs) -> Union[dict, list]:
     delimiter
         Specify an alternate delimiter to use when traversing a nested dict
 
+    refresh
+        Bypass the per run column memo and fetch the columns from netdb
+
     CLI Example::
 
     .. code-block:: bash
@@ -149,19 +328,161 @@ def item(*args, **kwargs) -> Union[dict, list]:
     """
     out = {}
     delimiter = kwargs.pop('delimiter', ':')
+    refresh = kwargs.pop('refresh', False)
 
-    for column in args:
-        out[column] = get(column, delimiter)
-        if isinstance(out[column], dict) and out[column].get('result') is False:
-            #
-            # False result means that there was an issue with the delimiter. Return the
-            # error message.
-            #
-            return out[column]
-
-        if not out[column] or (
-            isinstance(out[column], dict) and out[column].get('result') is False
-        ):
+    if isinstance(delimiter, int):
+        delimiter = str(delimiter)
+
+    elif not isinstance(delimiter, str):
+        return {
+            'result': False,
+            'comment': 'delimiter must be a string or char',
+        }
+
+    paths = {column: str(column).split(delimiter) for column in args}
+
+    # All requested columns are fetched in one go
+    columns = _fetch_many([path[0] for path in paths.values()], refresh)
+
+    for column, path in paths.items():
+        # We follow pillar convention of returning an empty list if no column found
+        out[column] = _unwind(columns[path[0]], path[1:]) if path[0] in columns else []
+
+        if not out[column]:
             out[column] = []
 
     return out
+
+
+def invalidate(*args) -> list:
+    """
+    Drop memoized columns so that the next call fetches them from netdb. With
+    no arguments all memoized columns are dropped.
+
+    :return: a list of the invalidated column names
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt sin1 column.invalidate
+        salt sin1 column.invalidate interface bgp
+
+    """
+    memo = _memo()
+
+    dropped = [key for key in memo if not args or key[1] in args]
+    for key in dropped:
+        del memo[key]
+
+    return [key[1] for key in dropped]
+
+
+def refresh_grains() -> dict:
+    """
+    Fetch the NetDB device grains now. The device column cached by the
+    netdb_grains grains module is dropped and grains are reloaded, so that
+    changes to the device column take effect without waiting for
+    netdb:grains:ttl. saltutil.refresh_grains alone reloads the cached grains.
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt sin1 column.refresh_grains
+
+    """
+    netdb_id = __pillar__['netdb']['id']
+    path = os.path.join(__opts__['cachedir'], _GRAINS_SUBDIR, f'{netdb_id}.json')
+
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        return {'result': False, 'comment': f'unable to remove {path}: {e}'}
+
+    return {
+        'result': __salt__['saltutil.refresh_grains'](),
+        'comment': f'cached device grains of {netdb_id} dropped; grains reloaded',
+    }
+
+
+def cache_stats() -> dict:
+    """
+    Return persistent column cache statistics: hit, stale hit, miss, fallback,
+    revalidation and eviction counters for this minion process together with
+    the age, TTL and size of each cached column.
+
+    The cache is enabled by setting netdb:cache:enabled in the pillar.
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt sin1 column.cache_stats
+
+    """
+    if not (cache := _api().cache):
+        return {'enabled': False, 'counters': cache_counters()}
+
+    return {'enabled': True, **cache.stats()}
+
+
+def pool_stats() -> dict:
+    """
+    Return NetDB connection pool counters for this minion process. Session hits
+    and misses count pool lookups; the per URL connection and request counts
+    show how many requests were served over how many connections.
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt sin1 column.pool_stats
+
+    """
+    return _pool_stats()
+
+
+def endpoint_stats() -> dict:
+    """
+    Return moving average latency, p95 latency and error rate of the NetDB
+    endpoints used by this minion process. Used to check endpoint selection
+    when netdb_local:select is set to 'latency'.
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt sin1 column.endpoint_stats
+
+    """
+    return _endpoint_stats()
+
+
+def metrics(reset: bool = False) -> dict:
+    """
+    Return NetDB request metrics for this minion process: per endpoint request
+    counts, latency histograms, bytes received and status codes, per column
+    cache results and the total time spent waiting on NetDB.
+
+    Metrics are recorded once netdb:metrics:enabled is set in the pillar. They
+    cover every job only on minions running with multiprocessing: False (as
+    NetDB proxies are configured); otherwise each job process records its own.
+
+    reset
+        Clear the metrics after returning them
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt sin1 column.metrics
+        salt sin1 column.metrics reset=True
+
+    """
+    # Applies the netdb:metrics pillar settings
+    _api()
+
+    return _metrics(reset)
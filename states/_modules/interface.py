@@ -1,4 +1,5 @@
 import logging
+from copy import deepcopy
 from socket import inet_aton
 from struct import unpack
 
@@ -41,6 +42,8 @@ def get_vyos_ethernet() -> dict:
         Accept a settings dictionary associated with an interface column key and add VyOS
         specific settings to it.
         """
+        settings = deepcopy(settings)
+
         match (settings['type']):
             case 'ethernet':
                 settings['vyos_type'] = 'ethernet'
@@ -98,6 +101,8 @@ def get_vyos_tunnels() -> dict:
         VyOS does not accept octet encoded tunnels. Convert them to longs and add them in
         a new key.
         """
+        settings = dict(settings)
+
         if key := settings.get('key'):
             settings['key_vyos'] = _ip2long(key)
 
@@ -1,5 +1,5 @@
 import logging
-from netdb_util_api import NetdbUtilAPI
+from netdb_runner import get_util_api
 
 __virtualname__ = "cfdns"
 
@@ -40,9 +40,7 @@ def synchronize(test: bool = True) -> dict:
     if not isinstance(test, bool):
         return {"result": False, "comment": "test only accepts true or false."}
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
-        _ENDPOINT.format('update'), test=test
-    )
+    return get_util_api(__opts__, __salt__).post(_ENDPOINT.format('update'), test=test)
 
 
 def get_ptrs() -> dict:
@@ -61,9 +59,7 @@ def get_ptrs() -> dict:
         salt-run cfdns.get_ptrs
 
     """
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).get(
-        _ENDPOINT.format('records')
-    )
+    return get_util_api(__opts__, __salt__).get(_ENDPOINT.format('records'))
 
 
 def get_zones() -> dict:
@@ -82,7 +78,7 @@ def get_zones() -> dict:
         salt-run cfdns.get_zones
 
     """
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).get(_ENDPOINT.format('zones'))
+    return get_util_api(__opts__, __salt__).get(_ENDPOINT.format('zones'))
 
 
 def upsert_zone(
@@ -122,7 +118,7 @@ def upsert_zone(
         "managed": managed,
     }
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
+    return get_util_api(__opts__, __salt__).post(
         _ENDPOINT.format('zones'), data=data, test=test
     )
 
@@ -145,6 +141,6 @@ def delete_zone(prefix: str) -> dict:
     """
     params = {'prefix': prefix}
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).delete(
+    return get_util_api(__opts__, __salt__).delete(
         _ENDPOINT.format('zones'), params=params
     )
@@ -1,5 +1,7 @@
+from typing import Optional, Union
 import logging
-from netdb_util_api import NetdbUtilAPI
+from netdb_runner import get_util_api, stream_result
+from ip_index import PrefixIndex, parse_prefixes
 
 __virtualname__ = "ipam"
 
@@ -17,13 +19,15 @@ def __virtual__():
     return __virtualname__
 
 
-def report() -> dict:
+def report(output_file: Optional[str] = None, outputter: Optional[str] = None) -> dict:
     """
     Show salt managed IP addresses.
 
     A sorted list of salt managed IP addresses is also displayed in the
     comment.
 
+    :param output_file: stream the addresses into this JSON file instead of returning them
+    :param outputter: stream the addresses to the console one at a time with this outputter
     :return: a dictionary consisting of the following keys:
 
        * result: (bool) True if IP addresses returned; false otherwise
@@ -33,11 +37,18 @@ def report() -> dict:
     .. code-block:: bash
 
         salt-run ipam.report
+        salt-run ipam.report output_file=/var/scratch/report.json
 
     """
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).get(
-        _ENDPOINT.format('report')
-    )
+    if output_file or outputter:
+        return stream_result(
+            get_util_api(__opts__, __salt__).stream(_ENDPOINT.format('report')),
+            __opts__,
+            output_file,
+            outputter,
+        )
+
+    return get_util_api(__opts__, __salt__).get(_ENDPOINT.format('report'))
 
 
 def chooser(prefix: str) -> dict:
@@ -62,10 +73,159 @@ def chooser(prefix: str) -> dict:
     """
     params = {"prefix": prefix}
 
-    ret = NetdbUtilAPI(__salt__['pillar.show_pillar']()).get(
+    ret = get_util_api(__opts__, __salt__).get(
         _ENDPOINT.format('chooser'), params=params
     )
 
     ret.update({'notice': _WARNING})
 
     return ret
+
+
+def _index() -> PrefixIndex:
+    """
+    Build a prefix index from a single streamed ipam report.
+    """
+    return PrefixIndex.from_report(
+        get_util_api(__opts__, __salt__).stream(_ENDPOINT.format('report'))
+    )
+
+
+def _report_errors(ret: dict, index: PrefixIndex) -> dict:
+    """
+    Add the ipam report entries left out of index to ret.
+    """
+    if index.errors:
+        ret['errors'] = index.errors
+        comment = (
+            f'{len(index.errors)} ipam report entries without a valid address ignored'
+        )
+        ret['comment'] = '; '.join(filter(None, [ret.get('comment'), comment]))
+
+    return ret
+
+
+def free_space(prefixes: Union[str, list]) -> dict:
+    """
+    Show available prefixes / free IP space within several (super)prefixes.
+    Like chooser, but answered locally from a single ipam report fetch.
+
+    In order for this function to by accurate, all IP a space within the
+    the queried prefixes must be managed by netdb - salt.
+
+    :param prefixes: comma separated list of prefixes whose free space is to
+        be returned.
+    :return: a dictionary consisting of the following keys:
+
+       * result: (bool) True if IP addresses returned; false otherwise
+       * out: per prefix, a list of free space in prefix and range formats
+       * errors: ipam report entries ignored for lack of a valid address
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt-run ipam.free_space prefixes='23.181.64.0/24,2620:136:a000::/48'
+
+    """
+    networks, error = parse_prefixes(prefixes)
+    if error:
+        return {'result': False, 'comment': error}
+
+    index = _index()
+
+    out = {
+        str(network): {
+            'prefixes': [str(free) for free in index.free_prefixes(network)],
+            'ranges': [f'{first}-{last}' for first, last in index.free(network)],
+        }
+        for network in networks
+    }
+
+    return _report_errors({'result': True, 'out': out, 'notice': _WARNING}, index)
+
+
+def first_fit(prefixes: Union[str, list], length: int, count: int = 1) -> dict:
+    """
+    Find the first free prefixes of a given length within one or more
+    (super)prefixes, e.g. to plan a renumbering. Answered locally from a
+    single ipam report fetch.
+
+    :param prefixes: comma separated list of prefixes to search, in order.
+    :param length: prefix length of the prefixes to find.
+    :param count: number of prefixes to find.
+    :return: a dictionary consisting of the following keys:
+
+       * result: (bool) True if count prefixes were found; false otherwise
+       * out: a list of free prefixes
+       * errors: ipam report entries ignored for lack of a valid address
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt-run ipam.first_fit 23.181.64.0/24 31
+        salt-run ipam.first_fit prefixes='23.181.64.0/24,23.181.65.0/24' length=29 count=12
+
+    """
+    networks, error = parse_prefixes(prefixes)
+    if error:
+        return {'result': False, 'comment': error}
+
+    index = _index()
+    found: list = []
+
+    for network in networks:
+        try:
+            found += index.first_fit(network, int(length), int(count) - len(found))
+        except ValueError as e:
+            return {'result': False, 'comment': str(e)}
+
+        if len(found) == int(count):
+            break
+
+    ret = {
+        'result': len(found) == int(count),
+        'out': [str(network) for network in found],
+        'notice': _WARNING,
+    }
+    if not ret['result']:
+        ret['comment'] = f'only {len(found)} free /{length} prefixes available'
+
+    return _report_errors(ret, index)
+
+
+def utilization(prefixes: Union[str, list]) -> dict:
+    """
+    Show the number of used and free addresses within one or more
+    (super)prefixes. Answered locally from a single ipam report fetch.
+
+    :param prefixes: comma separated list of prefixes.
+    :return: a dictionary consisting of the following keys:
+
+       * result: (bool) True if IP addresses returned; false otherwise
+       * out: per prefix, its size, used and free address counts and the
+         used percentage
+       * errors: ipam report entries ignored for lack of a valid address
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt-run ipam.utilization prefixes='23.181.64.0/24,2620:136:a000::/48'
+
+    """
+    networks, error = parse_prefixes(prefixes)
+    if error:
+        return {'result': False, 'comment': error}
+
+    index = _index()
+
+    return _report_errors(
+        {
+            'result': True,
+            'out': {str(network): index.utilization(network) for network in networks},
+            'notice': _WARNING,
+        },
+        index,
+    )
@@ -1,7 +1,7 @@
 from typing import Union, Optional
 import logging
 
-from netdb_util_api import NetdbUtilAPI
+from netdb_runner import get_util_api, stream_result
 
 __virtualname__ = "netbox"
 
@@ -15,10 +15,14 @@ def __virtual__():
     return __virtualname__
 
 
-def generate_devices() -> dict:
+def generate_devices(
+    output_file: Optional[str] = None, outputter: Optional[str] = None
+) -> dict:
     """
     Show devices generated from Netbox source in netdb format.
 
+    :param output_file: stream the devices into this JSON file instead of returning them
+    :param outputter: stream the devices to the console one at a time with this outputter
     :return: a dictionary consisting of the following keys:
 
        * result: (bool) True if data returned; false otherwise
@@ -29,18 +33,29 @@ def generate_devices() -> dict:
     .. code-block:: bash
 
         salt-run netbox.generate_devices
+        salt-run netbox.generate_devices output_file=/var/scratch/devices.json
 
     """
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).get(
-        _ENDPOINT.format('device')
-    )
+    if output_file or outputter:
+        return stream_result(
+            get_util_api(__opts__, __salt__).stream(_ENDPOINT.format('device')),
+            __opts__,
+            output_file,
+            outputter,
+        )
+
+    return get_util_api(__opts__, __salt__).get(_ENDPOINT.format('device'))
 
 
-def generate_interfaces() -> dict:
+def generate_interfaces(
+    output_file: Optional[str] = None, outputter: Optional[str] = None
+) -> dict:
     """
     Show interfaces generated from Netbox source in netdb format for a device.
 
     :param device: The device whose interfaces are to be generated.
+    :param output_file: stream the interfaces into this JSON file instead of returning them
+    :param outputter: stream the interfaces to the console one at a time with this outputter
     :return: a dictionary consisting of the following keys:
 
        * result: (bool) True if data returned; false otherwise
@@ -51,11 +66,18 @@ def generate_interfaces() -> dict:
     .. code-block:: bash
 
         salt-run netbox.generate_interfaces sin1
+        salt-run netbox.generate_interfaces output_file=/var/scratch/interfaces.json
 
     """
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).get(
-        _ENDPOINT.format('interface')
-    )
+    if output_file or outputter:
+        return stream_result(
+            get_util_api(__opts__, __salt__).stream(_ENDPOINT.format('interface')),
+            __opts__,
+            output_file,
+            outputter,
+        )
+
+    return get_util_api(__opts__, __salt__).get(_ENDPOINT.format('interface'))
 
 
 def generate_protocol() -> dict:
@@ -74,9 +96,7 @@ def generate_protocol() -> dict:
         salt-run netbox.generate_protocol
 
     """
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).get(
-        _ENDPOINT.format('protocol')
-    )
+    return get_util_api(__opts__, __salt__).get(_ENDPOINT.format('protocol'))
 
 
 def generate_ebgp() -> dict:
@@ -95,7 +115,7 @@ def generate_ebgp() -> dict:
         salt-run netbox.generate_ebgp
 
     """
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).get(_ENDPOINT.format('ebgp'))
+    return get_util_api(__opts__, __salt__).get(_ENDPOINT.format('ebgp'))
 
 
 def reload_devices() -> Union[dict, bool]:
@@ -116,9 +136,7 @@ def reload_devices() -> Union[dict, bool]:
         salt-run netbox.reload_devices
 
     """
-    ret = NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
-        _ENDPOINT.format('device'), test=False
-    )
+    ret = get_util_api(__opts__, __salt__).post(_ENDPOINT.format('device'), test=False)
 
     return True if ret['result'] else ret
 
@@ -141,7 +159,7 @@ def reload_interfaces() -> Union[dict, bool]:
         salt-run netbox.reload_interfaces
 
     """
-    ret = NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
+    ret = get_util_api(__opts__, __salt__).post(
         _ENDPOINT.format('interface'), test=False
     )
 
@@ -166,7 +184,7 @@ def reload_protocol() -> Union[dict, bool]:
         salt-run netbox.reload_protocol
 
     """
-    ret = NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
+    ret = get_util_api(__opts__, __salt__).post(
         _ENDPOINT.format('protocol'), test=False
     )
 
@@ -191,9 +209,7 @@ def reload_bgp() -> Union[dict, bool]:
         salt-run netbox.reload_bgp
 
     """
-    ret = NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
-        _ENDPOINT.format('ebgp'), test=False
-    )
+    ret = get_util_api(__opts__, __salt__).post(_ENDPOINT.format('ebgp'), test=False)
 
     return True if ret['result'] else ret
 
@@ -219,7 +235,7 @@ def update_ptrs(test: bool = True) -> dict:
     if not isinstance(test, bool):
         return {"result": False, "comment": "test only accepts true or false."}
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
+    return get_util_api(__opts__, __salt__).post(
         _SCRIPTS.format('update_ptrs'), test=test
     )
 
@@ -246,7 +262,7 @@ def update_iface_descriptions(test: bool = True) -> dict:
     if not isinstance(test, bool):
         return {"result": False, "comment": "test only accepts true or false."}
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
+    return get_util_api(__opts__, __salt__).post(
         _SCRIPTS.format('update_iface_descriptions'), test=test
     )
 
@@ -277,7 +293,7 @@ def renumber(ipv4: str, ipv6: str, test: bool = True) -> dict:
         'ipv6_prefix': ipv6,
     }
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
+    return get_util_api(__opts__, __salt__).post(
         _SCRIPTS.format('renumber'), data=data, test=test
     )
 
@@ -304,7 +320,7 @@ def prune_ips(test: bool = True) -> dict:
     if not isinstance(test, bool):
         return {"result": False, "comment": "test only accepts true or false."}
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
+    return get_util_api(__opts__, __salt__).post(
         _SCRIPTS.format('prune_ips'), test=test
     )
 
@@ -347,7 +363,7 @@ def create_pni(
 
     data = {k: v for k, v in data.items() if v}
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
+    return get_util_api(__opts__, __salt__).post(
         _SCRIPTS.format('create_pni'), data=data, test=test
     )
 
@@ -403,7 +419,7 @@ def create_bundle(
 
     data = {k: v for k, v in data.items() if v}
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
+    return get_util_api(__opts__, __salt__).post(
         _SCRIPTS.format('create_bundle'), data=data, test=test
     )
 
@@ -462,6 +478,6 @@ def configure_pni(
 
     data = {k: v for k, v in data.items() if v}
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
+    return get_util_api(__opts__, __salt__).post(
         _SCRIPTS.format('configure_pni'), data=data, test=test
     )
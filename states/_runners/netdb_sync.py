@@ -0,0 +1,292 @@
+from typing import Callable, Dict, List, Optional, Union
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import logging
+import time
+
+from netdb_runner import get_settings
+
+__virtualname__ = "netdb_sync"
+
+log = logging.getLogger(__file__)
+
+# Default number of reloads run concurrently
+DEFAULT_WORKERS = 4
+
+# Reload steps: runner function, arguments and the steps which must complete
+# successfully first. Every other column refers to the devices of the device
+# column; IS-IS and internal eBGP configuration is generated from interfaces.
+STEPS: Dict[str, dict] = {
+    'netbox.reload_devices': {'fun': 'netbox.reload_devices', 'requires': []},
+    'netbox.reload_interfaces': {
+        'fun': 'netbox.reload_interfaces',
+        'requires': ['netbox.reload_devices'],
+    },
+    'netbox.reload_protocol': {
+        'fun': 'netbox.reload_protocol',
+        'requires': ['netbox.reload_devices', 'netbox.reload_interfaces'],
+    },
+    'netbox.reload_bgp': {
+        'fun': 'netbox.reload_bgp',
+        'requires': ['netbox.reload_devices', 'netbox.reload_interfaces'],
+    },
+    'pm.reload_bgp': {'fun': 'pm.reload_bgp', 'requires': ['netbox.reload_devices']},
+}
+
+# Repository columns are reloaded as 'repo_yaml.reload_column:<column>' steps
+_REPO_STEP = 'repo_yaml.reload_column:{}'
+
+
+def __virtual__():
+    return __virtualname__
+
+
+def _split(value: Optional[Union[str, list]]) -> Optional[List[str]]:
+    if value is None or isinstance(value, list):
+        return value
+    return [item for item in value.split(',') if item]
+
+
+def _graph(repo_columns: List[str]) -> Dict[str, dict]:
+    """
+    Return the reload steps including one step per repository column.
+    """
+    graph = dict(STEPS)
+
+    for column in repo_columns:
+        graph[_REPO_STEP.format(column)] = {
+            'fun': 'repo_yaml.reload_column',
+            'args': [column],
+            'requires': ['netbox.reload_devices'],
+        }
+
+    return graph
+
+
+def _succeeded(ret) -> bool:
+    """
+    The reload runners return True on success and their NetDB Util response
+    otherwise.
+    """
+    if ret is True:
+        return True
+
+    return isinstance(ret, dict) and bool(ret.get('result')) and not ret.get('error')
+
+
+def _stages(graph: Dict[str, dict]) -> List[List[str]]:
+    """
+    Return the steps grouped into stages whose steps only depend on steps of
+    earlier stages.
+    """
+    stages: List[List[str]] = []
+    done: set = set()
+    pending = list(graph)
+
+    while pending:
+        ready = [
+            step
+            for step in pending
+            if all(req in done or req not in graph for req in graph[step]['requires'])
+        ]
+        if not ready:
+            raise ValueError(f'dependency cycle among {pending}')
+
+        stages.append(ready)
+        done.update(ready)
+        pending = [step for step in pending if step not in done]
+
+    return stages
+
+
+def _critical_path(graph: Dict[str, dict], seconds: Dict[str, float]) -> tuple:
+    """
+    Return the longest chain of dependent steps by run time and its length in
+    seconds.
+    """
+    finish: Dict[str, float] = {}
+    previous: Dict[str, Optional[str]] = {}
+
+    for stage in _stages(graph):
+        for step in stage:
+            before = [req for req in graph[step]['requires'] if req in finish]
+            prev = max(before, key=lambda req: finish[req], default=None)
+            previous[step] = prev
+            finish[step] = (finish[prev] if prev else 0.0) + seconds.get(step, 0.0)
+
+    if not finish:
+        return [], 0.0
+
+    step: Optional[str] = max(finish, key=lambda s: finish[s])
+    length = finish[step]  # type: ignore
+    path = []
+    while step:
+        path.append(step)
+        step = previous[step]
+
+    return path[::-1], length
+
+
+def _run_graph(graph: Dict[str, dict], call: Callable, workers: int) -> Dict[str, dict]:
+    """
+    Run the steps of graph with call, at most workers at a time. A step is
+    started as soon as all of the steps it requires have succeeded; steps
+    depending on a failed step are skipped.
+
+    Returns per step results with the runner return value, start offset and
+    duration in seconds.
+    """
+    results: Dict[str, dict] = {}
+    running: Dict[Future, str] = {}
+    pending = list(graph)
+    start = time.perf_counter()
+
+    def _run(step: str) -> tuple:
+        started = time.perf_counter()
+        try:
+            ret = call(graph[step]['fun'], *graph[step].get('args', []))
+        except Exception as e:  # pylint: disable=broad-except
+            log.exception('netdb_sync: %s failed', step)
+            ret = {'result': False, 'comment': f'{type(e).__name__}: {e}'}
+
+        return ret, started - start, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        while pending or running:
+            for step in list(pending):
+                requires = [req for req in graph[step]['requires'] if req in graph]
+
+                if failed := [
+                    req
+                    for req in requires
+                    if req in results and not results[req]['result']
+                ]:
+                    pending.remove(step)
+                    results[step] = {
+                        'result': False,
+                        'comment': f'skipped: {", ".join(failed)} failed',
+                        'start': None,
+                        'seconds': 0.0,
+                    }
+                    log.warning('netdb_sync: %s skipped', step)
+
+                elif all(req in results for req in requires):
+                    pending.remove(step)
+                    running[ex.submit(_run, step)] = step
+                    log.info('netdb_sync: %s started', step)
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                step = running.pop(future)
+                ret, offset, seconds = future.result()
+
+                results[step] = {
+                    'result': _succeeded(ret),
+                    'start': round(offset, 3),
+                    'seconds': round(seconds, 3),
+                }
+                if ret is not True:
+                    results[step]['out'] = ret
+
+                log.info(
+                    'netdb_sync: %s finished in %.1fs: %s',
+                    step,
+                    seconds,
+                    'ok' if results[step]['result'] else 'failed',
+                )
+
+    return results
+
+
+def reload_all(
+    steps: Optional[Union[str, list]] = None,
+    repo_columns: Optional[Union[str, list]] = None,
+    workers: int = DEFAULT_WORKERS,
+    test: bool = False,
+) -> dict:
+    """
+    Reload NetDB from all sources: the Netbox device, interface, protocol and
+    BGP columns, Peering Manager BGP sessions and repo_yaml columns. Reloads
+    which do not depend on each other run concurrently, so that the whole
+    reload takes about as long as its longest chain of dependent reloads
+    (e.g. devices, then interfaces, then protocol) instead of the sum of all.
+    Reloads depending on a failed reload are skipped.
+
+    :param steps: comma separated list of steps to run (default: all). Steps
+        required by a selected step but not selected themselves are assumed
+        to be current.
+    :param repo_columns: comma separated list of repo_yaml columns to reload
+        (default: the netdb:sync:repo_columns pillar setting, or none)
+    :param workers: maximum number of reloads run at the same time
+    :param test: only show the steps in the order they would be started
+    :return: a dictionary consisting of the following keys:
+
+       * result: (bool) True if all reloads succeeded; false otherwise
+       * out: per step result, start offset and duration in seconds, the
+         critical path and the total and summed run times
+       * comment: summary of the reload
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt-run netdb_sync.reload_all
+        salt-run netdb_sync.reload_all repo_columns=policy,firewall workers=8
+        salt-run netdb_sync.reload_all steps=pm.reload_bgp,netbox.reload_bgp
+        salt-run netdb_sync.reload_all test=true
+
+    """
+    if repo_columns is None:
+        sync = get_settings(__opts__, __salt__).get('netdb', {}).get('sync') or {}
+        repo_columns = sync.get('repo_columns', [])
+
+    graph = _graph(_split(repo_columns) or [])
+
+    if selected := _split(steps):
+        if unknown := [step for step in selected if step not in graph]:
+            return {
+                'result': False,
+                'comment': f'{unknown}: unknown steps; known steps: {list(graph)}',
+            }
+        graph = {step: graph[step] for step in graph if step in selected}
+
+    try:
+        stages = _stages(graph)
+    except ValueError as e:
+        return {'result': False, 'comment': str(e)}
+
+    if test:
+        return {
+            'result': True,
+            'out': {'stages': stages},
+            'comment': f'{len(graph)} steps in {len(stages)} stages',
+        }
+
+    start = time.perf_counter()
+    results = _run_graph(graph, lambda fun, *args: __salt__[fun](*args), workers)
+    elapsed = time.perf_counter() - start
+
+    path, path_seconds = _critical_path(
+        graph, {step: ret['seconds'] for step, ret in results.items()}
+    )
+    summed = sum(ret['seconds'] for ret in results.values())
+    failed = [step for step, ret in results.items() if not ret['result']]
+
+    return {
+        'result': not failed,
+        'out': {
+            'steps': {step: results[step] for step in graph},
+            'critical_path': path,
+            'critical_path_seconds': round(path_seconds, 3),
+            'seconds': round(elapsed, 3),
+            'summed_seconds': round(summed, 3),
+        },
+        'comment': (
+            f'{len(graph) - len(failed)}/{len(graph)} reloads succeeded in '
+            f'{elapsed:.1f}s ({summed:.1f}s if run one at a time)'
+            + (f'; failed or skipped: {", ".join(failed)}' if failed else '')
+        ),
+    }
@@ -0,0 +1,118 @@
+from typing import Optional, Union
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import os
+import time
+
+from netdb_api import validate_device
+from netdb_runner import get_api, get_settings
+from net_types.netdb import COLUMN_TYPES
+
+__virtualname__ = "netdb_validate"
+
+log = logging.getLogger(__file__)
+
+
+def __virtual__():
+    return __virtualname__
+
+
+def fleet(
+    columns: Optional[Union[str, list]] = None, workers: Optional[int] = None
+) -> dict:
+    """
+    Validate the columns of every device against their net_types models. Each
+    device column is fetched and validated straight from the response bytes in
+    a pool of worker processes.
+
+    :param columns: comma separated list of columns to validate (default: all)
+    :param workers: number of worker processes (default: number of CPUs)
+    :return: a dictionary consisting of the following keys:
+
+       * result: (bool) True if all device columns are valid; false otherwise
+       * out: per column counts of valid, invalid and missing device columns,
+         validation errors keyed by router and validation throughput
+       * comment: summary of the validation run
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt-run netdb_validate.fleet
+        salt-run netdb_validate.fleet columns=bgp,policy workers=8
+
+    """
+    if columns is None:
+        columns = COLUMN_TYPES
+    elif isinstance(columns, str):
+        columns = columns.split(',')
+
+    if unknown := [column for column in columns if column not in COLUMN_TYPES]:
+        return {'result': False, 'comment': f'{unknown}: no schema for columns'}
+
+    settings = get_settings(__opts__, __salt__)
+    routers = [
+        router for router, _ in get_api(__opts__, __salt__).stream_column('device')
+    ]
+
+    out = {
+        column: {
+            'valid': 0,
+            'invalid': 0,
+            'missing': 0,
+            'bytes': 0,
+            'neighbors': 0,
+            'prefix_list_entries': 0,
+            'validation_seconds': 0.0,
+            'errors': {},
+        }
+        for column in columns
+    }
+
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as ex:
+        futures = [
+            ex.submit(validate_device, settings, router, column)
+            for column in columns
+            for router in routers
+        ]
+
+        for future in futures:
+            ret = future.result()
+            stats = out[ret['column']]
+
+            if ret['valid'] is None:
+                stats['missing'] += 1
+                continue
+
+            if ret['valid']:
+                stats['valid'] += 1
+                for counter, count in ret['counts'].items():
+                    stats[counter] += count
+            else:
+                stats['invalid'] += 1
+                stats['errors'][ret['router']] = ret['errors']
+
+            stats['bytes'] += ret.get('bytes', 0)
+            stats['validation_seconds'] += ret.get('seconds', 0.0)
+
+    elapsed = time.perf_counter() - start
+
+    for stats in out.values():
+        if seconds := stats['validation_seconds']:
+            stats['neighbors_per_second'] = round(stats['neighbors'] / seconds)
+            stats['prefix_list_entries_per_second'] = round(
+                stats['prefix_list_entries'] / seconds
+            )
+
+    invalid = sum(stats['invalid'] for stats in out.values())
+
+    return {
+        'result': not invalid,
+        'out': out,
+        'comment': (
+            f'{len(routers)} devices, {len(columns)} columns validated in '
+            f'{elapsed:.1f}s: {invalid} invalid device columns'
+        ),
+    }
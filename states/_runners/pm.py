@@ -1,12 +1,75 @@
-from typing import Union, Optional
+from typing import Dict, List, Optional, Set, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from ipaddress import ip_address
+import csv
 import logging
+import time
 
-from netdb_util_api import NetdbUtilAPI
+from pydantic import ValidationError
+import yaml
+
+from netdb_runner import get_util_api, stream_result
+from net_types.columns.bgp import BGPNeighbor
 
 __virtualname__ = "pm"
 
 _ENDPOINT = 'connectors/pm/{}'
 
+# Columns of an apply_sessions file, named after the add_direct_session
+# arguments
+SESSION_FIELDS = (
+    'device',
+    'peer_ip',
+    'asn',
+    'import_policy',
+    'export_policy',
+    'local_ip',
+    'session_type',
+    'comment',
+    'ttl',
+    'status',
+    'local_asn',
+)
+
+_INT_FIELDS = ('asn', 'ttl', 'local_asn')
+
+# NetDB Util session keys of the apply_sessions file columns
+_DATA_KEYS = {
+    'device': 'device',
+    'peer_ip': 'remote_ip',
+    'asn': 'peer_asn',
+    'import_policy': 'import',
+    'export_policy': 'export',
+    'local_ip': 'local_ip',
+    'session_type': 'type',
+    'comment': 'comment',
+    'ttl': 'ttl',
+    'status': 'status',
+    'local_asn': 'local_asn',
+}
+
+# Columns not part of the generated neighbor configuration, compared with the
+# session meta when present there
+_META_FIELDS = ('session_type', 'comment', 'status', 'local_asn')
+
+# Columns sent by an update, as by update_direct_session
+_UPDATE_FIELDS = (
+    'device',
+    'peer_ip',
+    'import_policy',
+    'export_policy',
+    'local_ip',
+    'comment',
+    'ttl',
+    'status',
+)
+
+# Columns cleared by an update with a value of '0' (see update_direct_session)
+_CLEARABLE = ('import_policy', 'export_policy', 'local_ip', 'comment', 'ttl')
+
+# Columns an update cannot change
+_IMMUTABLE = ('asn', 'session_type', 'local_asn')
+
 log = logging.getLogger(__file__)
 
 
@@ -14,11 +77,15 @@ def __virtual__():
     return __virtualname__
 
 
-def generate_direct_sessions() -> dict:
+def generate_direct_sessions(
+    output_file: Optional[str] = None, outputter: Optional[str] = None
+) -> dict:
     """
     Show eBGP direct session config generated from Peering Manager source
     in netdb format.
 
+    :param output_file: stream the sessions into this JSON file instead of returning them
+    :param outputter: stream the sessions to the console one at a time with this outputter
     :return: a dictionary consisting of the following keys:
 
        * result: (bool) True if data returned; false otherwise
@@ -29,11 +96,20 @@ def generate_direct_sessions() -> dict:
     .. code-block:: bash
 
         salt-run pm.generate_direct_sessions
+        salt-run pm.generate_direct_sessions output_file=/var/scratch/direct_sessions.json
 
     """
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).get(
-        _ENDPOINT.format('sessions/direct')
-    )
+    if output_file or outputter:
+        return stream_result(
+            get_util_api(__opts__, __salt__).stream(
+                _ENDPOINT.format('sessions/direct')
+            ),
+            __opts__,
+            output_file,
+            outputter,
+        )
+
+    return get_util_api(__opts__, __salt__).get(_ENDPOINT.format('sessions/direct'))
 
 
 def generate_ixp_sessions() -> dict:
@@ -53,9 +129,7 @@ def generate_ixp_sessions() -> dict:
         salt-run pm.generate_ixp_sessions
 
     """
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).get(
-        _ENDPOINT.format('sessions/ixp')
-    )
+    return get_util_api(__opts__, __salt__).get(_ENDPOINT.format('sessions/ixp'))
 
 
 def reload_bgp(verbose: bool = False) -> Union[dict, bool]:
@@ -76,13 +150,46 @@ def reload_bgp(verbose: bool = False) -> Union[dict, bool]:
         salt-run pm.reload_bgp
 
     """
-    ret = NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
-        _ENDPOINT.format('sessions/reload')
-    )
+    ret = get_util_api(__opts__, __salt__).post(_ENDPOINT.format('sessions/reload'))
 
     return True if ret['result'] and not verbose else ret
 
 
+def _generate() -> Tuple[Optional[Dict[Tuple[str, str], dict]], Optional[dict]]:
+    """
+    Return the direct and IXP sessions generated from Peering Manager keyed by
+    (device, neighbor), or None and the failed NetDB Util response.
+    """
+    api = get_util_api(__opts__, __salt__)
+
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        rets = list(
+            ex.map(
+                lambda kind: api.get(_ENDPOINT.format(f'sessions/{kind}')),
+                ('direct', 'ixp'),
+            )
+        )
+
+    sessions: Dict[Tuple[str, str], dict] = {}
+
+    for ret in rets:
+        if not ret['result']:
+            return None, ret
+
+        for device, data in (ret.get('out') or {}).items():
+            for neighbor, session in ((data or {}).get('neighbors') or {}).items():
+                sessions[(device, neighbor)] = session
+
+    return sessions, None
+
+
+def _by_device(keys: Set[Tuple[str, str]]) -> Dict[str, list]:
+    ret: Dict[str, list] = {}
+    for device, neighbor in sorted(keys):
+        ret.setdefault(device, []).append(neighbor)
+    return ret
+
+
 def set_maintenance(device: str, neighbor: str) -> dict:
     """
     Set a Peering Manager session to maintenance and synchronize netdb.
@@ -107,7 +214,7 @@ def set_maintenance(device: str, neighbor: str) -> dict:
         'status': 'maintenance',
     }
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).put(
+    return get_util_api(__opts__, __salt__).put(
         _ENDPOINT.format('sessions/status'), params=params
     )
 
@@ -136,11 +243,188 @@ def set_enabled(device: str, neighbor: str) -> dict:
         'status': 'enabled',
     }
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).put(
+    return get_util_api(__opts__, __salt__).put(
         _ENDPOINT.format('sessions/status'), params=params
     )
 
 
+def _select(
+    sessions: Optional[Union[str, list]], device: Optional[str], asn: Optional[int]
+) -> Tuple[Optional[List[Tuple[str, str]]], Optional[dict]]:
+    """
+    Return the (device, neighbor) pairs of the listed sessions, or of the
+    Peering Manager sessions on device and / or with remote ASN asn, or None
+    and the failed NetDB Util response or a response listing invalid
+    sessions.
+    """
+    if sessions:
+        if isinstance(sessions, str):
+            sessions = sessions.split(',')
+
+        pairs = []
+        invalid = []
+
+        for session in sessions:
+            # Device names contain no colons, IPv6 neighbor addresses do
+            dev, _, neighbor = str(session).strip().partition(':')
+            try:
+                address = ip_address(neighbor)
+            except ValueError:
+                address = None
+
+            if dev and address:
+                pairs.append((dev.upper(), str(address)))
+            else:
+                invalid.append(session)
+
+        if invalid:
+            return None, {
+                'result': False,
+                'comment': f'{invalid}: sessions must be given as device:neighbor',
+            }
+
+        return pairs, None
+
+    generated, error = _generate()
+    if generated is None:
+        return None, error
+
+    return [
+        (dev, neighbor)
+        for (dev, neighbor), session in sorted(generated.items())
+        if (not device or dev == device.upper())
+        and (not asn or session.get('remote_asn') == int(asn))
+    ], None
+
+
+def _set_status_many(
+    status: str,
+    sessions: Optional[Union[str, list]],
+    device: Optional[str],
+    asn: Optional[int],
+    test: bool,
+) -> dict:
+    """
+    Set the status of the selected sessions one at a time. NetDB Util
+    synchronizes netdb after every update, so updates are not sent
+    concurrently.
+    """
+    if not (sessions or device or asn):
+        return {'result': False, 'comment': 'sessions, device or asn required'}
+
+    selected, error = _select(sessions, device, asn)
+    if selected is None:
+        return error
+
+    if not selected or test:
+        return {
+            'result': True,
+            'out': {'sessions': _by_device(set(selected))},
+            'comment': f'{len(selected)} sessions selected'
+            + (' (test)' if test else ''),
+        }
+
+    start = time.perf_counter()
+    api = get_util_api(__opts__, __salt__)
+
+    updated: Set[Tuple[str, str]] = set()
+    failed: Dict[str, str] = {}
+
+    for dev, neighbor in selected:
+        try:
+            ret = api.put(
+                _ENDPOINT.format('sessions/status'),
+                params={'device': dev, 'ip': neighbor, 'status': status},
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            log.exception('pm: setting %s:%s to %s failed', dev, neighbor, status)
+            failed[f'{dev}:{neighbor}'] = f'{type(e).__name__}: {e}'
+            continue
+
+        if ret['result']:
+            updated.add((dev, neighbor))
+        else:
+            failed[f'{dev}:{neighbor}'] = ret.get('comment')
+
+    return {
+        'result': not failed,
+        'out': {'updated': _by_device(updated), 'failed': failed},
+        'comment': (
+            f'{len(updated)}/{len(selected)} sessions set to {status} in '
+            f'{time.perf_counter() - start:.1f}s'
+        ),
+    }
+
+
+def set_maintenance_many(
+    sessions: Optional[Union[str, list]] = None,
+    device: Optional[str] = None,
+    asn: Optional[int] = None,
+    test: bool = True,
+) -> dict:
+    """
+    Set several Peering Manager sessions to maintenance and synchronize
+    netdb. Sessions are either listed or selected by device and / or remote
+    ASN, and are updated one at a time as by set_maintenance.
+
+    :param sessions: comma separated list of device:neighbor sessions
+    :param device: select all sessions of this device
+    :param asn: select all sessions with this remote ASN
+    :param test: only show the selected sessions (default); set to false to
+        make the changes
+    :return: a dictionary consisting of the following keys:
+
+       * result: (bool) True if successful; false otherwise
+       * out: updated and failed sessions
+       * comment: summary of the updates
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt-run pm.set_maintenance_many device=sin2
+        salt-run pm.set_maintenance_many device=sin2 test=false
+        salt-run pm.set_maintenance_many asn=13335 test=false
+        salt-run pm.set_maintenance_many sessions=sin2:169.254.169.254,sin3:2001:db8::1 test=false
+
+    """
+    return _set_status_many('maintenance', sessions, device, asn, test)
+
+
+def set_enabled_many(
+    sessions: Optional[Union[str, list]] = None,
+    device: Optional[str] = None,
+    asn: Optional[int] = None,
+    test: bool = True,
+) -> dict:
+    """
+    Set several Peering Manager sessions to enabled and synchronize netdb.
+    Sessions are either listed or selected by device and / or remote ASN,
+    and are updated one at a time as by set_enabled.
+
+    :param sessions: comma separated list of device:neighbor sessions
+    :param device: select all sessions of this device
+    :param asn: select all sessions with this remote ASN
+    :param test: only show the selected sessions (default); set to false to
+        make the changes
+    :return: a dictionary consisting of the following keys:
+
+       * result: (bool) True if successful; false otherwise
+       * out: updated and failed sessions
+       * comment: summary of the updates
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt-run pm.set_enabled_many device=sin2
+        salt-run pm.set_enabled_many device=sin2 test=false
+        salt-run pm.set_enabled_many sessions=sin2:169.254.169.254 test=false
+
+    """
+    return _set_status_many('enabled', sessions, device, asn, test)
+
+
 def create_policy(
     name: str,
     policy_type: str,
@@ -177,9 +461,7 @@ def create_policy(
         'comment': comment,
     }
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
-        _ENDPOINT.format('policy'), data=data
-    )
+    return get_util_api(__opts__, __salt__).post(_ENDPOINT.format('policy'), data=data)
 
 
 def delete_policy(name: str) -> dict:
@@ -203,7 +485,7 @@ def delete_policy(name: str) -> dict:
         'name': name,
     }
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).delete(
+    return get_util_api(__opts__, __salt__).delete(
         _ENDPOINT.format('policy'), params=params
     )
 
@@ -244,9 +526,7 @@ def create_asn(
         'ipv6_prefix_limit': ipv6_prefix_limit,
     }
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
-        _ENDPOINT.format('asn'), data=data
-    )
+    return get_util_api(__opts__, __salt__).post(_ENDPOINT.format('asn'), data=data)
 
 
 def peeringdb_sync_asn(asn: int) -> dict:
@@ -266,9 +546,7 @@ def peeringdb_sync_asn(asn: int) -> dict:
         salt-run pm.peeringdb_sync_asn 13335
 
     """
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
-        _ENDPOINT.format(f'asn/{asn}/sync')
-    )
+    return get_util_api(__opts__, __salt__).post(_ENDPOINT.format(f'asn/{asn}/sync'))
 
 
 def add_direct_session(
@@ -325,7 +603,7 @@ def add_direct_session(
         'local_asn': local_asn,
     }
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(
+    return get_util_api(__opts__, __salt__).post(
         _ENDPOINT.format('sessions/direct'), data=data
     )
 
@@ -377,7 +655,7 @@ def update_direct_session(
         'status': status,
     }
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).put(
+    return get_util_api(__opts__, __salt__).put(
         _ENDPOINT.format('sessions/direct'), data=data
     )
 
@@ -406,6 +684,375 @@ def delete_direct_session(device: str, neighbor: str) -> dict:
         'ip': neighbor,
     }
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).delete(
+    return get_util_api(__opts__, __salt__).delete(
         _ENDPOINT.format('sessions/direct'), params=params
     )
+
+
+def _read_sessions(path: str) -> List[dict]:
+    """
+    Return the rows of a YAML file holding a list of sessions, or of a CSV
+    file with a header row.
+    """
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.endswith('.csv'):
+            return list(csv.DictReader(f))
+
+        rows = yaml.safe_load(f) or []
+
+    if not isinstance(rows, list):
+        raise ValueError(f'{path}: expected a list of sessions')
+
+    return rows
+
+
+def _neighbor(
+    peer_ip: str,
+    remote_asn: Optional[int],
+    source: Optional[str],
+    multihop: Optional[int],
+    import_policy: Optional[str],
+    export_policy: Optional[str],
+) -> dict:
+    """
+    Return the netdb bgp column neighbor fields set by a session, validated
+    against BGPNeighbor.
+    """
+    neighbor: dict = {
+        'remote_asn': remote_asn,
+        'source': source,
+        'multihop': multihop,
+    }
+
+    if import_policy or export_policy:
+        family = f'ipv{ip_address(peer_ip).version}'
+        neighbor['family'] = {
+            family: {'route_map': {'import': import_policy, 'export': export_policy}}
+        }
+
+    return BGPNeighbor.model_validate(neighbor).model_dump(
+        mode='json', by_alias=True, exclude_none=True
+    )
+
+
+def _validate_row(row: dict) -> dict:
+    """
+    Return a normalized session row. Raises ValueError for invalid rows.
+    """
+    if not isinstance(row, dict):
+        raise ValueError('expected a mapping')
+
+    if unknown := [key for key in row if key not in SESSION_FIELDS]:
+        raise ValueError(f'unknown fields {unknown}')
+
+    session = {
+        key: None if row.get(key) in (None, '') else row[key] for key in SESSION_FIELDS
+    }
+
+    for key in _INT_FIELDS:
+        if session[key] is not None:
+            session[key] = int(session[key])
+
+    if not session['device'] or not session['peer_ip']:
+        raise ValueError('device and peer_ip required')
+
+    session['device'] = str(session['device']).upper()
+    session['peer_ip'] = str(ip_address(session['peer_ip']))
+
+    # Raises pydantic's ValidationError, a ValueError, on constraint violations
+    session['neighbor'] = _neighbor(
+        session['peer_ip'],
+        session['asn'],
+        session['local_ip'],
+        session['ttl'],
+        session['import_policy'],
+        session['export_policy'],
+    )
+
+    return session
+
+
+def _validation_error(e: ValidationError) -> str:
+    return '; '.join(
+        f'{".".join(str(loc) for loc in err["loc"])}: {err["msg"]}'
+        for err in e.errors()
+    )
+
+
+def _meta_value(meta: dict, key: str):
+    """
+    Return the value of key in the meta of a generated session or in one of
+    its sections (e.g. per source), or None.
+    """
+    if key in meta:
+        return meta[key]
+
+    for section in meta.values():
+        if isinstance(section, dict) and key in section:
+            return section[key]
+
+    return None
+
+
+def _current_session(peer_ip: str, session: dict) -> dict:
+    """
+    Return the session file columns of a generated session: those configuring
+    the neighbor along with the neighbor validated against BGPNeighbor, and
+    those found in the session meta. Raises pydantic's ValidationError for
+    sessions which are not valid neighbors.
+    """
+    family = (session.get('family') or {}).get(f'ipv{ip_address(peer_ip).version}')
+    route_map = (family or {}).get('route_map') or {}
+
+    current = {
+        'asn': session.get('remote_asn'),
+        'local_ip': session.get('source'),
+        'ttl': session.get('multihop'),
+        'import_policy': route_map.get('import'),
+        'export_policy': route_map.get('export'),
+    }
+    current['neighbor'] = _neighbor(
+        peer_ip,
+        current['asn'],
+        current['local_ip'],
+        current['ttl'],
+        current['import_policy'],
+        current['export_policy'],
+    )
+
+    meta = session.get('meta') or {}
+    for field in _META_FIELDS:
+        if (value := _meta_value(meta, _DATA_KEYS[field])) is not None:
+            current[field] = value
+
+    return current
+
+
+def _conflicts(session: dict, current: dict) -> List[str]:
+    """
+    Return the columns of a session row which differ from the current session
+    but cannot be changed by an update. Columns whose current value is
+    unknown are not compared.
+    """
+    return [
+        field
+        for field in _IMMUTABLE
+        if session[field] is not None
+        and current.get(field) is not None
+        and str(current[field]) != str(session[field])
+    ]
+
+
+def _differs(session: dict, current: dict) -> bool:
+    """
+    Return True if updating a session from its row would change it. Columns
+    left empty in the row only differ if they are set and can be cleared;
+    columns whose current value is unknown differ if the row sets them.
+    """
+
+    def _updatable(neighbor: dict) -> dict:
+        return {key: value for key, value in neighbor.items() if key != 'remote_asn'}
+
+    if _updatable(session['neighbor']) != _updatable(current['neighbor']):
+        return True
+
+    for field in _META_FIELDS:
+        if field in _IMMUTABLE:
+            continue
+        if session[field] is None:
+            if field in _CLEARABLE and current.get(field) not in (None, ''):
+                return True
+        elif str(current.get(field)) != str(session[field]):
+            return True
+
+    return False
+
+
+def _session_data(session: dict, current: Optional[dict] = None) -> dict:
+    """
+    Return the NetDB Util data adding a session, or updating the current
+    session. Updates only send the fields update_direct_session does. NetDB
+    Util leaves fields sent as None unchanged, so an update sends '0' for the
+    columns left empty in the row which are currently set.
+    """
+    if current is None:
+        data = {key: session[field] for field, key in _DATA_KEYS.items()}
+        data['type'] = data['type'] or 'transit-session'
+        data['local_asn'] = data['local_asn'] or 36198
+        return data
+
+    data = {_DATA_KEYS[field]: session[field] for field in _UPDATE_FIELDS}
+
+    for field in _CLEARABLE:
+        if session[field] is None and current.get(field) not in (None, ''):
+            data[_DATA_KEYS[field]] = '0'
+
+    return data
+
+
+def apply_sessions(path: str, delete: bool = False, test: bool = True) -> dict:
+    """
+    Provision the direct (i.e. non-IXP) eBGP sessions listed in a YAML or CSV
+    file in peering manager and synchronize netdb. All rows are validated
+    against the netdb BGP neighbor model before anything is changed.
+    Sessions not in peering manager are added and sessions which differ from
+    their row are updated, one at a time as by add_direct_session and
+    update_direct_session. Empty columns of an updated session's row clear
+    the current value. The comment and status are compared when peering
+    manager reports them in the session meta; otherwise a row setting them
+    always updates the session. Rows whose asn, session_type or local_asn
+    differ from an existing session are rejected, since updates cannot
+    change them.
+
+    The file holds one session per row (CSV, with a header row) or list item
+    (YAML) with the arguments of add_direct_session as keys: device, peer_ip,
+    asn, import_policy, export_policy, local_ip, session_type, comment, ttl,
+    status and local_asn.
+
+    :param path: path of the session file on the master
+    :param delete: also delete the direct sessions of the devices in the file
+        which are not listed
+    :param test: only show the changes which would be made (default); set to
+        false to make the changes
+    :return: a dictionary consisting of the following keys:
+
+       * result: (bool) True if successful; false otherwise
+       * out: added, updated and deleted sessions by device and failed
+         changes, or the invalid rows and sessions
+       * comment: summary of the changes
+
+    CLI Example::
+
+    .. code-block:: bash
+
+        salt-run pm.apply_sessions /var/scratch/ixp_peers.yaml
+        salt-run pm.apply_sessions /var/scratch/ixp_peers.csv test=false
+        salt-run pm.apply_sessions /var/scratch/sin2_sessions.yaml test=false delete=true
+
+    """
+    try:
+        rows = _read_sessions(path)
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        return {'result': False, 'comment': f'{path}: {e}'}
+
+    sessions: Dict[Tuple[str, str], dict] = {}
+    errors: Dict[str, str] = {}
+
+    for number, row in enumerate(rows, start=1):
+        try:
+            session = _validate_row(row)
+        except ValidationError as e:
+            errors[f'row {number}'] = _validation_error(e)
+            continue
+        except (TypeError, ValueError) as e:
+            errors[f'row {number}'] = str(e)
+            continue
+
+        if (key := (session['device'], session['peer_ip'])) in sessions:
+            errors[f'row {number}'] = f'duplicate session {key[0]}:{key[1]}'
+        sessions[key] = session
+
+    if errors:
+        return {
+            'result': False,
+            'out': {'errors': errors},
+            'comment': f'{len(errors)} of {len(rows)} rows invalid; nothing applied',
+        }
+
+    ret = get_util_api(__opts__, __salt__).get(_ENDPOINT.format('sessions/direct'))
+    if not ret['result']:
+        return ret
+
+    current = {
+        (device, neighbor): session
+        for device, data in (ret.get('out') or {}).items()
+        for neighbor, session in ((data or {}).get('neighbors') or {}).items()
+    }
+
+    existing: Dict[Tuple[str, str], dict] = {}
+    for key in sessions:
+        if key not in current:
+            continue
+        try:
+            existing[key] = _current_session(key[1], current[key])
+        except ValidationError as e:
+            errors[f'{key[0]}:{key[1]}'] = _validation_error(e)
+            continue
+
+        if conflicts := _conflicts(sessions[key], existing[key]):
+            errors[f'{key[0]}:{key[1]}'] = f'{conflicts} cannot be changed by an update'
+
+    if errors:
+        return {
+            'result': False,
+            'out': {'errors': errors},
+            'comment': f'{len(errors)} sessions invalid or not updatable; nothing applied',
+        }
+
+    added = {key for key in sessions if key not in current}
+    updated = {key for key in existing if _differs(sessions[key], existing[key])}
+    devices = {device for device, _ in sessions}
+    deleted = (
+        {key for key in current if key[0] in devices and key not in sessions}
+        if delete
+        else set()
+    )
+
+    out: dict = {
+        'added': _by_device(added),
+        'updated': _by_device(updated),
+        'deleted': _by_device(deleted),
+        'unchanged': len(sessions) - len(added) - len(updated),
+    }
+    summary = f'{len(added)} added, {len(updated)} updated, {len(deleted)} deleted'
+
+    if test or not (added or updated or deleted):
+        return {
+            'result': True,
+            'out': out,
+            'comment': summary + (' (test)' if test else ''),
+        }
+
+    start = time.perf_counter()
+    endpoint = _ENDPOINT.format('sessions/direct')
+    api = get_util_api(__opts__, __salt__)
+
+    # NetDB Util synchronizes netdb after every change, so changes are made
+    # one at a time
+    changes = (
+        [
+            (key, api.post, {'data': _session_data(sessions[key])})
+            for key in sorted(added)
+        ]
+        + [
+            (key, api.put, {'data': _session_data(sessions[key], existing[key])})
+            for key in sorted(updated)
+        ]
+        + [
+            (key, api.delete, {'params': {'device': key[0], 'ip': key[1]}})
+            for key in sorted(deleted)
+        ]
+    )
+
+    failed: Dict[str, str] = {}
+    for (device, neighbor), request, kwargs in changes:
+        try:
+            ret = request(endpoint, **kwargs)
+        except Exception as e:  # pylint: disable=broad-except
+            log.exception('pm: applying %s:%s failed', device, neighbor)
+            failed[f'{device}:{neighbor}'] = f'{type(e).__name__}: {e}'
+            continue
+
+        if not ret['result']:
+            failed[f'{device}:{neighbor}'] = ret.get('comment')
+
+    out['failed'] = failed
+
+    return {
+        'result': not failed,
+        'out': out,
+        'comment': (
+            f'{summary} in {time.perf_counter() - start:.1f}s'
+            + (f'; {len(failed)} failed' if failed else '')
+        ),
+    }
@@ -1,7 +1,7 @@
 from typing import Union
 import logging
 
-from netdb_util_api import NetdbUtilAPI
+from netdb_runner import get_util_api
 
 __virtualname__ = "repo_yaml"
 
@@ -32,7 +32,7 @@ def generate_column(column: str) -> dict:
         salt-run repo_yaml.generate_column bgp
 
     """
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).get(_ENDPOINT.format(column))
+    return get_util_api(__opts__, __salt__).get(_ENDPOINT.format(column))
 
 
 def reload_column(column: str, verbose: bool = False) -> Union[dict, bool]:
@@ -54,6 +54,6 @@ def reload_column(column: str, verbose: bool = False) -> Union[dict, bool]:
         salt-run repo_yaml.reload_column bgp
 
     """
-    ret = NetdbUtilAPI(__salt__['pillar.show_pillar']()).post(_ENDPOINT.format(column))
+    ret = get_util_api(__opts__, __salt__).post(_ENDPOINT.format(column))
 
     return True if ret['result'] and not ret['error'] and not verbose else ret
@@ -1,6 +1,6 @@
 import logging
 
-from netdb_util_api import NetdbUtilAPI
+from netdb_runner import get_util_api
 
 __virtualname__ = "ripestat"
 
@@ -32,6 +32,6 @@ def get_paths(prefix: str) -> dict:
     """
     params = {'prefix': prefix}
 
-    return NetdbUtilAPI(__salt__['pillar.show_pillar']()).get(
+    return get_util_api(__opts__, __salt__).get(
         _ENDPOINT.format('paths'), params=params
     )
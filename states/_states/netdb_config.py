@@ -0,0 +1,337 @@
+from typing import Optional
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+
+from vyos_diff import diff as vyos_diff
+import vyos_render
+
+__virtualname__ = "netdb_config"
+
+logger = logging.getLogger(__file__)
+
+# Location of applied configuration fingerprints relative to the minion cachedir
+APPLIED_SUBDIR = os.path.join('netdb', 'applied')
+
+# Seconds after which a configuration is pushed again even if unchanged, so
+# that changes made on the device outside of salt are eventually reverted
+DEFAULT_MAX_AGE = 86400
+
+_SAFE_NAME = re.compile(r'[^\w-]')
+
+# netconfig.managed arguments leaving the applied configuration uncommitted or
+# subject to a later rollback
+_PENDING_ARGS = ('commit_in', 'commit_at', 'revert_in', 'revert_at')
+
+# netconfig.managed arguments passed on to net.load_config for incremental
+# applies
+_LOAD_ARGS = ('commit', 'debug', 'saltenv') + _PENDING_ARGS
+
+# Grains the templates and vyos_render branch on, e.g. VyOS 1.3 and 1.4 syntax
+# by version
+_RENDER_GRAINS = ('id', 'os', 'version', 'local_asn')
+
+
+def __virtual__():
+    return __virtualname__
+
+
+def _template_hash(template_name: str, saltenv: str) -> Optional[str]:
+    """
+    Return the hash of the template file, or None if it cannot be hashed.
+    """
+    if not (ret := __salt__['cp.hash_file'](template_name, saltenv=saltenv)):
+        return None
+
+    return f'{ret["hash_type"]}:{ret["hsum"]}'
+
+
+def _fingerprint(
+    name: str, template_hash: str, template_vars: dict, grains: dict
+) -> str:
+    """
+    Return a sha256 over the template hash and the canonical JSON form of the
+    template variables and the grains the rendering depends on.
+    """
+    canonical = json.dumps(
+        {
+            'name': name,
+            'template': template_hash,
+            'vars': template_vars,
+            'grains': grains,
+        },
+        sort_keys=True,
+        separators=(',', ':'),
+        default=str,
+    )
+
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _render(template_name: str, template_vars: dict, saltenv: str) -> str:
+    """
+    Render the template with the same context netconfig.managed uses.
+    """
+    contents = __salt__['cp.get_file_str'](template_name, saltenv=saltenv)
+
+    return __salt__['file.apply_template_on_contents'](
+        contents,
+        template='jinja',
+        context=template_vars,
+        defaults=None,
+        saltenv=saltenv,
+    )
+
+
+def _native(renderer: str, section: Optional[str]) -> bool:
+    """
+    Return True if the section is rendered by vyos_render instead of its
+    template.
+    """
+    return (
+        renderer == 'python'
+        and section in vyos_render.RENDERERS
+        and __grains__.get('os') == 'vyos'
+    )
+
+
+def _apply_commands(
+    name: str, commands: list, template_vars: dict, label: str = 'incremental'
+) -> dict:
+    """
+    Load and commit VyOS commands with net.load_config.
+    """
+    if not commands:
+        return {
+            'name': name,
+            'changes': {},
+            'result': True,
+            'comment': 'Rendered configuration unchanged since last apply; skipped',
+        }
+
+    out = __salt__['net.load_config'](
+        text='\n'.join(commands),
+        test=__opts__.get('test', False),
+        **{arg: template_vars[arg] for arg in _LOAD_ARGS if arg in template_vars},
+    )
+
+    ret = {
+        'name': name,
+        'changes': {'diff': out['diff']} if out.get('diff') else {},
+        'result': out.get('result', False),
+        'comment': f'{out.get("comment", "")} ({len(commands)} {label} commands)',
+    }
+
+    if __opts__.get('test') and ret['changes'] and ret['result']:
+        ret['result'] = None
+
+    return ret
+
+
+def _applied_file(name: str) -> str:
+    return os.path.join(
+        __opts__['cachedir'],
+        APPLIED_SUBDIR,
+        _SAFE_NAME.sub('_', f'{__opts__["id"]}.{name}') + '.json',
+    )
+
+
+def _load_applied(name: str) -> dict:
+    try:
+        with open(_applied_file(name), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _store_applied(name: str, fingerprint: str, **extra):
+    path = _applied_file(name)
+    directory = os.path.dirname(path)
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': fingerprint, 'applied': time.time(), **extra}, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning('netdb_config: unable to record apply of %s: %s', name, e)
+
+
+def forget(name: str) -> dict:
+    """
+    Drop the recorded fingerprint of a configuration so that the next
+    netdb_config.managed run pushes it to the device.
+
+    name
+        Name of the netdb_config.managed state
+    """
+    ret = {'name': name, 'changes': {}, 'result': True, 'comment': ''}
+
+    try:
+        os.unlink(_applied_file(name))
+        ret['comment'] = f'{name}: applied fingerprint removed'
+    except FileNotFoundError:
+        ret['comment'] = f'{name}: no applied fingerprint recorded'
+
+    return ret
+
+
+def managed(
+    name: str,
+    template_name: str,
+    force: bool = False,
+    max_age: int = DEFAULT_MAX_AGE,
+    incremental: Optional[bool] = None,
+    section: Optional[str] = None,
+    renderer: Optional[str] = None,
+    **template_vars,
+) -> dict:
+    """
+    Manage device configuration with netconfig.managed, skipping the apply
+    when neither the template nor the template variables (i.e. the NetDB
+    column data) have changed since the last successful apply to the device.
+
+    A sha256 fingerprint of the template and the canonical JSON form of the
+    template variables and of the grains rendering depends on (id, os,
+    version and local_asn) is recorded in the minion cachedir after every
+    successful apply, so that e.g. a VyOS upgrade changing the command syntax
+    forces a full apply.
+
+    name
+        State name
+
+    template_name
+        The template to render, passed to netconfig.managed
+
+    force
+        Apply the configuration even if it is unchanged
+
+    max_age
+        Apply unchanged configuration anyway once the last apply is older than
+        this many seconds, reverting any changes made on the device outside of
+        salt. Defaults to one day.
+
+    incremental
+        Instead of loading the whole rendered template, which typically deletes
+        and recreates its configuration section, load only the set and delete
+        commands turning the last applied rendering into the new one (see
+        vyos_diff). The full template is still applied when there is no
+        recorded rendering, the template or the grains it depends on changed,
+        max_age has passed or force is set. Defaults to the netdb:incremental
+        pillar setting.
+
+    section
+        The configuration section the template renders, e.g. 'bgp'. Sections
+        with a Python renderer in vyos_render may be rendered by it instead of
+        the template.
+
+    renderer
+        'python' renders VyOS sections that have a Python renderer with
+        vyos_render and loads the result with net.load_config; 'jinja' always
+        uses the template. Both produce the same commands. Defaults to the
+        netdb:renderer pillar setting, or 'jinja'.
+
+    All other arguments are passed to netconfig.managed.
+
+    Example:
+
+    .. code-block:: yaml
+
+        BGP_Configuration:
+          netdb_config.managed:
+            - template_name: salt://bgp/templates/vyos.jinja
+              section: bgp
+              data: {{ salt.column.pull('bgp') }}
+
+    """
+    settings = __pillar__.get('netdb', {})
+
+    if incremental is None:
+        incremental = settings.get('incremental', False)
+
+    if renderer is None:
+        renderer = settings.get('renderer', 'jinja')
+
+    saltenv = template_vars.get('saltenv', 'base')
+    native = _native(renderer, section)
+
+    def render() -> str:
+        if native:
+            return vyos_render.render(section, __grains__['version'], **template_vars)
+        return _render(template_name, template_vars, saltenv)
+
+    if native:
+        template_hash = vyos_render.renderer_hash()
+    else:
+        template_hash = _template_hash(template_name, saltenv)
+    render_grains = {grain: __grains__.get(grain) for grain in _RENDER_GRAINS}
+    fingerprint = template_hash and _fingerprint(
+        name, template_hash, template_vars, render_grains
+    )
+
+    applied = _load_applied(name)
+    current = time.time() - applied.get('applied', 0) < max_age
+
+    if (
+        not force
+        and fingerprint
+        and applied.get('fingerprint') == fingerprint
+        and current
+    ):
+        return {
+            'name': name,
+            'changes': {},
+            'result': True,
+            'comment': 'Configuration unchanged since last apply; skipped',
+        }
+
+    rendered = None
+
+    if (
+        incremental
+        and not force
+        and current
+        and applied.get('rendered') is not None
+        and applied.get('template') == template_hash
+        and applied.get('grains') == render_grains
+    ):
+        rendered = render()
+        ret = _apply_commands(
+            name, vyos_diff(applied['rendered'], rendered), template_vars
+        )
+        # Keep the time of the last full apply so that max_age still forces one
+        extra = {'applied': applied['applied']}
+    elif native:
+        rendered = render()
+        commands = [line for line in rendered.splitlines() if line.strip()]
+        ret = _apply_commands(name, commands, template_vars, label='rendered')
+        extra = {}
+    else:
+        ret = __states__['netconfig.managed'](
+            name, template_name=template_name, **template_vars
+        )
+        if incremental:
+            rendered = render()
+        extra = {}
+
+    # Only record applies that were committed for good
+    pending = not template_vars.get('commit', True) or any(
+        template_vars.get(arg) for arg in _PENDING_ARGS
+    )
+
+    if ret.get('result') and fingerprint and not __opts__.get('test') and not pending:
+        _store_applied(
+            name,
+            fingerprint,
+            template=template_hash,
+            grains=render_grains,
+            rendered=rendered,
+            **extra,
+        )
+
+    return ret
@@ -0,0 +1,257 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from ipaddress import (
+    IPv4Address,
+    IPv6Address,
+    ip_interface,
+    ip_network,
+    summarize_address_range,
+)
+import bisect
+
+__virtual_name__ = 'ip_index'
+
+Network = Union[str, Any]
+
+_ADDRESS_TYPES = {4: IPv4Address, 6: IPv6Address}
+
+# Keys holding the address of an ipam report entry
+_ADDRESS_KEYS = ('address', 'prefix', 'ip')
+
+# Maximum length of the ipam report entries listed in PrefixIndex.errors
+_ERROR_LENGTH = 120
+
+
+def __virtual__():
+    return __virtual_name__
+
+
+class IntervalSet:
+    """
+    Sorted, disjoint and merged integer intervals [start, end] kept in two
+    parallel lists, so that the intervals overlapping a range are found with
+    two bisections.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+
+        for start, end in sorted(intervals):
+            if self.ends and start <= self.ends[-1] + 1:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _overlapping(self, lo: int, hi: int) -> range:
+        # Intervals ending at or after lo and starting at or before hi
+        return range(
+            bisect.bisect_left(self.ends, lo), bisect.bisect_right(self.starts, hi)
+        )
+
+    def used(self, lo: int, hi: int) -> int:
+        """
+        Return the number of integers of [lo, hi] covered by the set.
+        """
+        return sum(
+            min(self.ends[i], hi) - max(self.starts[i], lo) + 1
+            for i in self._overlapping(lo, hi)
+        )
+
+    def free(self, lo: int, hi: int) -> Iterator[Tuple[int, int]]:
+        """
+        Yield the intervals of [lo, hi] not covered by the set, in order.
+        """
+        position = lo
+
+        for i in self._overlapping(lo, hi):
+            if self.starts[i] > position:
+                yield position, self.starts[i] - 1
+            position = self.ends[i] + 1
+
+        if position <= hi:
+            yield position, hi
+
+
+def _network(value: Any):
+    """
+    Return the network of an address or prefix, or None if value is neither.
+    """
+    if value is None or isinstance(value, (dict, list)):
+        return None
+
+    try:
+        return ip_interface(str(value)).network
+    except ValueError:
+        return None
+
+
+def _report_networks(key: Any, value: Any, nested: bool = True) -> List[Any]:
+    """
+    Return the networks of an ipam report entry: its key for entries keyed by
+    address, its value if an address, the address of a value dict, or with
+    nested, the networks of the entries of a value grouping several (e.g. the
+    addresses of a device).
+    """
+    if net := _network(key):
+        return [net]
+
+    if net := _network(value):
+        return [net]
+
+    if isinstance(value, dict):
+        for address_key in _ADDRESS_KEYS:
+            if net := _network(value.get(address_key)):
+                return [net]
+
+    if nested and isinstance(value, (dict, list)):
+        entries = value.items() if isinstance(value, dict) else enumerate(value)
+        return [
+            net
+            for item_key, item in entries
+            for net in _report_networks(item_key, item, nested=False)
+        ]
+
+    return []
+
+
+class PrefixIndex:
+    """
+    In-memory index of used IPv4 and IPv6 space answering free space, first
+    fit and utilization queries without further NetDB Util requests.
+    """
+
+    def __init__(self, networks: Iterable[Network]):
+        """
+        networks: iterable
+            Used networks or interface addresses (e.g. '10.0.0.1/31', whose
+            whole network counts as used) as strings or ipaddress objects.
+            Entries which are neither are skipped and listed in errors.
+
+        """
+        intervals: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+        self.errors: List[str] = []
+
+        for network in networks:
+            if not (net := _network(network)):
+                self.errors.append(str(network))
+                continue
+
+            intervals[net.version].append(
+                (int(net.network_address), int(net.broadcast_address))
+            )
+
+        self.sets = {
+            version: IntervalSet(found) for version, found in intervals.items()
+        }
+
+    @classmethod
+    def from_report(cls, items: Iterable[Tuple[Any, Any]]) -> 'PrefixIndex':
+        """
+        Build an index from ipam report entries: (key, value) pairs as yielded
+        by NetdbUtilAPI.stream for a report keyed by address, a list of
+        addresses or of dicts with an address key, or either grouped by
+        device. Entries without any address are skipped and listed in
+        errors.
+        """
+        errors: List[str] = []
+
+        def _networks() -> Iterator[Any]:
+            for key, value in items:
+                if found := _report_networks(key, value):
+                    yield from found
+                else:
+                    errors.append(f'{key}: {value}'[:_ERROR_LENGTH])
+
+        index = cls(_networks())
+        index.errors += errors
+
+        return index
+
+    def _bounds(self, prefix: Network) -> Tuple[IntervalSet, int, int, int]:
+        net = ip_network(prefix)
+        return (
+            self.sets[net.version],
+            int(net.network_address),
+            int(net.broadcast_address),
+            net.version,
+        )
+
+    def free(self, prefix: Network) -> List[Tuple[Any, Any]]:
+        """
+        Return the free ranges of prefix as (first, last) address pairs.
+        """
+        intervals, lo, hi, version = self._bounds(prefix)
+        address = _ADDRESS_TYPES[version]
+
+        return [(address(start), address(end)) for start, end in intervals.free(lo, hi)]
+
+    def free_prefixes(self, prefix: Network) -> List[Any]:
+        """
+        Return the free space of prefix as the fewest covering networks.
+        """
+        return [
+            network
+            for first, last in self.free(prefix)
+            for network in summarize_address_range(first, last)
+        ]
+
+    def first_fit(self, prefix: Network, length: int, count: int = 1) -> List[Any]:
+        """
+        Return the first count free networks of the given prefix length within
+        prefix, lowest first. Fewer are returned if prefix has no more room.
+        """
+        intervals, lo, hi, version = self._bounds(prefix)
+        bits = 32 if version == 4 else 128
+
+        if not ip_network(prefix).prefixlen <= length <= bits:
+            raise ValueError(f'/{length} does not fit in {prefix}')
+
+        size = 1 << (bits - length)
+        found = []
+
+        for start, end in intervals.free(lo, hi):
+            # First block boundary at or after the start of the free range
+            block = -(-start // size) * size
+
+            while block + size - 1 <= end and len(found) < count:
+                found.append(ip_network((_ADDRESS_TYPES[version](block), length)))
+                block += size
+
+            if len(found) == count:
+                break
+
+        return found
+
+    def utilization(self, prefix: Network) -> dict:
+        """
+        Return the size, used and free address counts of prefix and the used
+        percentage.
+        """
+        intervals, lo, hi, _ = self._bounds(prefix)
+        size = hi - lo + 1
+        used = intervals.used(lo, hi)
+
+        return {
+            'size': size,
+            'used': used,
+            'free': size - used,
+            'percent': round(used / size * 100, 2),
+        }
+
+
+def parse_prefixes(prefixes: Union[str, list]) -> Tuple[list, Optional[str]]:
+    """
+    Return the networks of a comma separated list of prefixes, or an empty
+    list and an error message if one is invalid.
+    """
+    if isinstance(prefixes, str):
+        prefixes = prefixes.split(',')
+
+    try:
+        return [ip_network(prefix.strip()) for prefix in prefixes if prefix], None
+    except ValueError as e:
+        return [], str(e)
@@ -1,31 +1,65 @@
 from typing import Annotated, Union, Literal, Optional
+from functools import lru_cache
+import importlib
+
 from pydantic import BaseModel, Field
 
 from net_types.base import FamilyType
 
-from net_types.columns.device import DeviceContainer
-from net_types.columns.firewall import FirewallContainer
-from net_types.columns.policy import PolicyContainer
-from net_types.columns.interface import InterfaceContainer
-from net_types.columns.bgp import BGPContainer
-from net_types.columns.protocol import ProtocolContainer
-
-COLUMN_FACTORY = {
-    'device': DeviceContainer,
-    'firewall': FirewallContainer,
-    'policy': PolicyContainer,
-    'interface': InterfaceContainer,
-    'bgp': BGPContainer,
-    'protocol': ProtocolContainer,
+# Column types and the module and container class defining each of them. The
+# container models are only imported when first used, see column_class() and
+# the lazily built COLUMN_FACTORY, COLUMN_CLASSES and ColumnObject below.
+COLUMN_MODULES = {
+    'device': ('net_types.columns.device', 'DeviceContainer'),
+    'firewall': ('net_types.columns.firewall', 'FirewallContainer'),
+    'policy': ('net_types.columns.policy', 'PolicyContainer'),
+    'interface': ('net_types.columns.interface', 'InterfaceContainer'),
+    'bgp': ('net_types.columns.bgp', 'BGPContainer'),
+    'protocol': ('net_types.columns.protocol', 'ProtocolContainer'),
 }
 
-COLUMN_TYPES = list(COLUMN_FACTORY.keys())
-
-COLUMN_CLASSES = list(COLUMN_FACTORY.values())
+COLUMN_TYPES = list(COLUMN_MODULES.keys())
 
 ColumnType = Annotated[str, Literal[*COLUMN_TYPES]]
 
-ColumnObject = Annotated[Union[*COLUMN_CLASSES], Field(discriminator='column_type')]  # type: ignore
+
+@lru_cache(maxsize=None)
+def column_class(column_type: str) -> type:
+    """
+    Import and return the container class of a single column type.
+
+    """
+    module, name = COLUMN_MODULES[column_type]
+
+    return getattr(importlib.import_module(module), name)
+
+
+def _column_factory() -> dict:
+    return {column_type: column_class(column_type) for column_type in COLUMN_TYPES}
+
+
+def _column_object():
+    return Annotated[Union[*_column_factory().values()], Field(discriminator='column_type')]  # type: ignore
+
+
+_LAZY = {
+    'COLUMN_FACTORY': _column_factory,
+    'COLUMN_CLASSES': lambda: list(_column_factory().values()),
+    'ColumnObject': _column_object,
+}
+
+
+def __getattr__(name: str):
+    """
+    Build the column model graph on first access rather than at import time.
+
+    """
+    if name not in _LAZY:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    value = globals()[name] = _LAZY[name]()
+
+    return value
 
 
 class Override(BaseModel):
@@ -1,17 +1,11 @@
 from pydantic import BaseModel
 
-from net_types.netdb import ColumnObject
-
 
 class SaltBaseReturn(BaseModel):
     result: bool = False
     comment: str = ''
 
 
-class SaltColumnReturn(SaltBaseReturn):
-    out: ColumnObject
-
-
 class SaltDictReturn(SaltBaseReturn):
     out: dict
 
@@ -22,3 +16,24 @@ def salt_dict_return(**kwargs):
     """
 
     return SaltDictReturn(**kwargs).model_dump()
+
+
+def __getattr__(name: str):
+    """
+    SaltColumnReturn depends on the full column model graph, so it is only
+    defined on first access. Lightweight users of this module such as
+    salt_dict_return do not pay for building the column models.
+
+    """
+    if name != 'SaltColumnReturn':
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    from net_types.netdb import ColumnObject  # pylint: disable=import-outside-toplevel
+
+    class SaltColumnReturn(SaltBaseReturn):
+        out: ColumnObject
+
+    SaltColumnReturn.__qualname__ = name
+    globals()[name] = SaltColumnReturn
+
+    return SaltColumnReturn
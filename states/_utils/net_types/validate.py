@@ -0,0 +1,101 @@
+from typing import Dict, List, Optional, Union
+from functools import lru_cache
+
+from pydantic import BaseModel, TypeAdapter, ValidationError, create_model
+
+from net_types.netdb import COLUMN_TYPES, column_class
+from net_types.salt import SaltBaseReturn
+
+# Number of validation errors included in error summaries
+MAX_REPORTED_ERRORS = 10
+
+
+@lru_cache(maxsize=None)
+def element_adapter(column_type: str) -> TypeAdapter:
+    """
+    Return a cached TypeAdapter validating the column data of a single
+    device, e.g. a BGP model for the 'bgp' column.
+
+    """
+    column = column_class(column_type).model_fields['column'].annotation
+
+    # Container columns are typed Dict[str, <element>]
+    return TypeAdapter(column.__args__[1])  # type: ignore
+
+
+@lru_cache(maxsize=None)
+def response_adapter(column_type: str) -> TypeAdapter:
+    """
+    Return a cached TypeAdapter validating a complete NetDB column response,
+    i.e. {'result': ..., 'comment': ..., 'out': {router: <element>}}.
+
+    """
+    container = column_class(column_type)
+    column = container.model_fields['column'].annotation
+
+    model = create_model(
+        f'{container.__name__}Response',
+        __base__=SaltBaseReturn,
+        out=(Optional[column], None),
+    )
+
+    return TypeAdapter(model)
+
+
+def validate_response(column_type: str, raw: Union[bytes, str]) -> SaltBaseReturn:
+    """
+    Validate a raw NetDB column response directly from its JSON bytes without
+    decoding it into a dict first. Raises pydantic ValidationError.
+
+    column_type: str
+        The column type, one of COLUMN_TYPES
+
+    raw: bytes
+        The JSON response body
+
+    """
+    if column_type not in COLUMN_TYPES:
+        raise ValueError(f'{column_type}: no schema for column')
+
+    return response_adapter(column_type).validate_json(raw)
+
+
+def dump_element(column_type: str, element) -> dict:
+    """
+    Dump validated column data back to a JSON compatible dict containing only
+    the fields that were set in the response.
+
+    """
+    return element_adapter(column_type).dump_python(
+        element, mode='json', by_alias=True, exclude_unset=True
+    )
+
+
+def error_summary(error: ValidationError) -> List[str]:
+    """
+    Return the first MAX_REPORTED_ERRORS errors as 'location: message' strings.
+
+    """
+    return [
+        '.'.join(str(loc) for loc in e['loc']) + ': ' + e['msg']
+        for e in error.errors()[:MAX_REPORTED_ERRORS]
+    ]
+
+
+def element_counts(column_type: str, out: Dict[str, BaseModel]) -> Dict[str, int]:
+    """
+    Return counts of BGP neighbors and prefix list entries in validated column
+    data keyed by router, used to report validation throughput.
+
+    """
+    counts = {'neighbors': 0, 'prefix_list_entries': 0}
+
+    for element in out.values():
+        if column_type == 'bgp':
+            counts['neighbors'] += len(element.neighbors or {})  # type: ignore
+        elif column_type == 'policy' and (lists := element.prefix_lists):  # type: ignore
+            for family in (lists.ipv4, lists.ipv6):
+                for prefix_list in (family or {}).values():
+                    counts['prefix_list_entries'] += len(prefix_list.rules)
+
+    return counts
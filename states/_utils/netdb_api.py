@@ -1,8 +1,17 @@
-from typing import Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import logging
-import requests
+import time
+
+from requests import RequestException, Response
 
 from exceptions.netdb_exceptions import ColumnNotFoundException
+from netdb_pool import POOL_PILLAR, get_session
+from netdb_cache import ColumnCache, get_cache
+from netdb_stream import CHUNK_SIZE, iter_items
+from netdb_compress import log_transfer
+from netdb_endpoints import send_read
+from netdb_metrics import METRICS, METRICS_PILLAR, configure, response_bytes
 
 from salt.exceptions import SaltException
 
@@ -13,11 +22,21 @@ logger = logging.getLogger(__file__)
 NETDB_PILLAR = 'netdb'
 NETDB_LOCAL_PILLAR = 'netdb_local'
 
+# netdb_local 'select' value enabling latency aware endpoint selection
+SELECT_LATENCY = 'latency'
+
 NETDB_HEADERS = {
     "Content-Type": "application/json",
     "Accept": "application/json",
 }
 
+# Maximum number of concurrent requests used when fetching several columns
+# from a server without the batch column endpoint
+COLUMN_WORKERS = 8
+
+# Base URLs found not to serve the batch column endpoint
+_NO_BATCH: set = set()
+
 
 def __virtual__():
     return __virtual_name__
@@ -31,7 +50,19 @@ class NetdbAPI:
     # Base URL of netdb local server
     netdb_local_url: Optional[str] = None
 
-    def __init__(self, pillar: dict):
+    # Optional connection pool settings
+    pool_settings: Optional[dict] = None
+
+    # Optional persistent column cache
+    cache: Optional[ColumnCache] = None
+
+    # Choose between netdb and netdb local by measured latency
+    select_latency: bool = False
+
+    # Hedge slow reads by sending a second request to the other endpoint
+    hedge: bool = False
+
+    def __init__(self, pillar: dict, cachedir: Optional[str] = None):
         """
         NetdbAPI instance is used to interact with the NetDB service.
 
@@ -40,28 +71,142 @@ class NetdbAPI:
             an optional 'netdb_local' key containing the netdb_local
             pillar data.
 
+        cachedir: str
+            Minion cache directory. Columns are cached here when enabled by
+            the netdb:cache pillar.
+
+        By default an enabled netdb local server is used in place of the netdb
+        server. With netdb_local:select set to 'latency' both are used: reads
+        go to the endpoint with the lowest moving average latency among the
+        healthy ones, and netdb_local:hedge additionally sends a second read
+        to the other endpoint when the first exceeds its p95 latency.
+
         """
         netdb = pillar[NETDB_PILLAR]
         netdb_local = pillar.get(NETDB_LOCAL_PILLAR)
 
         self.netdb_url = netdb['url']
+        self.pool_settings = netdb.get(POOL_PILLAR)
+        self.cache = get_cache(cachedir, netdb)
+
+        configure(netdb.get(METRICS_PILLAR), netdb.get('id'))
 
         if netdb_local and netdb_local.get('enabled'):
-            self.netdb_url = netdb_local['url']
+            self.netdb_local_url = netdb_local['url']
+            self.select_latency = netdb_local.get('select') == SELECT_LATENCY
+            self.hedge = self.select_latency and bool(netdb_local.get('hedge'))
+
+    def _base_urls(self) -> List[str]:
+        """
+        Return the candidate base URLs for reads.
+        """
+        if self.netdb_local_url and self.select_latency:
+            return [self.netdb_local_url, self.netdb_url]
+
+        return [self.netdb_local_url or self.netdb_url]
+
+    def _read(self, path: str, **kwargs) -> Tuple[Response, str]:
+        """
+        Send a GET request for path to the selected endpoint. Returns the
+        response and the full URL requested.
+        """
 
-    def get(self, endpoint: str) -> dict:
+        def _send(base_url: str) -> Response:
+            start = time.perf_counter()
+            try:
+                resp = get_session(base_url, self.pool_settings).get(
+                    url=base_url + path, verify=False, cert=None, **kwargs
+                )
+            except RequestException:
+                if METRICS.enabled:
+                    METRICS.observe(
+                        'netdb', 'GET', path, time.perf_counter() - start, 0, 0
+                    )
+                raise
+
+            if METRICS.enabled:
+                METRICS.observe(
+                    'netdb',
+                    'GET',
+                    path,
+                    time.perf_counter() - start,
+                    resp.status_code,
+                    response_bytes(resp, kwargs.get('stream', False)),
+                )
+
+            return resp
+
+        resp, base_url = send_read(self._base_urls(), _send, self.hedge)
+
+        return resp, base_url + path
+
+    def get(
+        self,
+        endpoint: str,
+        timeout: Optional[float] = None,
+        params: Optional[dict] = None,
+    ) -> dict:
         """
         Make a get request against NetDB service.
 
         endpoint: str
             NetDB endpoint to query, e.g. '/column/bgp'
 
+        timeout: float
+            Optional request timeout in seconds
+
+        params: dict
+            Optional query parameters
+
+        """
+        return self.get_conditional(endpoint, None, timeout, params)[0]  # type: ignore
+
+    def get_conditional(
+        self,
+        endpoint: str,
+        validators: Optional[dict],
+        timeout: Optional[float] = None,
+        params: Optional[dict] = None,
+    ) -> Tuple[Optional[dict], dict]:
         """
-        url = (self.netdb_local_url or self.netdb_url) + endpoint
+        Make a conditional get request against NetDB service.
 
-        resp = requests.get(url=url, headers=NETDB_HEADERS, verify=False, cert=None)
+        endpoint: str
+            NetDB endpoint to query, e.g. '/column/bgp'
 
-        if (code := resp.status_code) not in [200, 404, 422]:
+        validators: dict
+            'etag' and / or 'last_modified' values returned with an earlier
+            response for the same endpoint.
+
+        timeout: float
+            Optional request timeout in seconds
+
+        params: dict
+            Optional query parameters
+
+        Returns a tuple of the response dict and the validators of the new
+        response. The response dict is None if NetDB answered 304 Not Modified,
+        in which case the passed validators are returned.
+
+        """
+        headers = NETDB_HEADERS
+        if validators:
+            headers = dict(NETDB_HEADERS)
+            if etag := validators.get('etag'):
+                headers['If-None-Match'] = etag
+            if last_modified := validators.get('last_modified'):
+                headers['If-Modified-Since'] = last_modified
+
+        resp, url = self._read(
+            endpoint, headers=headers, timeout=timeout, params=params
+        )
+
+        log_transfer(resp, url)
+
+        if (code := resp.status_code) == 304 and validators:
+            return None, validators
+
+        if code not in [200, 404, 422]:
             raise SaltException(f'NetDB API error: {url}: {code}: {resp.reason}')
 
         if not (ret_dict := resp.json()):
@@ -72,7 +217,37 @@ class NetdbAPI:
         if not ret_dict.get('result'):
             raise ColumnNotFoundException(ret_dict['comment'])
 
-        return ret_dict
+        new_validators = {
+            key: value
+            for key, value in (
+                ('etag', resp.headers.get('ETag')),
+                ('last_modified', resp.headers.get('Last-Modified')),
+            )
+            if value
+        }
+
+        return ret_dict, new_validators
+
+    def get_raw(self, endpoint: str, timeout: Optional[float] = None) -> bytes:
+        """
+        Make a get request against NetDB service and return the undecoded JSON
+        response body.
+
+        endpoint: str
+            NetDB endpoint to query, e.g. '/column/bgp'
+
+        timeout: float
+            Optional request timeout in seconds
+
+        """
+        resp, url = self._read(endpoint, headers=NETDB_HEADERS, timeout=timeout)
+
+        log_transfer(resp, url)
+
+        if (code := resp.status_code) not in [200, 404, 422]:
+            raise SaltException(f'NetDB API error: {url}: {code}: {resp.reason}')
+
+        return resp.content
 
     def list_columns(self) -> dict:
         """
@@ -80,10 +255,67 @@ class NetdbAPI:
         """
         return self.get('column')
 
+    def stream_column(self, column: str) -> Iterator[Tuple[str, Any]]:
+        """
+        Retrieves a column for all devices and yields (router, data) pairs as
+        they are decoded, without loading the whole response into memory.
+
+        column: str
+            Name of column to retrieve
+
+        """
+        meta: dict = {}
+
+        resp, url = self._read(f'column/{column}', headers=NETDB_HEADERS, stream=True)
+
+        with resp:
+            if (code := resp.status_code) not in [200, 404, 422]:
+                raise SaltException(f'NetDB API error: {url}: {code}: {resp.reason}')
+
+            yield from iter_items(resp.iter_content(CHUNK_SIZE), 'out', meta)
+
+        if meta.get('result') is False:
+            raise ColumnNotFoundException(meta.get('comment'))
+
     def get_column(self, router: str, column: str) -> dict:
         """
         Retrieves a column from netdb for the device. Used by column module
-        'get', 'items' and 'keys' functions.
+        'get', 'items' and 'keys' functions. Served from the column cache
+        when one is configured, in which case cached columns are revalidated
+        with conditional requests.
+
+        router: str
+            Router ID (e.g. __grains__['id'])
+
+        column: str
+            Name of column to retrieve
+
+        """
+        endpoint = f'column/{column}/{router}'
+
+        def _load(
+            timeout: Optional[float], validators: Optional[dict]
+        ) -> Tuple[Optional[dict], dict]:
+            ret, validators = self.get_conditional(endpoint, validators, timeout)
+            return (ret['out'][router] if ret else None), validators
+
+        if self.cache:
+            return self.cache.fetch(router, column, _load)
+
+        return self.get(endpoint)['out'][router]
+
+    def get_projection(
+        self, router: str, column: str, path: List[str], keys_only: bool = False
+    ) -> dict:
+        """
+        Retrieves a device column pruned to the subtree at path. NetDB is asked
+        to project the column server side (column/{column}/{router}?path=a&path=b),
+        so that only the dicts along path and the subtree at its end are
+        transferred; non-dict values met along path are returned as they are.
+        Projected responses are flagged with 'projected'. A server that cannot
+        project returns the whole column, which is equivalent for walking path
+        client side. When a column cache is configured the cached column is
+        used instead.
 
         router: str
             Router ID (e.g. __grains__['id'])
@@ -91,8 +323,184 @@ class NetdbAPI:
         column: str
             Name of column to retrieve
 
+        path: list
+            Keys leading to the requested subtree, e.g. ['neighbors', '10.0.0.1']
+
+        keys_only: bool
+            Ask NetDB to return the keys of the subtree with null values
+
+        """
+        if self.cache:
+            return self.get_column(router, column)
+
+        params: Dict[str, Any] = {'path': path}
+        if keys_only:
+            params['keys_only'] = 'true'
+
+        ret = self.get(f'column/{column}/{router}', params=params)
+
+        if not ret.get('projected'):
+            logger.debug('%s/%s: column returned without projection', router, column)
+
+        return ret['out'][router]
+
+    def get_column_validated(self, router: str, column: str) -> dict:
         """
-        return self.get(f'column/{column}/{router}')['out'][router]
+        Retrieves a column from netdb for the device and validates it against
+        the column's net_types model straight from the response bytes. The
+        persistent column cache is bypassed. Raises SaltException listing the
+        first validation errors if the column does not match its schema.
+
+        router: str
+            Router ID (e.g. __grains__['id'])
+
+        column: str
+            Name of column to retrieve
+
+        """
+        # pylint: disable=import-outside-toplevel
+        from pydantic import ValidationError
+        from net_types.validate import dump_element, error_summary, validate_response
+
+        raw = self.get_raw(f'column/{column}/{router}')
+
+        try:
+            ret = validate_response(column, raw)
+        except ValidationError as e:
+            raise SaltException(
+                f'{column}: {e.error_count()} validation errors: '
+                + '; '.join(error_summary(e))
+            ) from e
+        except ValueError as e:
+            raise SaltException(str(e)) from e
+
+        if not ret.result or ret.out is None:  # type: ignore
+            raise ColumnNotFoundException(ret.comment)
+
+        return dump_element(column, ret.out[router])  # type: ignore
+
+    def _get_batch(self, router: str, columns: List[str]) -> Optional[Dict[str, dict]]:
+        """
+        Fetch several device columns with a single request to the batch column
+        endpoint (columns/{router}?column=a&column=b), which answers with the
+        requested columns keyed by column name in 'out'. Returns None if the
+        server does not serve the endpoint.
+        """
+        if any(base_url in _NO_BATCH for base_url in self._base_urls()):
+            return None
+
+        resp, url = self._read(
+            f'columns/{router}', headers=NETDB_HEADERS, params={'column': columns}
+        )
+
+        log_transfer(resp, url)
+
+        try:
+            ret_dict = resp.json()
+        except ValueError:
+            ret_dict = {}
+
+        if (code := resp.status_code) in [404, 405] and 'result' not in ret_dict:
+            logger.debug('%s: batch column endpoint not served', url)
+            _NO_BATCH.update(self._base_urls())
+            return None
+
+        if code not in [200, 404, 422]:
+            raise SaltException(f'NetDB API error: {url}: {code}: {resp.reason}')
+
+        if not ret_dict.get('result'):
+            return {}
+
+        return ret_dict.get('out') or {}
+
+    def get_columns(self, router: str, columns: List[str]) -> Dict[str, dict]:
+        """
+        Retrieves several columns from netdb for the device. A single batch
+        request is made when the server supports it; otherwise the columns are
+        fetched concurrently. Columns not found are left out of the result.
+
+        router: str
+            Router ID (e.g. __grains__['id'])
+
+        columns: list
+            Names of the columns to retrieve
+
+        """
+        if not columns:
+            return {}
+
+        if not self.cache and len(columns) > 1:
+            if (ret := self._get_batch(router, columns)) is not None:
+                return {column: ret[column] for column in columns if column in ret}
+
+        def _load(column: str) -> Optional[dict]:
+            try:
+                return self.get_column(router, column)
+            except ColumnNotFoundException:
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(len(columns), COLUMN_WORKERS)) as ex:
+            results = ex.map(_load, columns)
+
+        return {
+            column: data for column, data in zip(columns, results) if data is not None
+        }
+
+
+def validate_device(pillar: dict, router: str, column: str) -> dict:
+    """
+    Fetch and validate one device column. Used as a process pool worker by the
+    netdb_validate runner, so it only takes and returns picklable values.
+
+    pillar: dict
+        A dict containing a 'netdb' key with netdb pillar data and
+        an optional 'netdb_local' key containing the netdb_local
+        pillar data.
+
+    router: str
+        Router ID
+
+    column: str
+        Name of column to validate
+
+    Returns a dict with 'valid' (None if the device has no such column),
+    'errors', element 'counts', response 'bytes' and 'seconds' spent validating.
+
+    """
+    # pylint: disable=import-outside-toplevel
+    from pydantic import ValidationError
+    from net_types.validate import element_counts, error_summary, validate_response
+
+    ret: Dict[str, Any] = {'router': router, 'column': column, 'valid': False}
+
+    try:
+        raw = NetdbAPI(pillar).get_raw(f'column/{column}/{router}')
+    except (SaltException, RequestException) as e:
+        return {**ret, 'errors': [str(e)]}
+
+    ret['bytes'] = len(raw)
+    start = time.perf_counter()
+
+    try:
+        resp = validate_response(column, raw)
+    except ValidationError as e:
+        ret['errors'] = error_summary(e)
+        resp = None
+
+    ret['seconds'] = time.perf_counter() - start
+
+    if resp is None:
+        return ret
+
+    if not resp.result or resp.out is None:  # type: ignore
+        return {**ret, 'valid': None, 'errors': [resp.comment]}
+
+    return {
+        **ret,
+        'valid': True,
+        'errors': [],
+        'counts': element_counts(column, resp.out),  # type: ignore
+    }
 
 
 def get_api(pillar: dict) -> NetdbAPI:
@@ -0,0 +1,131 @@
+from typing import Any, Awaitable, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+
+from netdb_util_api import NetdbUtilAPI
+from netdb_pool import POOL, POOL_PILLAR, get_session
+
+__virtual_name__ = 'netdb_async_api'
+
+NETDB_PILLAR = 'netdb'
+
+
+def __virtual__():
+    return __virtual_name__
+
+
+class _AsyncClient:
+    """
+    Runs the blocking calls of a wrapped NetDB client in a worker thread pool
+    whose size bounds the number of requests in flight. All workers send
+    their requests through the process wide session pool, so connections
+    are shared with the synchronous clients.
+    """
+
+    def __init__(self, pillar: dict, concurrency: Optional[int] = None):
+        settings = pillar[NETDB_PILLAR].get(POOL_PILLAR) or {}
+        self.concurrency = int(concurrency or settings.get('size', POOL.pool_size))
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix='netdb_async'
+        )
+
+    async def _call(self, fn: Callable, *args, **kwargs) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    def close(self):
+        """
+        Shut down the worker threads.
+        """
+        self._executor.shutdown(wait=False)
+
+
+class AsyncNetdbUtilAPI(_AsyncClient):
+    """
+    asyncio counterpart of the NetdbUtilAPI get, post, put and delete
+    methods.
+    """
+
+    def __init__(self, pillar: dict, concurrency: Optional[int] = None):
+        """
+        pillar: dict
+            A dict containing a 'netdb' key with netdb pillar data.
+
+        concurrency: int
+            Maximum number of requests in flight, defaulting to the
+            connection pool size. The pool of the NetDB Util session is grown
+            to hold one connection per request in flight.
+
+        """
+        super().__init__(pillar, concurrency)
+        self.api = NetdbUtilAPI(pillar)
+
+        # One pooled connection per worker; with fewer, urllib3 would discard
+        # the connections it cannot return to the pool
+        get_session(self.api.util_url, self.api.pool_settings, self.concurrency)
+
+    async def get(
+        self, endpoint: str, params: Optional[dict] = None, test: bool = True
+    ) -> dict:
+        """
+        Send a GET request to the NetDB Util service
+        """
+        return await self._call(self.api.get, endpoint, params, test)
+
+    async def post(
+        self,
+        endpoint: str,
+        data: Optional[dict] = None,
+        params: Optional[dict] = None,
+        test: bool = True,
+    ) -> dict:
+        """
+        Send a POST request to the NetDB Util service
+        """
+        return await self._call(self.api.post, endpoint, data, params, test)
+
+    async def put(
+        self,
+        endpoint: str,
+        data: Optional[dict] = None,
+        params: Optional[dict] = None,
+        test: bool = True,
+    ) -> dict:
+        """
+        Send a PUT request to the NetDB Util service
+        """
+        return await self._call(self.api.put, endpoint, data, params, test)
+
+    async def delete(
+        self,
+        endpoint: str,
+        data: Optional[dict] = None,
+        params: Optional[dict] = None,
+        test: bool = True,
+    ) -> dict:
+        """
+        Send a DELETE request to the NetDB Util service
+        """
+        return await self._call(self.api.delete, endpoint, data, params, test)
+
+
+def run_sync(*aws: Awaitable, return_exceptions: bool = False) -> list:
+    """
+    Run awaitables concurrently from synchronous code (e.g. a runner function)
+    and return their results in order.
+
+    aws: awaitable
+        Coroutines such as AsyncNetdbUtilAPI.get(...) calls
+
+    return_exceptions: bool
+        Return exceptions in place of results instead of raising the first one
+
+    """
+
+    async def _gather():
+        return await asyncio.gather(*aws, return_exceptions=return_exceptions)
+
+    return asyncio.run(_gather())
@@ -0,0 +1,421 @@
+from typing import Callable, Dict, Optional, Tuple, Union
+from urllib.parse import unquote
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from requests import RequestException
+
+from salt.exceptions import SaltException
+
+from exceptions.netdb_exceptions import ColumnNotFoundException
+from netdb_metrics import METRICS
+
+__virtual_name__ = 'netdb_cache'
+
+logger = logging.getLogger(__file__)
+
+CACHE_PILLAR = 'cache'
+
+# Location of the column cache relative to the minion cachedir
+CACHE_SUBDIR = os.path.join('netdb', 'columns')
+
+# Seconds a cached column is served without contacting NetDB
+DEFAULT_TTL = 300
+
+# Seconds past the TTL a cached column may still be served while it is
+# revalidated in the background
+DEFAULT_MAX_STALE = 3600
+
+# Upper bound on the total size of cached columns
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Connect timeout used when a cached copy is available to fall back on. The
+# response itself is always waited for, so that large columns are refreshed
+# however long they take.
+DEFAULT_TIMEOUT = 5
+
+# Seconds after which temporary files left behind by interrupted writes are
+# removed
+TMP_MAX_AGE = 3600
+
+# Characters escaped in cache file names. '.' separates router and column.
+_UNSAFE_NAME = re.compile(r'[^\w-]')
+
+
+def __virtual__():
+    return __virtual_name__
+
+
+def _quote(name: str) -> str:
+    """
+    Return name with every character other than word characters and '-'
+    percent encoded, so that file names map back to names unambiguously.
+    """
+    return _UNSAFE_NAME.sub(
+        lambda m: ''.join(f'%{byte:02X}' for byte in m.group().encode()), name
+    )
+
+
+class _CacheCounters:
+    """
+    Process wide cache counters shared by all ColumnCache instances.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts: Dict[str, int] = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'fallbacks': 0,
+            'revalidations': 0,
+            'not_modified': 0,
+            'evictions': 0,
+        }
+
+    def incr(self, counter: str, count: int = 1):
+        with self.lock:
+            self.counts[counter] += count
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.counts)
+
+
+COUNTERS = _CacheCounters()
+
+# Keys currently being revalidated in the background
+_REVALIDATING: set = set()
+_REVALIDATING_LOCK = threading.Lock()
+
+
+class ColumnCache:
+    """
+    Persistent per device column cache kept in the minion cachedir. Each column
+    is stored as a JSON file holding the column data and the time it was
+    fetched. File modification times track last use for LRU eviction.
+    """
+
+    def __init__(self, cachedir: str, settings: dict):
+        """
+        cachedir: str
+            Minion cache directory (i.e. __opts__['cachedir'])
+
+        settings: dict
+            The netdb:cache pillar dict. Recognised keys are 'ttl', 'ttls' (a
+            dict of per column TTLs), 'max_stale', 'max_bytes' and 'timeout'.
+
+        """
+        self.path = os.path.join(cachedir, CACHE_SUBDIR)
+
+        self.ttl = int(settings.get('ttl', DEFAULT_TTL))
+        self.ttls = settings.get('ttls') or {}
+        self.max_stale = int(settings.get('max_stale', DEFAULT_MAX_STALE))
+        self.max_bytes = int(settings.get('max_bytes', DEFAULT_MAX_BYTES))
+        self.timeout = float(settings.get('timeout', DEFAULT_TIMEOUT))
+
+    def _file(self, router: str, column: str) -> str:
+        name = f'{_quote(router)}.{_quote(column)}.json'
+        return os.path.join(self.path, name)
+
+    def ttl_for(self, column: str) -> int:
+        """
+        Return the TTL in seconds for a column.
+        """
+        return int(self.ttls.get(column, self.ttl))
+
+    def load(self, router: str, column: str) -> Optional[dict]:
+        """
+        Return the cache entry for a device column or None if not cached.
+        """
+        try:
+            with open(self._file(router, column), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def touch(self, router: str, column: str):
+        """
+        Mark a cache entry as recently used.
+        """
+        try:
+            os.utime(self._file(router, column))
+        except OSError:
+            pass
+
+    def store(self, router: str, column: str, data: dict, **extra):
+        """
+        Atomically write a cache entry and enforce the size bound.
+        """
+        entry = {'fetched': time.time(), 'data': data, **extra}
+
+        tmp = None
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp, self._file(router, column))
+        except OSError as e:
+            logger.warning('netdb_cache: unable to store %s/%s: %s', router, column, e)
+            if tmp and os.path.exists(tmp):
+                os.unlink(tmp)
+            return
+
+        self._evict()
+
+    def remove(self, router: str, column: str):
+        """
+        Drop a cache entry.
+        """
+        try:
+            os.unlink(self._file(router, column))
+        except OSError:
+            pass
+
+    def _entries(self) -> list:
+        """
+        Return (path, size, mtime) tuples for all cache files.
+        """
+        entries = []
+
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return entries
+
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.path, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, st.st_size, st.st_mtime))
+
+        return entries
+
+    def _remove_orphans(self):
+        """
+        Remove temporary files of writes which never completed.
+        """
+        now = time.time()
+
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return
+
+        for name in names:
+            if not name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.path, name)
+            try:
+                if now - os.stat(path).st_mtime > TMP_MAX_AGE:
+                    os.unlink(path)
+            except OSError:
+                continue
+
+    def _evict(self):
+        """
+        Remove least recently used entries until the cache fits max_bytes, and
+        orphaned temporary files.
+        """
+        self._remove_orphans()
+
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            COUNTERS.incr('evictions')
+
+    def _revalidate(self, router: str, column: str, loader: Callable, entry: dict):
+        """
+        Refresh an entry in a background thread. Only one refresh per entry
+        runs at a time.
+        """
+        key = (self.path, router, column)
+
+        with _REVALIDATING_LOCK:
+            if key in _REVALIDATING:
+                return
+            _REVALIDATING.add(key)
+
+        def _run():
+            try:
+                self.refresh(router, column, loader, None, entry)
+                COUNTERS.incr('revalidations')
+            except ColumnNotFoundException:
+                self.remove(router, column)
+            except (SaltException, RequestException) as e:
+                logger.warning(
+                    'netdb_cache: revalidation of %s/%s failed: %s', router, column, e
+                )
+            finally:
+                with _REVALIDATING_LOCK:
+                    _REVALIDATING.discard(key)
+
+        threading.Thread(
+            target=_run, name=f'netdb_cache {router}/{column}', daemon=True
+        ).start()
+
+    def refresh(
+        self,
+        router: str,
+        column: str,
+        loader: Callable,
+        timeout: Optional[Union[float, Tuple[float, None]]],
+        entry: Optional[dict] = None,
+    ) -> dict:
+        """
+        Fetch a column using loader and store it. When entry holds validators
+        from an earlier response the request is made conditional and the
+        cached data is kept if NetDB reports it unchanged.
+        """
+        validators = entry.get('validators') if entry else None
+
+        data, validators = loader(timeout, validators)
+
+        if data is None and entry:
+            COUNTERS.incr('not_modified')
+            if METRICS.enabled:
+                METRICS.cache(column, 'not_modified')
+            data = entry['data']
+
+        self.store(router, column, data, validators=validators)
+        return data
+
+    def fetch(self, router: str, column: str, loader: Callable) -> dict:
+        """
+        Return a column, preferring the cached copy.
+
+        Fresh entries are returned directly. Entries past their TTL but within
+        max_stale are returned and refreshed in the background. Otherwise the
+        column is fetched with loader and its response waited for; if NetDB
+        cannot be reached within the connect timeout or fails, the cached copy
+        is returned regardless of age.
+
+        loader: callable
+            Called with a requests timeout (or None) and the validators of the
+            cached entry (or None). Returns a (data, validators) tuple where
+            data is None if NetDB reported the column as not modified.
+
+        """
+        entry = self.load(router, column)
+        age = time.time() - entry['fetched'] if entry else None
+        ttl = self.ttl_for(column)
+
+        if entry and age < ttl:
+            COUNTERS.incr('hits')
+            if METRICS.enabled:
+                METRICS.cache(column, 'hits')
+            self.touch(router, column)
+            return entry['data']
+
+        if entry and age < ttl + self.max_stale:
+            COUNTERS.incr('stale_hits')
+            if METRICS.enabled:
+                METRICS.cache(column, 'stale_hits')
+            self.touch(router, column)
+            self._revalidate(router, column, loader, entry)
+            return entry['data']
+
+        COUNTERS.incr('misses')
+        if METRICS.enabled:
+            METRICS.cache(column, 'misses')
+
+        try:
+            # Only connecting is bounded: cutting the response short would
+            # leave a column slower than the timeout stale forever
+            return self.refresh(
+                router, column, loader, (self.timeout, None) if entry else None, entry
+            )
+        except ColumnNotFoundException:
+            self.remove(router, column)
+            raise
+        except (SaltException, RequestException) as e:
+            if not entry:
+                raise
+            COUNTERS.incr('fallbacks')
+            if METRICS.enabled:
+                METRICS.cache(column, 'fallbacks')
+            logger.warning(
+                'netdb_cache: serving %s/%s cached %ds ago: %s', router, column, age, e
+            )
+            return entry['data']
+
+    def stats(self) -> dict:
+        """
+        Return cache counters and the age of each cached column.
+        """
+        now = time.time()
+        columns = {}
+
+        for path, size, mtime in self._entries():
+            try:
+                with open(path, encoding='utf-8') as f:
+                    fetched = json.load(f)['fetched']
+            except (OSError, ValueError, KeyError):
+                continue
+
+            router, column = (
+                unquote(name)
+                for name in os.path.basename(path)[: -len('.json')].split('.')
+            )
+            ttl = self.ttl_for(column)
+            age = int(now - fetched)
+
+            columns.setdefault(router, {})[column] = {
+                'age': age,
+                'ttl': ttl,
+                'fresh': age < ttl,
+                'bytes': size,
+                'last_used': int(now - mtime),
+            }
+
+        return {
+            'counters': COUNTERS.snapshot(),
+            'bytes': sum(size for _, size, _ in self._entries()),
+            'max_bytes': self.max_bytes,
+            'columns': columns,
+        }
+
+
+def get_cache(cachedir: Optional[str], netdb: dict) -> Optional[ColumnCache]:
+    """
+    Return a ColumnCache if caching is enabled in the netdb pillar and a
+    cachedir is available, otherwise None.
+
+    cachedir: str
+        Minion cache directory
+
+    netdb: dict
+        The netdb pillar dict
+
+    """
+    settings = netdb.get(CACHE_PILLAR)
+
+    if not cachedir or not settings or not settings.get('enabled'):
+        return None
+
+    return ColumnCache(cachedir, settings)
+
+
+def cache_counters() -> Dict[str, int]:
+    """
+    Return process wide cache counters.
+    """
+    return COUNTERS.snapshot()
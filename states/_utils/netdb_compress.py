@@ -0,0 +1,76 @@
+from typing import Optional, Tuple
+import gzip
+import json
+import logging
+
+__virtual_name__ = 'netdb_compress'
+
+logger = logging.getLogger(__file__)
+
+COMPRESSION_PILLAR = 'compression'
+
+# Request bodies larger than this are compressed when enabled
+DEFAULT_REQUEST_THRESHOLD = 16 * 1024
+
+
+def __virtual__():
+    return __virtual_name__
+
+
+def encode_body(
+    data: Optional[dict], settings: Optional[dict]
+) -> Tuple[Optional[bytes], dict]:
+    """
+    Serialize a JSON request body, gzip compressing it if request compression
+    is enabled and the body exceeds the configured threshold. Returns the
+    body and any extra request headers.
+
+    data: dict
+        JSON HTTP body data
+
+    settings: dict
+        The netdb:compression pillar dict. 'requests' enables request body
+        compression, 'request_threshold' sets the minimum body size.
+
+    """
+    if data is None:
+        return None, {}
+
+    body = json.dumps(data).encode()
+    settings = settings or {}
+
+    threshold = int(settings.get('request_threshold', DEFAULT_REQUEST_THRESHOLD))
+
+    if not settings.get('requests') or len(body) < threshold:
+        return body, {}
+
+    compressed = gzip.compress(body)
+    logger.debug(
+        'NetDB request body compressed from %d to %d bytes', len(body), len(compressed)
+    )
+
+    return compressed, {'Content-Encoding': 'gzip'}
+
+
+def log_transfer(resp, url: str):
+    """
+    Log the bytes received on the wire against the decoded body size of a
+    fully read response.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+
+    try:
+        wire = resp.raw.tell()
+    except (AttributeError, OSError):
+        return
+
+    logger.debug(
+        'NetDB %s %s: %s, wire %d bytes, decoded %d bytes (%s)',
+        resp.request.method,
+        url,
+        resp.status_code,
+        wire,
+        len(resp.content),
+        resp.headers.get('Content-Encoding', 'identity'),
+    )
@@ -0,0 +1,275 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import logging
+import threading
+import time
+
+from requests import RequestException, Response
+
+__virtual_name__ = 'netdb_endpoints'
+
+logger = logging.getLogger(__file__)
+
+# Weight of the newest sample in the moving averages
+EWMA_ALPHA = 0.2
+
+# Endpoints with a higher moving average error rate are considered unhealthy
+MAX_ERROR_RATE = 0.5
+
+# Seconds after which an unhealthy endpoint is tried again
+RETRY_INTERVAL = 30
+
+# Latency samples kept per endpoint for the p95 hedging threshold
+SAMPLE_WINDOW = 100
+
+# Samples required before a p95 threshold is trusted for hedging
+MIN_HEDGE_SAMPLES = 20
+
+# Threads used to send hedged requests
+HEDGE_WORKERS = 8
+
+
+def __virtual__():
+    return __virtual_name__
+
+
+class EndpointStats:
+    """
+    Moving average latency and error rate of one NetDB base URL.
+    """
+
+    def __init__(self):
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.last_attempt = 0.0
+        self.samples: deque = deque(maxlen=SAMPLE_WINDOW)
+
+    def record(self, latency: float, ok: bool):
+        self.requests += 1
+        self.last_attempt = time.monotonic()
+        self.error_rate += EWMA_ALPHA * ((0.0 if ok else 1.0) - self.error_rate)
+
+        if not ok:
+            self.errors += 1
+            return
+
+        self.samples.append(latency)
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += EWMA_ALPHA * (latency - self.latency)
+
+    def healthy(self) -> bool:
+        return (
+            self.error_rate <= MAX_ERROR_RATE
+            or time.monotonic() - self.last_attempt > RETRY_INTERVAL
+        )
+
+    def p95(self) -> Optional[float]:
+        if len(self.samples) < MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def as_dict(self) -> dict:
+        return {
+            'latency': self.latency,
+            'p95': self.p95(),
+            'error_rate': round(self.error_rate, 3),
+            'requests': self.requests,
+            'errors': self.errors,
+            'healthy': self.healthy(),
+        }
+
+
+class EndpointSelector:
+    """
+    Process wide, thread safe tracker of NetDB endpoint health used to order
+    candidate base URLs for reads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, EndpointStats] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get(self, url: str) -> EndpointStats:
+        if (stats := self._stats.get(url)) is None:
+            stats = self._stats[url] = EndpointStats()
+        return stats
+
+    def record(self, url: str, latency: float, ok: bool):
+        with self._lock:
+            self._get(url).record(latency, ok)
+
+    def order(self, urls: List[str]) -> List[str]:
+        """
+        Return urls ordered by preference: healthy endpoints by moving average
+        latency (unmeasured ones first so that they get measured), then
+        unhealthy endpoints. Ties keep the configured order.
+        """
+        with self._lock:
+            stats = {url: self._get(url) for url in urls}
+
+            return sorted(
+                urls,
+                key=lambda url: (
+                    not stats[url].healthy(),
+                    stats[url].latency or 0.0,
+                ),
+            )
+
+    def hedge_delay(self, url: str) -> Optional[float]:
+        with self._lock:
+            return self._get(url).p95()
+
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=HEDGE_WORKERS, thread_name_prefix='netdb_hedge'
+                )
+            return self._executor
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {url: stats.as_dict() for url, stats in self._stats.items()}
+
+
+ENDPOINTS = EndpointSelector()
+
+
+def timed(url: str, send: Callable[[str], Response]) -> Response:
+    """
+    Send a request to base URL url and record its latency and outcome. Server
+    errors (5xx) and connection failures count as errors.
+    """
+    start = time.monotonic()
+
+    try:
+        resp = send(url)
+    except RequestException:
+        ENDPOINTS.record(url, time.monotonic() - start, False)
+        raise
+
+    ENDPOINTS.record(url, time.monotonic() - start, resp.status_code < 500)
+
+    return resp
+
+
+def _failed(resp: Response) -> bool:
+    return resp.status_code >= 500
+
+
+def _discard(future: Future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def send_read(
+    urls: List[str], send: Callable[[str], Response], hedge: bool = False
+) -> Tuple[Response, str]:
+    """
+    Send a read to the best of several equivalent base URLs. Connection
+    failures and server errors (5xx) fail over to the next URL. With hedge
+    set, a second request is sent to the next URL once the first has been
+    outstanding for longer than its p95 latency or has failed, and the first
+    successful response wins. If every URL fails, the last server error
+    response is returned, or else the last connection error raised.
+
+    urls: list
+        Candidate base URLs in configured order
+
+    send: callable
+        Sends the request to a base URL and returns the response
+
+    hedge: bool
+        Enable hedged requests
+
+    Returns the response and the base URL that served it.
+
+    """
+    ordered = ENDPOINTS.order(urls)
+
+    if hedge and len(ordered) > 1 and (delay := ENDPOINTS.hedge_delay(ordered[0])):
+        return _send_hedged(ordered[:2], send, delay)
+
+    error: Optional[RequestException] = None
+    failed: Optional[Tuple[Response, str]] = None
+
+    for url in ordered:
+        try:
+            resp = timed(url, send)
+        except RequestException as e:
+            logger.warning('NetDB endpoint %s failed: %s', url, e)
+            error = e
+            continue
+
+        if failed:
+            failed[0].close()
+
+        if not _failed(resp):
+            return resp, url
+
+        logger.warning('NetDB endpoint %s returned %s', url, resp.status_code)
+        failed = (resp, url)
+
+    if failed:
+        return failed
+
+    raise error  # type: ignore
+
+
+def _send_hedged(
+    urls: List[str], send: Callable[[str], Response], delay: float
+) -> Tuple[Response, str]:
+    executor = ENDPOINTS.executor()
+
+    futures = {executor.submit(timed, urls[0], send): urls[0]}
+    done, _ = wait(futures, timeout=delay)
+
+    if not done:
+        logger.debug('NetDB read to %s exceeded %.3fs; hedging', urls[0], delay)
+        futures[executor.submit(timed, urls[1], send)] = urls[1]
+    elif (first := next(iter(done))).exception() is not None or _failed(first.result()):
+        futures[executor.submit(timed, urls[1], send)] = urls[1]
+
+    pending = set(futures)
+    error: Optional[BaseException] = None
+    failed: Optional[Tuple[Response, str]] = None
+
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            if (exception := future.exception()) is not None:
+                error = exception
+                continue
+
+            resp = future.result()
+
+            if failed:
+                failed[0].close()
+
+            if not _failed(resp):
+                for other in pending:
+                    other.add_done_callback(_discard)
+                return resp, futures[future]
+
+            failed = (resp, futures[future])
+
+    if failed:
+        return failed
+
+    raise error  # type: ignore
+
+
+def endpoint_stats() -> dict:
+    """
+    Return moving average latency and error rate of every NetDB endpoint used
+    by this process.
+    """
+    return ENDPOINTS.stats()
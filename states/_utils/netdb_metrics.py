@@ -0,0 +1,329 @@
+from typing import Dict, List, Optional, Tuple
+import bisect
+import logging
+import os
+import tempfile
+import threading
+import time
+
+__virtual_name__ = 'netdb_metrics'
+
+logger = logging.getLogger(__file__)
+
+METRICS_PILLAR = 'metrics'
+
+# Upper bounds in seconds of the request latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Default minimum number of seconds between Prometheus textfile writes
+DEFAULT_TEXTFILE_INTERVAL = 15
+
+
+def __virtual__():
+    return __virtual_name__
+
+
+def endpoint_label(service: str, path: str) -> str:
+    """
+    Return the endpoint label of a request path, with router IDs and numeric
+    IDs replaced so that the number of series stays bounded, e.g.
+    'column/bgp/{router}' for 'column/bgp/SIN1'.
+    """
+    parts = path.strip('/').split('/')
+
+    if service == 'netdb':
+        if parts[0] == 'column' and len(parts) > 2:
+            return f'column/{parts[1]}/{{router}}'
+        if parts[0] == 'columns' and len(parts) > 1:
+            return 'columns/{router}'
+
+    return '/'.join('{id}' if part.isdigit() else part for part in parts)
+
+
+def response_bytes(resp, stream: bool = False) -> int:
+    """
+    Return the number of bytes received for a response: the bytes read off
+    the wire if known, else the Content-Length of a streamed response or the
+    size of its body.
+    """
+    if not stream:
+        try:
+            return resp.raw.tell()
+        except (AttributeError, OSError):
+            return len(resp.content)
+
+    return int(resp.headers.get('Content-Length') or 0)
+
+
+class _Series:
+    """
+    Counters of the requests to a single service endpoint.
+    """
+
+    __slots__ = ('buckets', 'count', 'seconds', 'bytes', 'status')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.status: Dict[int, int] = {}
+
+
+class Metrics:
+    """
+    Process wide, thread safe NetDB request metrics: per endpoint latency
+    histograms, received bytes and status codes, and per column cache
+    results. Nothing is recorded until enabled by the netdb:metrics pillar;
+    callers check enabled before recording so that a disabled registry costs
+    a single attribute lookup per request.
+
+    Metrics are only seen by the process recording them. A minion running
+    with multiprocessing: False (as NetDB proxies are configured) runs its
+    jobs and beacons in a single process and so reports all of its requests;
+    with multiprocessing enabled every job process keeps its own metrics,
+    which are lost when the job ends.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+        self.enabled = False
+        self.textfile: Optional[str] = None
+        self.netdb_id: Optional[str] = None
+        self.textfile_interval = DEFAULT_TEXTFILE_INTERVAL
+        self._written = 0.0
+
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._series: Dict[Tuple[str, str, str], _Series] = {}
+            self._cache: Dict[Tuple[str, str], int] = {}
+            self._since = time.time()
+
+    def configure(self, settings: Optional[dict], netdb_id: Optional[str] = None):
+        """
+        Update metrics settings.
+
+        settings: dict
+            An optional dict with 'enabled', 'textfile' and 'textfile_interval'
+            keys. '{id}' in textfile is replaced by netdb_id.
+
+        netdb_id: str
+            The netdb:id of the minion, added as a label to the Prometheus
+            metrics so that several minions can share a textfile collector
+
+        """
+        if not settings:
+            return
+
+        self.netdb_id = netdb_id
+
+        self.enabled = bool(settings.get('enabled', self.enabled))
+        self.textfile_interval = int(
+            settings.get('textfile_interval', self.textfile_interval)
+        )
+
+        if textfile := settings.get('textfile'):
+            self.textfile = textfile.format(id=netdb_id or 'master')
+
+    def observe(
+        self,
+        service: str,
+        method: str,
+        path: str,
+        seconds: float,
+        status: int,
+        size: int,
+    ):
+        """
+        Record a request.
+
+        service: str
+            'netdb' or 'netdb_util'
+
+        method: str
+            HTTP method
+
+        path: str
+            Request path relative to the service base URL
+
+        seconds: float
+            Time until the response was received
+
+        status: int
+            HTTP status code
+
+        size: int
+            Bytes received
+
+        """
+        key = (service, method, endpoint_label(service, path))
+        bucket = bisect.bisect_left(BUCKETS, seconds)
+
+        with self._lock:
+            if not (series := self._series.get(key)):
+                series = self._series[key] = _Series()
+
+            series.buckets[bucket] += 1
+            series.count += 1
+            series.seconds += seconds
+            series.bytes += size
+            series.status[status] = series.status.get(status, 0) + 1
+
+        if self.textfile and time.monotonic() - self._written > self.textfile_interval:
+            self.write_textfile()
+
+    def cache(self, column: str, result: str):
+        """
+        Record the result of a column cache lookup, e.g. 'hits' or 'misses'.
+        """
+        with self._lock:
+            self._cache[(column, result)] = self._cache.get((column, result), 0) + 1
+
+    def snapshot(self, reset: bool = False) -> dict:
+        """
+        Return the recorded metrics as a dict, optionally resetting them.
+        """
+        with self._lock:
+            requests: Dict[str, Dict[str, dict]] = {}
+            total = {'requests': 0, 'seconds': 0.0, 'bytes': 0}
+
+            for (service, method, endpoint), series in sorted(self._series.items()):
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(BUCKETS + (float('inf'),), series.buckets):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+
+                requests.setdefault(service, {})[f'{method} {endpoint}'] = {
+                    'count': series.count,
+                    'seconds': round(series.seconds, 6),
+                    'mean_ms': round(series.seconds / series.count * 1000, 3),
+                    'bytes': series.bytes,
+                    'status': dict(series.status),
+                    'buckets': buckets,
+                }
+
+                total['requests'] += series.count
+                total['seconds'] += series.seconds
+                total['bytes'] += series.bytes
+
+            cache: Dict[str, Dict[str, int]] = {}
+            for (column, result), count in sorted(self._cache.items()):
+                cache.setdefault(column, {})[result] = count
+
+            ret = {
+                'enabled': self.enabled,
+                'since': self._since,
+                'total': {**total, 'seconds': round(total['seconds'], 6)},
+                'requests': requests,
+                'cache': cache,
+            }
+
+        if reset:
+            self.reset()
+
+        return ret
+
+    def prometheus(self) -> str:
+        """
+        Return the recorded metrics in the Prometheus text exposition format.
+        """
+        minion = f'netdb_id="{self.netdb_id}",' if self.netdb_id else ''
+        lines: List[str] = [
+            '# HELP netdb_request_seconds NetDB request latency in seconds.',
+            '# TYPE netdb_request_seconds histogram',
+        ]
+        counters: Dict[str, List[str]] = {
+            'netdb_response_bytes_total': [
+                '# HELP netdb_response_bytes_total Bytes received from NetDB.',
+                '# TYPE netdb_response_bytes_total counter',
+            ],
+            'netdb_responses_total': [
+                '# HELP netdb_responses_total NetDB responses by status code.',
+                '# TYPE netdb_responses_total counter',
+            ],
+            'netdb_column_cache_total': [
+                '# HELP netdb_column_cache_total Column cache lookups by result.',
+                '# TYPE netdb_column_cache_total counter',
+            ],
+        }
+
+        with self._lock:
+            for (service, method, endpoint), series in sorted(self._series.items()):
+                labels = (
+                    f'{minion}service="{service}",method="{method}",'
+                    f'endpoint="{endpoint}"'
+                )
+
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float('inf'),), series.buckets):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else bound
+                    lines.append(
+                        f'netdb_request_seconds_bucket{{{labels},le="{le}"}} {cumulative}'
+                    )
+                lines.append(f'netdb_request_seconds_sum{{{labels}}} {series.seconds}')
+                lines.append(f'netdb_request_seconds_count{{{labels}}} {series.count}')
+
+                counters['netdb_response_bytes_total'].append(
+                    f'netdb_response_bytes_total{{{labels}}} {series.bytes}'
+                )
+                for status, count in sorted(series.status.items()):
+                    counters['netdb_responses_total'].append(
+                        f'netdb_responses_total{{{labels},code="{status}"}} {count}'
+                    )
+
+            for (column, result), count in sorted(self._cache.items()):
+                counters['netdb_column_cache_total'].append(
+                    f'netdb_column_cache_total{{{minion}column="{column}",'
+                    f'result="{result}"}} {count}'
+                )
+
+        for metric in counters.values():
+            lines.extend(metric)
+
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self):
+        """
+        Atomically write the metrics to the configured Prometheus textfile
+        collector file. Skipped if another thread is already writing it.
+        """
+        if not self.textfile or not self._write_lock.acquire(blocking=False):
+            return
+
+        try:
+            self._written = time.monotonic()
+            directory = os.path.dirname(self.textfile) or '.'
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus())
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, self.textfile)
+        except OSError as e:
+            logger.warning('netdb_metrics: unable to write %s: %s', self.textfile, e)
+        finally:
+            self._write_lock.release()
+
+
+# The registry lives at module level so that it is shared by every NetdbAPI
+# and NetdbUtilAPI instance created by the loaders of this process.
+METRICS = Metrics()
+
+
+def configure(settings: Optional[dict], netdb_id: Optional[str] = None):
+    """
+    Configure the process wide registry from the netdb:metrics pillar.
+    """
+    METRICS.configure(settings, netdb_id)
+
+
+def metrics(reset: bool = False) -> dict:
+    """
+    Return the process wide NetDB request metrics.
+    """
+    return METRICS.snapshot(reset)
@@ -0,0 +1,222 @@
+from typing import Dict, Optional
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+__virtual_name__ = 'netdb_pool'
+
+logger = logging.getLogger(__file__)
+
+POOL_PILLAR = 'pool'
+
+# Default number of pooled connections kept per base URL
+DEFAULT_POOL_SIZE = 10
+
+# Default number of seconds an unused session is kept before it is closed
+DEFAULT_IDLE_TIMEOUT = 300
+
+
+def __virtual__():
+    return __virtual_name__
+
+
+class _PooledSession:
+    """
+    A requests session bound to a single base URL along with the time it
+    was last handed out.
+    """
+
+    def __init__(self, session: requests.Session, adapter: HTTPAdapter, size: int):
+        self.session = session
+        self.adapter = adapter
+        self.size = size
+        self.last_used = time.monotonic()
+
+    def mount(self, adapter: HTTPAdapter, size: int):
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        if self.adapter is not adapter:
+            self.adapter.close()
+
+        self.adapter = adapter
+        self.size = size
+
+    def connection_stats(self) -> Dict[str, int]:
+        """
+        Return the number of connections opened and requests sent by the
+        urllib3 pools behind this session.
+        """
+        stats = {'connections': 0, 'requests': 0}
+
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            if not (pool := pools.get(key)):
+                continue
+            stats['connections'] += pool.num_connections
+            stats['requests'] += pool.num_requests
+
+        return stats
+
+
+class SessionPool:
+    """
+    Process wide, thread safe registry of keep-alive requests sessions keyed
+    by base URL. Sessions idle for longer than idle_timeout are closed the
+    next time the pool is accessed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, _PooledSession] = {}
+
+        self.pool_size = DEFAULT_POOL_SIZE
+        self.keepalive = True
+        self.idle_timeout = DEFAULT_IDLE_TIMEOUT
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, settings: Optional[dict]):
+        """
+        Update pool settings. Changed settings only apply to sessions created
+        after the call.
+
+        settings: dict
+            An optional dict with 'size', 'keepalive' and 'idle_timeout' keys.
+
+        """
+        if not settings:
+            return
+
+        with self._lock:
+            self.pool_size = int(settings.get('size', self.pool_size))
+            self.keepalive = bool(settings.get('keepalive', self.keepalive))
+            self.idle_timeout = int(settings.get('idle_timeout', self.idle_timeout))
+
+    def _evict_idle(self, now: float):
+        """
+        Close sessions which have not been used within idle_timeout. Must be
+        called with the lock held.
+        """
+        for base_url, pooled in list(self._sessions.items()):
+            if now - pooled.last_used > self.idle_timeout:
+                pooled.session.close()
+                del self._sessions[base_url]
+                self.evictions += 1
+                logger.debug('netdb_pool: evicted idle session for %s', base_url)
+
+    def _adapter(self, size: int) -> HTTPAdapter:
+        return HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=size)
+
+    def _new_session(self, size: int) -> _PooledSession:
+        session = requests.Session()
+
+        if not self.keepalive:
+            session.headers['Connection'] = 'close'
+
+        adapter = self._adapter(size)
+        pooled = _PooledSession(session, adapter, size)
+        pooled.mount(adapter, size)
+
+        return pooled
+
+    def get(self, base_url: str, size: Optional[int] = None) -> requests.Session:
+        """
+        Return the pooled session for base_url, creating it if necessary.
+
+        base_url: str
+            Base URL of the service, e.g. the NetDB 'url' pillar value.
+
+        size: int
+            Minimum number of pooled connections. A session with a smaller
+            pool gets a new adapter of this size; its idle connections are
+            closed.
+
+        """
+        now = time.monotonic()
+        size = max(size or 0, self.pool_size)
+
+        with self._lock:
+            self._evict_idle(now)
+
+            if pooled := self._sessions.get(base_url):
+                self.hits += 1
+                if pooled.size < size:
+                    pooled.mount(self._adapter(size), size)
+                    logger.debug('netdb_pool: resized %s pool to %d', base_url, size)
+            else:
+                pooled = self._sessions[base_url] = self._new_session(size)
+                self.misses += 1
+
+            pooled.last_used = now
+
+            return pooled.session
+
+    def stats(self) -> dict:
+        """
+        Return pool counters. Session hits and misses count pool lookups;
+        per URL connection and request counts show how many requests were
+        served over how many TCP connections.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'settings': {
+                    'size': self.pool_size,
+                    'keepalive': self.keepalive,
+                    'idle_timeout': self.idle_timeout,
+                },
+                'sessions': {
+                    base_url: {'size': pooled.size, **pooled.connection_stats()}
+                    for base_url, pooled in self._sessions.items()
+                },
+            }
+
+    def close(self):
+        """
+        Close and forget all pooled sessions.
+        """
+        with self._lock:
+            for pooled in self._sessions.values():
+                pooled.session.close()
+            self._sessions.clear()
+
+
+# The pool lives at module level so that it is shared by every NetdbAPI and
+# NetdbUtilAPI instance created by the loaders of this process.
+POOL = SessionPool()
+
+
+def get_session(
+    base_url: str, settings: Optional[dict] = None, size: Optional[int] = None
+) -> requests.Session:
+    """
+    Return the process wide pooled session for a base URL.
+
+    base_url: str
+        Base URL of the service.
+
+    settings: dict
+        Optional 'pool' pillar settings used to (re)configure the pool.
+
+    size: int
+        Optional minimum number of pooled connections, e.g. the number of
+        requests a caller keeps in flight.
+
+    """
+    POOL.configure(settings)
+    return POOL.get(base_url, size)
+
+
+def pool_stats() -> dict:
+    """
+    Return process wide session pool counters.
+    """
+    return POOL.stats()
@@ -0,0 +1,232 @@
+from typing import Any, Iterable, Optional, Tuple
+import logging
+import os
+import threading
+import time
+
+from netdb_api import NetdbAPI
+from netdb_util_api import NetdbUtilAPI
+from netdb_stream import dump_items
+
+__virtual_name__ = 'netdb_runner'
+
+logger = logging.getLogger(__file__)
+
+NETDB_PILLAR = 'netdb'
+NETDB_LOCAL_PILLAR = 'netdb_local'
+
+# Keys of the netdb pillar dict which NetdbUtilAPI needs
+_UTIL_KEYS = ['util_url']
+
+_LOCK = threading.Lock()
+
+# Connection settings and clients resolved by this master process
+_CACHE: dict = {}
+
+# Seconds a pillar signature is reused by a long running job or a thread
+# serving several jobs (e.g. salt-api)
+SIGNATURE_TTL = 30
+
+# Pillar signatures computed by running jobs, by job key
+_SIGNATURES: dict = {}
+
+
+def __virtual__():
+    return __virtual_name__
+
+
+def _pillar_signature(opts: dict) -> tuple:
+    """
+    Return a cheap fingerprint of the pillar sources: the modification times
+    of every file below the configured pillar roots. A changed fingerprint
+    means the pillar must be compiled again.
+    """
+    signature = []
+
+    for roots in (opts.get('pillar_roots') or {}).values():
+        for root in roots:
+            for dirpath, _, filenames in os.walk(root):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        signature.append((path, os.stat(path).st_mtime_ns))
+                    except OSError:
+                        continue
+
+    return tuple(sorted(signature))
+
+
+def _job() -> Tuple[int, int]:
+    """
+    Return a key identifying the current runner job. The master runs every
+    runner job in a process of its own, salt-run runs a single job in its
+    main thread and salt-api runs jobs in its worker threads.
+    """
+    return os.getpid(), threading.get_ident()
+
+
+def _job_signature(opts: dict) -> tuple:
+    """
+    Return the pillar signature of the current runner job, walking the pillar
+    roots only on the job's first call or once SIGNATURE_TTL has elapsed.
+    Signatures of ended threads are dropped when a new one is computed.
+    """
+    now = time.monotonic()
+
+    if (cached := _SIGNATURES.get(job := _job())) and now - cached[0] < SIGNATURE_TTL:
+        return cached[1]
+
+    running = {(os.getpid(), thread.ident) for thread in threading.enumerate()}
+    for ended in [key for key in _SIGNATURES if key not in running]:
+        del _SIGNATURES[ended]
+
+    signature = _pillar_signature(opts)
+    _SIGNATURES[job] = (now, signature)
+
+    return signature
+
+
+def _resolve(opts: dict, salt: dict, keys: Optional[list]) -> dict:
+    """
+    Return the netdb and netdb_local pillar data. The netdb ext_pillar copies
+    opts['netdb'], so when opts already holds every needed key the pillar is
+    not compiled at all. Otherwise the compiled pillar is cached until the
+    pillar sources change, which is checked once per runner job.
+    """
+    netdb_opts = opts.get(NETDB_PILLAR) or {}
+
+    if keys and all(key in netdb_opts for key in keys):
+        return {NETDB_PILLAR: netdb_opts}
+
+    signature = _job_signature(opts)
+
+    if (cached := _CACHE.get('pillar')) and cached[0] == signature:
+        return cached[1]
+
+    logger.debug('netdb_runner: compiling pillar for netdb settings')
+
+    pillar = salt['pillar.show_pillar']()
+    settings = {
+        key: pillar[key] for key in (NETDB_PILLAR, NETDB_LOCAL_PILLAR) if key in pillar
+    }
+
+    _CACHE.clear()
+    _CACHE['pillar'] = (signature, settings)
+
+    return settings
+
+
+def get_settings(opts: dict, salt: dict) -> dict:
+    """
+    Return the netdb and netdb_local pillar data, compiling the master pillar
+    at most once per master process or pillar change.
+
+    opts: dict
+        The runner __opts__ dunder
+
+    salt: dict
+        The runner __salt__ dunder
+
+    """
+    with _LOCK:
+        return _resolve(opts, salt, None)
+
+
+def get_util_api(opts: dict, salt: dict) -> NetdbUtilAPI:
+    """
+    Return a NetdbUtilAPI instance for runners. The instance is reused until
+    its connection settings change.
+
+    opts: dict
+        The runner __opts__ dunder
+
+    salt: dict
+        The runner __salt__ dunder
+
+    """
+    with _LOCK:
+        settings = _resolve(opts, salt, _UTIL_KEYS)
+        key = repr(settings)
+
+        if (cached := _CACHE.get('util_api')) and cached[0] == key:
+            return cached[1]
+
+        api = NetdbUtilAPI(settings)
+        _CACHE['util_api'] = (key, api)
+
+        return api
+
+
+def get_api(opts: dict, salt: dict) -> NetdbAPI:
+    """
+    Return a NetdbAPI instance for runners. The instance is reused until its
+    connection settings change.
+
+    opts: dict
+        The runner __opts__ dunder
+
+    salt: dict
+        The runner __salt__ dunder
+
+    """
+    with _LOCK:
+        settings = _resolve(opts, salt, None)
+        key = repr(settings)
+
+        if (cached := _CACHE.get('api')) and cached[0] == key:
+            return cached[1]
+
+        api = NetdbAPI(settings)
+        _CACHE['api'] = (key, api)
+
+        return api
+
+
+def invalidate():
+    """
+    Forget cached connection settings and clients.
+    """
+    with _LOCK:
+        _CACHE.clear()
+        _SIGNATURES.clear()
+
+
+def stream_result(
+    items: Iterable[Tuple[Any, Any]],
+    opts: dict,
+    output_file: Optional[str] = None,
+    outputter: Optional[str] = None,
+) -> dict:
+    """
+    Consume streamed (key, value) entries without building the whole document
+    in memory. Entries are either written to output_file as one JSON object or
+    displayed one at a time with a Salt outputter. Returns a summary.
+
+    items: iterable
+        Entries from NetdbUtilAPI.stream or NetdbAPI.stream_column
+
+    opts: dict
+        The runner __opts__ dunder
+
+    output_file: str
+        Path of the JSON file to write
+
+    outputter: str
+        Salt outputter used to display each entry (e.g. 'nested')
+
+    """
+    if output_file:
+        with open(output_file, 'w', encoding='utf-8') as fp:
+            count = dump_items(items, fp)
+
+        return {'result': True, 'comment': f'{count} entries written to {output_file}'}
+
+    # pylint: disable=import-outside-toplevel
+    import salt.output
+
+    count = 0
+    for key, value in items:
+        salt.output.display_output({key: value}, outputter, opts)
+        count += 1
+
+    return {'result': True, 'comment': f'{count} entries displayed'}
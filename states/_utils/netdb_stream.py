@@ -0,0 +1,180 @@
+from typing import Any, IO, Iterable, Iterator, Optional, Tuple
+import codecs
+import json
+import re
+
+__virtual_name__ = 'netdb_stream'
+
+# Bytes requested from the response body at a time
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+_DECODER = json.JSONDecoder()
+
+
+def __virtual__():
+    return __virtual_name__
+
+
+class _Reader:
+    """
+    Incremental JSON tokenizer over an iterable of byte chunks. Only the
+    unconsumed part of the document is kept in memory.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _more(self) -> bool:
+        """
+        Append the next chunk to the buffer, dropping consumed text. Returns
+        False once the body is exhausted.
+        """
+        if self.eof:
+            return False
+
+        try:
+            text = self._decoder.decode(next(self._chunks))
+        except StopIteration:
+            text = self._decoder.decode(b'', final=True)
+            self.eof = True
+
+        self.buf = self.buf[self.pos :] + text
+        self.pos = 0
+
+        return True
+
+    def _grow(self):
+        """
+        Read until the unconsumed buffer has doubled so that retried decodes
+        of a large value stay linear in its size.
+        """
+        target = 2 * (len(self.buf) - self.pos) + 1
+        while len(self.buf) - self.pos < target and self._more():
+            pass
+
+    def peek(self) -> str:
+        """
+        Return the next non-whitespace character without consuming it, or ''
+        at the end of the body.
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()  # type: ignore
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return ''
+
+    def expect(self, char: str):
+        """
+        Consume the next non-whitespace character, which must be char.
+        """
+        if (found := self.peek()) != char:
+            raise ValueError(f'expected {char!r} in JSON stream, found {found!r}')
+        self.pos += 1
+
+    def value(self) -> Any:
+        """
+        Decode and consume the next complete JSON value.
+        """
+        self.peek()
+
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._grow()
+                continue
+
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buf) and not self.eof:
+                self._grow()
+                continue
+
+            self.pos = end
+            return value
+
+
+def iter_items(
+    chunks: Iterable[bytes], key: str = 'out', meta: Optional[dict] = None
+) -> Iterator[Tuple[Any, Any]]:
+    """
+    Incrementally parse a NetDB JSON response and yield the entries of one of
+    its top level members: (key, value) pairs of an object, or (index, value)
+    pairs of an array. Other top level members (e.g. result and comment) are
+    stored in meta.
+
+    chunks: iterable
+        Response body as byte chunks, e.g. Response.iter_content()
+
+    key: str
+        Top level member to stream
+
+    meta: dict
+        Optional dict receiving the other top level members
+
+    """
+    meta = {} if meta is None else meta
+    reader = _Reader(chunks)
+
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+
+    while True:
+        name = reader.value()
+        reader.expect(':')
+
+        if name == key and (opening := reader.peek()) in ('{', '['):
+            reader.expect(opening)
+            closing = '}' if opening == '{' else ']'
+            index = 0
+
+            while reader.peek() != closing:
+                if opening == '{':
+                    item_key = reader.value()
+                    reader.expect(':')
+                else:
+                    item_key = index
+                    index += 1
+
+                yield item_key, reader.value()
+
+                if reader.peek() == ',':
+                    reader.expect(',')
+
+            reader.expect(closing)
+        else:
+            meta[name] = reader.value()
+
+        if reader.peek() != ',':
+            break
+        reader.expect(',')
+
+    reader.expect('}')
+
+
+def dump_items(items: Iterable[Tuple[Any, Any]], fp: IO[str]) -> int:
+    """
+    Write streamed (key, value) pairs to fp as a single JSON object, one entry
+    at a time. Returns the number of entries written.
+    """
+    count = 0
+
+    fp.write('{')
+    for key, value in items:
+        if count:
+            fp.write(',')
+        fp.write(f'\n{json.dumps(str(key))}: ')
+        json.dump(value, fp)
+        count += 1
+    fp.write('\n}\n')
+
+    return count
@@ -1,8 +1,14 @@
-from typing import Optional
-import requests
+from typing import Any, Iterator, Optional, Tuple
+import time
 
+from requests import RequestException
 from salt.exceptions import SaltException
 
+from netdb_pool import POOL_PILLAR, get_session
+from netdb_stream import CHUNK_SIZE, iter_items
+from netdb_metrics import METRICS, METRICS_PILLAR, configure, response_bytes
+from netdb_compress import COMPRESSION_PILLAR, encode_body, log_transfer
+
 NETDB_UTIL_HEADERS = {
     "Content-Type": "application/json",
     "Accept": "application/json",
@@ -23,6 +29,12 @@ class NetdbUtilAPI:
     # NetDB Util service URL base
     util_url: str
 
+    # Optional connection pool settings
+    pool_settings: Optional[dict] = None
+
+    # Optional request compression settings
+    compression_settings: Optional[dict] = None
+
     def __init__(self, pillar):
         """
         NetdbUtilAPI is used to interact with the NetDB util service.
@@ -34,6 +46,12 @@ class NetdbUtilAPI:
         """
 
         self.util_url = pillar[NETDB_PILLAR]['util_url']
+        self.pool_settings = pillar[NETDB_PILLAR].get(POOL_PILLAR)
+        self.compression_settings = pillar[NETDB_PILLAR].get(COMPRESSION_PILLAR)
+
+        configure(
+            pillar[NETDB_PILLAR].get(METRICS_PILLAR), pillar[NETDB_PILLAR].get('id')
+        )
 
     def _request(
         self,
@@ -51,15 +69,37 @@ class NetdbUtilAPI:
 
         url = self.util_url + endpoint
 
-        resp = requests.request(
-            url=url,
-            method=method,
-            headers=NETDB_UTIL_HEADERS,
-            params=params,
-            json=data,
-            verify=False,
-            cert=None,
-        )
+        body, extra_headers = encode_body(data, self.compression_settings)
+
+        start = time.perf_counter()
+        try:
+            resp = get_session(self.util_url, self.pool_settings).request(
+                url=url,
+                method=method,
+                headers={**NETDB_UTIL_HEADERS, **extra_headers},
+                params=params,
+                data=body,
+                verify=False,
+                cert=None,
+            )
+        except RequestException:
+            if METRICS.enabled:
+                METRICS.observe(
+                    'netdb_util', method, endpoint, time.perf_counter() - start, 0, 0
+                )
+            raise
+
+        if METRICS.enabled:
+            METRICS.observe(
+                'netdb_util',
+                method,
+                endpoint,
+                time.perf_counter() - start,
+                resp.status_code,
+                response_bytes(resp),
+            )
+
+        log_transfer(resp, url)
 
         if (code := resp.status_code) not in [200, 400, 404, 422]:
             raise SaltException(f'NetDB Util API error: {url}: {code}: {resp.reason}')
@@ -71,6 +111,57 @@ class NetdbUtilAPI:
 
         return ret_dict
 
+    def stream(
+        self, endpoint: str, params: Optional[dict] = None, key: str = 'out'
+    ) -> Iterator[Tuple[Any, Any]]:
+        """
+        Send a GET request to the NetDB Util service and yield the entries of
+        the response 'out' member (e.g. one per device) as they are decoded,
+        without loading the whole response into memory.
+
+        endpoint: str
+            NetDB util endpoint to query
+
+        params: dict
+            HTTP query parameters
+
+        key: str
+            Top level response member to stream
+
+        """
+        url = self.util_url + endpoint
+        meta: dict = {}
+
+        start = time.perf_counter()
+
+        with get_session(self.util_url, self.pool_settings).get(
+            url=url,
+            headers=NETDB_UTIL_HEADERS,
+            params=params or {},
+            verify=False,
+            cert=None,
+            stream=True,
+        ) as resp:
+            if METRICS.enabled:
+                METRICS.observe(
+                    'netdb_util',
+                    'GET',
+                    endpoint,
+                    time.perf_counter() - start,
+                    resp.status_code,
+                    response_bytes(resp, stream=True),
+                )
+
+            if (code := resp.status_code) not in [200, 400, 404, 422]:
+                raise SaltException(
+                    f'NetDB Util API error: {url}: {code}: {resp.reason}'
+                )
+
+            yield from iter_items(resp.iter_content(CHUNK_SIZE), key, meta)
+
+        if meta.get('result') is False:
+            raise SaltException(f'NetDB Util error: {meta.get("comment")}')
+
     def get(
         self, endpoint: str, params: Optional[dict] = None, test: bool = True
     ) -> dict:
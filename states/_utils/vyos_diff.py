@@ -0,0 +1,107 @@
+from typing import Dict, List, Set, Tuple
+import shlex
+
+__virtual_name__ = 'vyos_diff'
+
+Path = Tuple[str, ...]
+
+
+def __virtual__():
+    return __virtual_name__
+
+
+def parse(text: str) -> Tuple[List[Path], Dict[Path, str], Dict[Path, str]]:
+    """
+    Parse rendered VyOS configuration commands.
+
+    Returns the paths removed by 'delete' commands (the roots the template
+    replaces wholesale), a dict mapping the path of every 'set' command to its
+    original line and a dict of any other commands (e.g. 'comment') keyed by
+    their tokens.
+
+    text: str
+        Rendered template consisting of 'set' and 'delete' commands
+
+    """
+    roots: List[Path] = []
+    sets: Dict[Path, str] = {}
+    others: Dict[Path, str] = {}
+
+    for line in text.splitlines():
+        if not (line := line.strip()) or line.startswith('#'):
+            continue
+
+        # shlex is only needed for quoted values and is much slower
+        if '"' in line or "'" in line:
+            tokens = tuple(shlex.split(line))
+        else:
+            tokens = tuple(line.split())
+
+        if tokens[0] == 'delete':
+            roots.append(tokens[1:])
+        elif tokens[0] == 'set':
+            sets.setdefault(tokens[1:], line)
+        else:
+            others.setdefault(tokens, line)
+
+    return roots, sets, others
+
+
+def _under(path: Path, roots: List[Path]) -> int:
+    """
+    Return the length of the root path falls under, or 0 if it is under none.
+    """
+    return max((len(root) for root in roots if path[: len(root)] == root), default=0)
+
+
+def diff(old: str, new: str) -> List[str]:
+    """
+    Return the VyOS commands turning configuration rendered as old into
+    configuration rendered as new, in place of applying new as a whole.
+
+    Like a full apply of new, only configuration under the roots deleted by new
+    is removed: each set path that disappeared is deleted at the shortest
+    prefix below its root that is not used by any new set path. Set commands
+    are emitted for new paths only, in template order, after all deletes,
+    followed by other new commands such as comments.
+
+    old: str
+        Previously applied rendered template
+
+    new: str
+        Newly rendered template
+
+    """
+    _, old_sets, old_others = parse(old)
+    roots, new_sets, new_others = parse(new)
+
+    prefixes: Set[Path] = set()
+    for path in new_sets:
+        prefixes.update(path[:i] for i in range(1, len(path) + 1))
+
+    deletes: Set[Path] = set()
+
+    for path in old_sets.keys() - new_sets.keys():
+        if not (depth := _under(path, roots)):
+            continue
+
+        for i in range(depth + 1, len(path) + 1):
+            if path[:i] not in prefixes:
+                deletes.add(path[:i])
+                break
+
+    commands = []
+    emitted: Set[Path] = set()
+
+    for path in sorted(deletes, key=len):
+        if any(path[:i] in emitted for i in range(1, len(path))):
+            continue
+        emitted.add(path)
+        commands.append(shlex.join(('delete',) + path))
+
+    commands.extend(line for path, line in new_sets.items() if path not in old_sets)
+    commands.extend(
+        line for tokens, line in new_others.items() if tokens not in old_others
+    )
+
+    return commands
@@ -0,0 +1,501 @@
+"""
+Python renderers for the VyOS bgp, policy and firewall templates.
+
+Each renderer produces the same commands as the corresponding vyos.jinja
+template for VyOS 1.3 and 1.4, without Jinja's per line overhead on large
+columns. Template variables are passed as keyword arguments under the names
+the templates use.
+"""
+
+from typing import Callable, Dict, List
+import hashlib
+import ipaddress
+
+__virtual_name__ = 'vyos_render'
+
+
+def __virtual__():
+    return __virtual_name__
+
+
+def _is_ipv4(value: str) -> bool:
+    """
+    Equivalent of the Salt ipv4 Jinja filter used as a test.
+    """
+    try:
+        return ipaddress.ip_interface(value).version == 4
+    except ValueError:
+        return False
+
+
+def _is_v14(grains_version: str) -> bool:
+    return str(grains_version).startswith('1.4')
+
+
+def bgp(grains_version: str, data: dict, **_) -> str:
+    """
+    Render states/bgp/templates/vyos.jinja.
+
+    grains_version: str
+        The device's 'version' grain
+
+    data: dict
+        The bgp column
+
+    """
+    out: List[str] = []
+    add = out.append
+
+    if _is_v14(grains_version):
+        asn = ''
+        system_asn = data['options']['asn']
+        v14 = True
+    else:
+        asn = data['options']['asn']
+        v14 = False
+
+    add('delete protocols bgp')
+
+    if not v14:
+        add(f'set protocols bgp {asn} parameters default no-ipv4-unicast')
+
+    add(f'set protocols bgp {asn} parameters graceful-restart')
+
+    if v14:
+        add(f'set protocols bgp system-as {system_asn}')
+
+    if 'options' in data:
+        options = data['options']
+        if 'router_id' in options:
+            add(f'set protocols bgp {asn} parameters router-id {options["router_id"]}')
+        if 'cluster_id' in options:
+            add(
+                f'set protocols bgp {asn} parameters cluster-id {options["cluster_id"]}'
+            )
+        if options.get('log_neighbor_changes'):
+            add(f'set protocols bgp {asn} parameters log-neighbor-changes')
+        if 'hold_time' in options:
+            add(f'set protocols bgp {asn} timers holdtime {options["hold_time"]}')
+        if 'keepalive_time' in options:
+            add(f'set protocols bgp {asn} timers keepalive {options["keepalive_time"]}')
+
+    for family, family_data in (data.get('address_family') or {}).items():
+        prefix = f'set protocols bgp {asn} address-family {family}-unicast'
+        for network in family_data.get('networks', ()):
+            add(f'{prefix} network {network}')
+        for redistribute in family_data.get('redistribute', ()):
+            add(f'{prefix} redistribute {redistribute}')
+
+    for group, settings in (data.get('peer_groups') or {}).items():
+        prefix = f'set protocols bgp {asn} peer-group {group}'
+
+        if 'source' in settings:
+            add(f'{prefix} update-source {settings["source"]}')
+        if 'password' in settings:
+            add(f'{prefix} password {settings["password"]}')
+        if settings.get('type') == 'ibgp':
+            add(f'{prefix} remote-as internal')
+        else:
+            if 'remote_asn' in settings:
+                add(f'{prefix} remote-as {settings["remote_asn"]}')
+            if 'multihop' in settings:
+                add(f'{prefix} ebgp-multihop {settings["multihop"]}')
+
+        for family, family_data in (settings.get('family') or {}).items():
+            af = f'{prefix} address-family {family}-unicast'
+            if family_data.get('nhs'):
+                add(f'{af} nexthop-self')
+            if family_data.get('default_originate'):
+                add(f'{af} default-originate')
+            if 'max_prefixes' in family_data:
+                add(f'{af} maximum-prefix {family_data["max_prefixes"]}')
+            if family_data.get('route_reflector'):
+                add(f'{af} route-reflector-client')
+            for direction, route_map in (family_data.get('route_map') or {}).items():
+                add(f'{af} route-map {direction} {route_map}')
+
+    for name, settings in (data.get('neighbors') or {}).items():
+        prefix = f'set protocols bgp {asn} neighbor {name}'
+
+        add(prefix)
+
+        if 'peer_group' in settings:
+            add(f'{prefix} peer-group {settings["peer_group"]}')
+        for timer, wait in (settings.get('timers') or {}).items():
+            add(f'{prefix} timers {timer} {wait}')
+        if 'source' in settings:
+            add(f'{prefix} update-source {settings["source"]}')
+        if 'password' in settings:
+            add(f'{prefix} password {settings["password"]}')
+        if settings.get('type') == 'ibgp':
+            add(f'{prefix} remote-as internal')
+        else:
+            if 'remote_asn' in settings:
+                add(f'{prefix} remote-as {settings["remote_asn"]}')
+            if 'multihop' in settings:
+                add(f'{prefix} ebgp-multihop {settings["multihop"]}')
+
+        for family, family_data in (settings.get('family') or {}).items():
+            af = f'{prefix} address-family {family}-unicast'
+            if family_data.get('nhs'):
+                add(f'{af} nexthop-self')
+            if family_data.get('default_originate'):
+                add(f'{af} default-originate')
+            if 'max_prefixes' in family_data:
+                add(f'{af} maximum-prefix {family_data["max_prefixes"]}')
+            for direction, route_map in (family_data.get('route_map') or {}).items():
+                add(f'{af} route-map {direction} {route_map}')
+
+        family = 'ipv4' if _is_ipv4(name) else 'ipv6'
+
+        if settings.get('reject_in'):
+            add(f'{prefix} address-family {family}-unicast route-map import REJECT-ALL')
+        if settings.get('reject_out'):
+            add(f'{prefix} address-family {family}-unicast route-map export REJECT-ALL')
+
+    add(f"comment protocols bgp {asn} 'Node protocols bgp is SALT MANAGED'")
+
+    return '\n'.join(out) + '\n'
+
+
+def _list_rules(out: List[str], node: str, lists: dict):
+    """
+    Render as-path-list and community-list rules.
+    """
+    for name, list_data in lists.items():
+        for index, rule in enumerate(list_data.get('rules', ()), 1):
+            prefix = f'set policy {node} {name} rule {index * 10}'
+            out.append(f'{prefix} action {rule.get("action", "permit")}')
+            if 'description' in rule:
+                out.append(f'{prefix} description "{rule["description"]}"')
+            out.append(f'{prefix} regex {rule["regex"]}')
+
+
+def _additive(out: List[str], prefix: str, node: str, communities: str):
+    """
+    Render a VyOS 1.4 'set community add' list. Only additive communities are
+    supported by the 1.4 dialect.
+    """
+    communities_list = communities.split(' ')
+
+    if communities_list[-1] == 'additive':
+        for community in communities_list[:-1]:
+            out.append(f"{prefix} set {node} add '{community}'")
+
+
+def policy(grains_version: str, policy_data: dict, **_) -> str:
+    """
+    Render states/policy/templates/vyos.jinja.
+
+    grains_version: str
+        The device's 'version' grain
+
+    policy_data: dict
+        The policy column
+
+    """
+    v14 = _is_v14(grains_version)
+
+    out: List[str] = [
+        'delete policy as-path-list',
+        'delete policy community-list',
+        'delete policy prefix-list',
+        'delete policy prefix-list6',
+        'delete policy route-map',
+    ]
+    add = out.append
+
+    _list_rules(out, 'as-path-list', policy_data.get('aspath_lists') or {})
+    _list_rules(out, 'community-list', policy_data.get('community_lists') or {})
+
+    for family, lists in (policy_data.get('prefix_lists') or {}).items():
+        suffix = '6' if family == 'ipv6' else ''
+
+        for name, list_data in lists.items():
+            for index, rule in enumerate(list_data.get('rules', ()), 1):
+                prefix = f'set policy prefix-list{suffix} {name} rule {index * 5}'
+                if 'le' in rule:
+                    add(f'{prefix} le {rule["le"]}')
+                if 'ge' in rule:
+                    add(f'{prefix} ge {rule["ge"]}')
+                add(f'{prefix} action {rule.get("action", "permit")}')
+                add(f'{prefix} prefix {rule["prefix"]}')
+
+    for family, route_maps in (policy_data.get('route_maps') or {}).items():
+        if family == 'ipv6':
+            vyos_family, scope = 'ipv6', 'global'
+        else:
+            vyos_family, scope = 'ip', ''
+
+        for name, route_map in route_maps.items():
+            for rule in route_map['rules']:
+                prefix = f'set policy route-map {name} rule {rule["number"]}'
+
+                add(f'{prefix} action {rule["action"]}')
+
+                if 'continue' in rule:
+                    add(f'{prefix} continue {rule["continue"]}')
+
+                if 'match' in rule:
+                    match = rule['match']
+                    if 'community_list' in match:
+                        add(
+                            f'{prefix} match community community-list '
+                            f'{match["community_list"]}'
+                        )
+                    if 'as_path' in match:
+                        add(f'{prefix} match as-path {match["as_path"]}')
+                    if 'rpki' in match:
+                        add(f'{prefix} match rpki {match["rpki"]}')
+                    if 'prefix_list' in match:
+                        add(
+                            f'{prefix} match {vyos_family} address prefix-list '
+                            f'{match["prefix_list"]}'
+                        )
+
+                if 'set' in rule:
+                    sets = rule['set']
+                    if 'local_pref' in sets:
+                        add(f'{prefix} set local-preference {sets["local_pref"]}')
+                    if 'origin' in sets:
+                        add(f'{prefix} set origin {sets["origin"]}')
+                    if 'community' in sets:
+                        if v14:
+                            _additive(out, prefix, 'community', sets['community'])
+                        else:
+                            add(f"{prefix} set community '{sets['community']}'")
+                    if 'large_community' in sets:
+                        if v14:
+                            _additive(
+                                out, prefix, 'large-community', sets['large_community']
+                            )
+                        else:
+                            add(
+                                f"{prefix} set large-community "
+                                f"'{sets['large_community']}'"
+                            )
+                    if 'as_path_exclude' in sets:
+                        if v14:
+                            add(
+                                f"{prefix} set as-path exclude "
+                                f"'{sets['as_path_exclude']}'"
+                            )
+                        else:
+                            add(
+                                f"{prefix} set as-path-exclude "
+                                f"'{sets['as_path_exclude']}'"
+                            )
+                    if 'next_hop' in sets:
+                        add(
+                            f'{prefix} set {vyos_family}-next-hop {scope} '
+                            f'{sets["next_hop"]}'
+                        )
+
+    add(
+        "comment policy 'The following policy nodes are SALT MANAGED: as-path-list, "
+        "community-list, prefix-list, prefix-list6, route-map'"
+    )
+
+    return '\n'.join(out) + '\n'
+
+
+def firewall(grains_version: str, fw_data: dict, interfaces: dict, **_) -> str:
+    """
+    Render states/firewall/templates/vyos.jinja.
+
+    grains_version: str
+        The device's 'version' grain
+
+    fw_data: dict
+        The firewall column
+
+    interfaces: dict
+        The interface column
+
+    """
+    v14 = _is_v14(grains_version)
+
+    if v14:
+        ipv4_name, ipv6_name = 'ipv4 name', 'ipv6 name'
+    else:
+        ipv4_name, ipv6_name = 'name', 'ipv6-name'
+
+    out: List[str] = []
+    add = out.append
+
+    if not v14:
+        add('delete zone-policy')
+
+    add('delete firewall')
+
+    for option, value in (fw_data.get('options') or {}).items():
+        if v14:
+            if option not in ['meta', 'config-trap']:
+                add(f'set firewall global-options {option} {value}')
+        elif option not in ['meta']:
+            add(f'set firewall {option} {value}')
+
+    if 'state_policy' in fw_data:
+        scope = 'global-options state-policy' if v14 else 'state-policy'
+        for state in ('established', 'related'):
+            if state in fw_data['state_policy']:
+                add(
+                    f'set firewall {scope} {state} action '
+                    f'{fw_data["state_policy"][state]}'
+                )
+
+    if not v14 and 'mss_clamp' in fw_data:
+        mss_clamp = fw_data['mss_clamp']
+        for interface in mss_clamp['interfaces']:
+            add(
+                f'set firewall options interface {interface} adjust-mss '
+                f'{mss_clamp["ipv4"]}'
+            )
+            add(
+                f'set firewall options interface {interface} adjust-mss6 '
+                f'{mss_clamp["ipv6"]}'
+            )
+
+    for family, groups in (fw_data.get('groups') or {}).items():
+        node = 'network-group' if family == 'ipv4' else 'ipv6-network-group'
+        for group, group_data in groups.items():
+            for network in group_data.get('networks', ()):
+                add(f'set firewall group {node} {group} network {network}')
+
+    for family, policies in (fw_data.get('policies') or {}).items():
+        header = ipv6_name if family == 'ipv6' else ipv4_name
+
+        for name, policy_data in policies.items():
+            prefix = f'set firewall {header} {name}'
+
+            if 'default_action' in policy_data:
+                add(f'{prefix} default-action {policy_data["default_action"]}')
+
+            for index, rule in enumerate(policy_data.get('rules', ()), 1):
+                rule_prefix = f'{prefix} rule {index * 5}'
+
+                add(f'{rule_prefix} action {rule["action"]}')
+
+                for state in rule.get('state', ()):
+                    if v14:
+                        add(f'{rule_prefix} state {state}')
+                    else:
+                        add(f'{rule_prefix} state {state} enable')
+
+                if 'protocol' in rule:
+                    add(f'{rule_prefix} protocol {rule["protocol"]}')
+
+                if 'source' in rule:
+                    source = rule['source']
+                    if 'network_group' in source:
+                        add(
+                            f'{rule_prefix} source group network-group '
+                            f'{source["network_group"]}'
+                        )
+                    if 'port' in source:
+                        # The template lists the destination ports here
+                        ports = ','.join(str(p) for p in rule['destination']['port'])
+                        add(f"{rule_prefix} source port '{ports}'")
+
+                if 'destination' in rule:
+                    destination = rule['destination']
+                    if 'network_group' in destination:
+                        add(
+                            f'{rule_prefix} destination group network-group '
+                            f'{destination["network_group"]}'
+                        )
+                    if 'port' in destination:
+                        ports = ','.join(str(p) for p in destination['port'])
+                        add(f"{rule_prefix} destination port '{ports}'")
+
+    if v14:
+        forward_rule = {'ipv4': 5, 'ipv6': 5}
+        input_rule = {'ipv4': 5, 'ipv6': 5}
+
+        for iface, iface_data in interfaces.items():
+            for fw_type, fw_type_data in iface_data.get('firewall', {}).items():
+                for family, target in fw_type_data.items():
+                    if fw_type in ('egress', 'ingress'):
+                        chain, counters = 'forward', forward_rule
+                    elif fw_type == 'local':
+                        chain, counters = 'input', input_rule
+                    else:
+                        continue
+
+                    direction = 'outbound' if fw_type == 'egress' else 'inbound'
+                    prefix = (
+                        f'set firewall {family} {chain} filter rule {counters[family]}'
+                    )
+
+                    add(f'{prefix} action jump')
+                    add(f'{prefix} jump-target {target}')
+                    add(f'{prefix} {direction}-interface name "{iface}"')
+
+                    counters[family] += 5
+
+        for family in ['ipv4', 'ipv6']:
+            if forward_rule[family] > 5:
+                add(f'set firewall {family} forward filter default-action accept')
+            if input_rule[family] > 5:
+                add(f'set firewall {family} input filter default-action accept')
+
+    zone_header = 'set firewall zone' if v14 else 'set zone-policy zone'
+
+    for zone, zone_data in (fw_data.get('zone_policy') or {}).items():
+        prefix = f'{zone_header} {zone}'
+
+        if 'default_action' in zone_data:
+            add(f'{prefix} default-action {zone_data["default_action"]}')
+
+        for from_rule in zone_data.get('from', ()):
+            add(
+                f'{prefix} from {from_rule["zone"]} firewall ipv6-name '
+                f'{from_rule["ipv6_ruleset"]}'
+            )
+            add(
+                f'{prefix} from {from_rule["zone"]} firewall name '
+                f'{from_rule["ipv4_ruleset"]}'
+            )
+
+        for interface in zone_data.get('interfaces', ()):
+            add(f'{prefix} interface {interface}')
+
+    if not v14:
+        add("comment zone-policy 'Node zone-policy is SALT MANAGED'")
+
+    add("comment firewall 'Node firewall is SALT MANAGED'")
+
+    return '\n'.join(out) + '\n'
+
+
+RENDERERS: Dict[str, Callable[..., str]] = {
+    'bgp': bgp,
+    'policy': policy,
+    'firewall': firewall,
+}
+
+
+def render(section: str, grains_version: str, **template_vars) -> str:
+    """
+    Render the configuration of section with its Python renderer.
+
+    section: str
+        One of RENDERERS, e.g. 'bgp'
+
+    grains_version: str
+        The device's 'version' grain
+
+    template_vars
+        The variables the section's vyos.jinja template is rendered with
+
+    """
+    return RENDERERS[section](grains_version, **template_vars)
+
+
+def renderer_hash() -> str:
+    """
+    Return a hash of this module, used in place of a template hash when
+    fingerprinting configuration rendered by it.
+    """
+    with open(__file__, 'rb') as f:
+        return 'sha256:' + hashlib.sha256(f.read()).hexdigest()
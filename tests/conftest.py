@@ -0,0 +1,35 @@
+"""
+Make the salt-netdb utils importable as the Salt loader does: modules below
+states/_utils are imported by name (e.g. 'import netdb_api').
+"""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+STATES = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'states')
+
+sys.path.insert(0, os.path.join(STATES, '_utils'))
+
+
+@pytest.fixture
+def load_module():
+    """
+    Return a function loading a Salt module of states/ with the given loader
+    dunders, e.g. load_module('_modules/column.py', __opts__={}).
+    """
+
+    def _load(path: str, **dunders):
+        name = os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(name, os.path.join(STATES, path))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)  # type: ignore
+
+        for key, value in dunders.items():
+            setattr(module, key, value)
+
+        return module
+
+    return _load
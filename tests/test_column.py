@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+
+class FakeNetdbAPI:
+    """
+    Stands in for NetdbAPI, serving columns from a dict and counting the
+    requests made.
+    """
+
+    columns = {
+        'device': {'location': 'Singapore', 'roles': ['edge']},
+        'bgp': {'neighbors': {'192.0.2.1': {'remote_asn': 64512}}},
+    }
+    requests: list = []
+
+    def __init__(self, pillar, cachedir=None):
+        pass
+
+    def get_column(self, router, column):
+        self.requests.append(('get_column', column))
+        return self.columns[column]
+
+    def get_columns(self, router, columns):
+        if columns:
+            self.requests.append(('get_columns', tuple(columns)))
+        return {
+            column: self.columns[column] for column in columns if column in self.columns
+        }
+
+
+@pytest.fixture
+def column(load_module):
+    # No job ID anywhere: neither __opts__['jid'] nor __pub_jid
+    module = load_module(
+        '_modules/column.py',
+        __opts__={'cachedir': None},
+        __pillar__={},
+        __grains__={'node_name': 'SIN1'},
+        __context__={},
+    )
+    module.NetdbAPI = FakeNetdbAPI
+    FakeNetdbAPI.requests = []
+
+    return module
+
+
+def test_item_fetches_each_column_once(column):
+    out = column.item('device:location', 'bgp', 'firewall')
+
+    assert out == {
+        'device:location': 'Singapore',
+        'bgp': FakeNetdbAPI.columns['bgp'],
+        'firewall': [],
+    }
+    assert FakeNetdbAPI.requests == [('get_columns', ('device', 'bgp', 'firewall'))]
+
+
+def test_item_reuses_memo_within_job(column):
+    column.item('device', 'bgp')
+    column.item('device:roles')
+    column.pull('bgp')
+
+    assert FakeNetdbAPI.requests == [('get_columns', ('device', 'bgp'))]
+
+
+def test_item_refresh(column):
+    column.item('device')
+    column.item('device', refresh=True)
+
+    assert FakeNetdbAPI.requests == [
+        ('get_columns', ('device',)),
+        ('get_columns', ('device',)),
+    ]
+
+
+def test_item_bad_delimiter(column):
+    assert column.item('device', delimiter=None)['result'] is False
+
+
+def test_memo_per_job(column):
+    column.item('device')
+
+    # The minion runs every job in a thread of its own
+    job = threading.Thread(
+        target=column.item, args=('device',), name='20261018120000000000'
+    )
+    job.start()
+    job.join()
+
+    column.item('device')
+
+    assert FakeNetdbAPI.requests == [
+        ('get_columns', ('device',)),
+        ('get_columns', ('device',)),
+    ]
+    # The memo of the ended job is dropped once another job starts
+    other = threading.Thread(
+        target=column.item, args=('bgp',), name='20261018120000000001'
+    )
+    other.start()
+    other.join()
+
+    assert not any(
+        job.endswith('20261018120000000000')
+        for job in column.__context__[column._MEMO_KEY]
+    )
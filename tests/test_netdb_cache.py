@@ -0,0 +1,22 @@
+import os
+
+from netdb_cache import ColumnCache
+
+
+def test_store_and_load(tmp_path):
+    cache = ColumnCache(str(tmp_path), {'enabled': True})
+    cache.store('SIN1', 'bgp', {'neighbors': {}})
+
+    assert cache.load('SIN1', 'bgp')['data'] == {'neighbors': {}}
+
+
+def test_store_unwritable_cachedir(tmp_path):
+    # A file where the cache directory should be makes every write fail
+    cachedir = tmp_path / 'cachedir'
+    cachedir.write_text('')
+
+    cache = ColumnCache(str(cachedir), {'enabled': True})
+    cache.store('SIN1', 'bgp', {'neighbors': {}})
+
+    assert not os.path.isdir(cache.path)
+    assert cache.load('SIN1', 'bgp') is None
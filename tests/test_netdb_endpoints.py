@@ -0,0 +1,93 @@
+import io
+import time
+
+import pytest
+from requests import ConnectionError as RequestsConnectionError, Response
+
+import netdb_endpoints
+from netdb_endpoints import EndpointSelector, send_read
+
+PRIMARY = 'http://netdb-local/api/'
+SECONDARY = 'http://netdb/api/'
+
+
+@pytest.fixture(autouse=True)
+def selector(monkeypatch):
+    selector = EndpointSelector()
+    monkeypatch.setattr(netdb_endpoints, 'ENDPOINTS', selector)
+    return selector
+
+
+def _response(status: int) -> Response:
+    resp = Response()
+    resp.status_code = status
+    resp.raw = io.BytesIO(b'{}')
+    return resp
+
+
+def _server(behaviour: dict):
+    """
+    Return a send callable answering every base URL with a (delay, status)
+    pair, where a status of None raises a connection error.
+    """
+
+    def _send(url: str) -> Response:
+        delay, status = behaviour[url]
+        time.sleep(delay)
+        if status is None:
+            raise RequestsConnectionError(f'{url}: connection refused')
+        return _response(status)
+
+    return _send
+
+
+def test_fails_over_on_server_error(selector):
+    send = _server({PRIMARY: (0, 500), SECONDARY: (0, 200)})
+
+    resp, url = send_read([PRIMARY, SECONDARY], send)
+
+    assert (resp.status_code, url) == (200, SECONDARY)
+    assert selector.stats()[PRIMARY]['errors'] == 1
+    assert selector.stats()[SECONDARY]['errors'] == 0
+
+
+def test_fails_over_on_connection_error(selector):
+    send = _server({PRIMARY: (0, None), SECONDARY: (0, 200)})
+
+    resp, url = send_read([PRIMARY, SECONDARY], send)
+
+    assert (resp.status_code, url) == (200, SECONDARY)
+    assert selector.stats()[PRIMARY]['errors'] == 1
+
+
+def test_all_endpoints_failing_returns_server_error():
+    send = _server({PRIMARY: (0, 503), SECONDARY: (0, None)})
+
+    resp, url = send_read([PRIMARY, SECONDARY], send)
+
+    assert (resp.status_code, url) == (503, PRIMARY)
+
+
+def test_all_endpoints_unreachable_raises():
+    send = _server({PRIMARY: (0, None), SECONDARY: (0, None)})
+
+    with pytest.raises(RequestsConnectionError):
+        send_read([PRIMARY, SECONDARY], send)
+
+
+def test_hedged_fast_server_error_does_not_win():
+    # The hedge to SECONDARY fails fast; the slower 200 from PRIMARY wins
+    send = _server({PRIMARY: (0.2, 200), SECONDARY: (0, 500)})
+
+    resp, url = netdb_endpoints._send_hedged([PRIMARY, SECONDARY], send, 0.05)
+
+    assert (resp.status_code, url) == (200, PRIMARY)
+
+
+def test_hedged_server_error_hedges_at_once(selector):
+    send = _server({PRIMARY: (0, 500), SECONDARY: (0.05, 200)})
+
+    resp, url = netdb_endpoints._send_hedged([PRIMARY, SECONDARY], send, 1.0)
+
+    assert (resp.status_code, url) == (200, SECONDARY)
+    assert selector.stats()[PRIMARY]['error_rate'] > 0
@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+import netdb_runner
+
+
+class FakeSalt(dict):
+    def __init__(self, pillar: dict):
+        super().__init__({'pillar.show_pillar': self.show_pillar})
+        self.pillar = pillar
+        self.compiled = 0
+
+    def show_pillar(self) -> dict:
+        self.compiled += 1
+        return self.pillar
+
+
+@pytest.fixture
+def opts(tmp_path, monkeypatch):
+    root = tmp_path / 'pillar'
+    root.mkdir()
+    (root / 'netdb.sls').write_text('netdb: {}\n')
+
+    walks = []
+    signature = netdb_runner._pillar_signature
+    monkeypatch.setattr(
+        netdb_runner,
+        '_pillar_signature',
+        lambda opts: walks.append(1) or signature(opts),
+    )
+
+    netdb_runner.invalidate()
+    yield {'pillar_roots': {'base': [str(root)]}, 'walks': walks, 'root': root}
+    netdb_runner.invalidate()
+
+
+def test_pillar_roots_walked_once_per_job(opts):
+    salt = FakeSalt({'netdb': {'url': 'http://netdb/api/'}})
+
+    for _ in range(5):
+        assert netdb_runner.get_settings(opts, salt)['netdb']['url']
+
+    assert len(opts['walks']) == 1
+    assert salt.compiled == 1
+
+
+def test_new_job_sees_pillar_change(opts):
+    salt = FakeSalt({'netdb': {'url': 'http://netdb/api/'}})
+    netdb_runner.get_settings(opts, salt)
+
+    (opts['root'] / 'netdb_local.sls').write_text('netdb_local: {}\n')
+
+    job = threading.Thread(target=netdb_runner.get_settings, args=(opts, salt))
+    job.start()
+    job.join()
+
+    assert len(opts['walks']) == 2
+    assert salt.compiled == 2